@@ -4,12 +4,18 @@ Anthropic Claude client implementation with retry logic and cost tracking.
 """
 
 import asyncio
-from typing import Optional
+import logging
+import time
+from typing import AsyncIterator, ClassVar, Dict, List, Optional, Tuple
 from anthropic import AsyncAnthropic, APIError, RateLimitError, APIConnectionError
 
 from core.config import settings
 from core.logger import get_logger, token_logger
-from ai_clients.base import AIClient, CompletionRequest, CompletionResponse, MessageRole
+from ai_clients.cache import LLMCache
+from ai_clients.http_pool import get_shared_http_client
+from ai_clients.limiter import get_limiter
+from ai_clients.retry import build_retrying, sleep_until
+from ai_clients.base import AIClient, CompletionRequest, CompletionResponse
 
 
 class AnthropicClient(AIClient):
@@ -22,10 +28,14 @@ class AnthropicClient(AIClient):
     - Claude 3 Haiku
     """
 
+    # SDK clients keyed by (api_key, shared HTTP pool identity)
+    _sdk_clients: ClassVar[Dict[Tuple[Optional[str], int], AsyncAnthropic]] = {}
+
     def __init__(
         self,
         api_key: Optional[str] = None,
-        logger_name: str = "ai_client.anthropic"
+        logger_name: str = "ai_client.anthropic",
+        cache: Optional[LLMCache] = None
     ):
         """
         Initialize Anthropic client.
@@ -33,18 +43,32 @@ class AnthropicClient(AIClient):
         Args:
             api_key: Anthropic API key (uses settings.ANTHROPIC_API_KEY if None)
             logger_name: Logger name
+            cache: Response cache (uses the process-wide cache if None)
         """
-        super().__init__(api_key or settings.ANTHROPIC_API_KEY, logger_name)
+        super().__init__(api_key or settings.ANTHROPIC_API_KEY, logger_name, cache)
         self.logger = get_logger(logger_name)
-        self.client = AsyncAnthropic(api_key=self.api_key)
 
-        # Cost per 1M tokens (as of 2025)
+        # Reuse one SDK client per API key so short-lived instances share auth and pool state.
+        # SDK retries are off: build_retrying() in complete() owns retries and backoff.
+        http_client = get_shared_http_client()
+        sdk_key = (self.api_key, id(http_client))
+        self.client = self._sdk_clients.get(sdk_key)
+        if self.client is None:
+            self.client = AsyncAnthropic(api_key=self.api_key, http_client=http_client, max_retries=0)
+            self._sdk_clients[sdk_key] = self.client
+        # Streaming and batch-job calls run outside build_retrying(), so they keep SDK retries
+        self._retrying_client = self.client.with_options(max_retries=settings.MAX_RETRIES)
+
+        self.limiter = get_limiter("anthropic")
+
+        # Cost per 1M tokens (as of 2025); cache reads are 10% and cache writes 125% of input
         self.costs = {
-            'claude-3-5-sonnet': {'input': 3.00, 'output': 15.00},
-            'claude-3-opus': {'input': 15.00, 'output': 75.00},
-            'claude-3-sonnet': {'input': 3.00, 'output': 15.00},
-            'claude-3-haiku': {'input': 0.25, 'output': 1.25},
+            'claude-3-5-sonnet': {'input': 3.00, 'output': 15.00, 'cached': 0.30, 'cache_write': 3.75},
+            'claude-3-opus': {'input': 15.00, 'output': 75.00, 'cached': 1.50, 'cache_write': 18.75},
+            'claude-3-sonnet': {'input': 3.00, 'output': 15.00, 'cached': 0.30, 'cache_write': 3.75},
+            'claude-3-haiku': {'input': 0.25, 'output': 1.25, 'cached': 0.025, 'cache_write': 0.3125},
         }
+        self._build_rate_table()
 
     def is_reasoning_model(self, model: str) -> bool:
         """Claude models don't have separate reasoning mode"""
@@ -54,32 +78,45 @@ class AnthropicClient(AIClient):
         self,
         model: str,
         input_tokens: int,
-        output_tokens: int
+        output_tokens: int,
+        cached_tokens: int = 0,
+        cache_creation_tokens: int = 0,
+        batch: bool = False
     ) -> float:
-        """Calculate cost for Anthropic API call"""
-        # Find matching model
-        model_key = None
-        for key in self.costs.keys():
-            if key in model.lower():
-                model_key = key
-                break
-
-        if not model_key:
+        """
+        Calculate cost for Anthropic API call.
+
+        Cache reads are billed at 10% and cache writes at 125% of the
+        base input price. ``input_tokens`` includes both. Message Batches
+        are billed at 50%.
+        """
+        row = self._model_row(model)
+
+        if row is None:
             # Default to claude-3-5-sonnet pricing
             self.logger.warning(f"Unknown model for cost calculation: {model}, using Claude 3.5 Sonnet pricing")
-            model_key = 'claude-3-5-sonnet'
+            row = self._model_ids['claude-3-5-sonnet']
+
+        input_rate, output_rate, cached_rate, write_rate = self._rates[row]
+        cost = float(
+            (input_tokens - cached_tokens - cache_creation_tokens) * input_rate
+            + cached_tokens * cached_rate
+            + cache_creation_tokens * write_rate
+            + output_tokens * output_rate
+        )
 
-        rates = self.costs[model_key]
-        input_cost = (input_tokens / 1_000_000) * rates['input']
-        output_cost = (output_tokens / 1_000_000) * rates['output']
+        return cost * 0.5 if batch else cost
 
-        return input_cost + output_cost
+    @staticmethod
+    def _cache_block(text: str) -> list:
+        """Wrap text in a content block tagged for ephemeral prompt caching"""
+        return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
 
     async def complete(self, request: CompletionRequest) -> CompletionResponse:
         """
         Generate text completion using Anthropic Claude API.
 
-        Implements automatic retry with exponential backoff.
+        Implements automatic retry with jittered exponential backoff.
 
         Args:
             request: Completion request
@@ -92,27 +129,95 @@ class AnthropicClient(AIClient):
         """
         model = request.model or settings.MODEL_FALLBACK
 
-        self.logger.info(
-            f"Starting Anthropic completion",
-            extra={
-                'model_name': model,
-                'message_count': len(request.messages)
-            }
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "Starting Anthropic completion",
+                extra={
+                    'model_name': model,
+                    'message_count': len(request.messages)
+                }
+            )
+
+        api_params = self._build_params(request, model)
+
+        # Serve from cache when possible
+        cache_key, cached = await self._cache_lookup(
+            request, model, api_params.get("temperature"), request.max_tokens
         )
+        if cached is not None:
+            self.logger.info("Anthropic completion served from cache", extra={'model_name': model})
+            return cached
 
-        # Anthropic requires system prompt separate from messages
-        system_prompt = request.system_prompt
-        messages = []
+        # Retry with jittered exponential backoff; each attempt passes the rate limiter
+        estimated_tokens = self._estimate_tokens(request)
+        try:
+            async for attempt in build_retrying(self.logger, (RateLimitError, APIConnectionError)):
+                with attempt:
+                    self.logger.info(
+                        "Anthropic API call attempt %d/%d", attempt.retry_state.attempt_number, settings.MAX_RETRIES
+                    )
+                    async with self.limiter.acquire(estimated_tokens):
+                        result = await self._do_call(api_params, model)
 
-        # Extract system message if present
-        for msg in request.messages:
-            if msg.role == MessageRole.SYSTEM:
-                system_prompt = msg.content
-            else:
-                messages.append({
-                    "role": msg.role.value,
-                    "content": msg.content
-                })
+        except (RateLimitError, APIConnectionError) as e:
+            raise Exception(f"Anthropic API failed after {settings.MAX_RETRIES} attempts: {str(e)}")
+
+        except Exception as e:
+            self.logger.error(f"Unexpected error in Anthropic completion: {str(e)}")
+            raise
+
+        await self._cache_store(cache_key, request, result)
+        return result
+
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[str]:
+        """
+        Stream text completion chunks from the Anthropic API.
+
+        Args:
+            request: Completion request
+
+        Yields:
+            Generated text chunks
+        """
+        model = request.model or settings.MODEL_FALLBACK
+        api_params = self._build_params(request, model)
+
+        cache_key, cached = await self._cache_lookup(
+            request, model, api_params.get("temperature"), request.max_tokens
+        )
+        if cached is not None:
+            yield cached.content
+            return
+
+        t_start = time.monotonic()
+        ttft = None
+
+        async with self.limiter.acquire(self._estimate_tokens(request)):
+            async with self._retrying_client.messages.stream(**api_params) as response:
+                async for text in response.text_stream:
+                    if ttft is None:
+                        ttft = time.monotonic() - t_start
+                    yield text
+                final_message = await response.get_final_message()
+
+        # Reuse the regular parser for usage, cost and token logging
+        result = self._parse_response(final_message, model)
+        self._log_stream_metrics(model, ttft, time.monotonic() - t_start, result.output_tokens)
+        await self._cache_store(cache_key, request, result)
+
+    def _build_params(self, request: CompletionRequest, model: str) -> dict:
+        """
+        Build Messages API parameters for a request.
+
+        Args:
+            request: Completion request
+            model: Resolved model name
+
+        Returns:
+            Messages API parameters
+        """
+        # Anthropic requires system prompt separate from messages
+        system_prompt, messages = self._split_system(request)
 
         # Build API parameters
         api_params = {
@@ -121,9 +226,20 @@ class AnthropicClient(AIClient):
             "max_tokens": request.max_tokens or settings.DEFAULT_MAX_TOKENS,
         }
 
-        # Add system prompt if provided
+        # Add system prompt if provided (long static prompts are cached)
         if system_prompt:
-            api_params["system"] = system_prompt
+            if len(system_prompt) >= settings.PROMPT_CACHE_MIN_CHARS:
+                api_params["system"] = self._cache_block(system_prompt)
+            else:
+                api_params["system"] = system_prompt
+
+        # Cache the conversation prefix up to the turn before the current query
+        if len(messages) > 1:
+            prefix_turn = messages[-2]
+            messages[-2] = {
+                "role": prefix_turn["role"],
+                "content": self._cache_block(prefix_turn["content"])
+            }
 
         # Add temperature if not reasoning model
         if request.temperature is not None:
@@ -131,77 +247,153 @@ class AnthropicClient(AIClient):
         else:
             api_params["temperature"] = settings.DEFAULT_TEMPERATURE
 
-        # Retry loop
-        for attempt in range(settings.MAX_RETRIES):
-            try:
-                self.logger.info(f"Anthropic API call attempt {attempt + 1}/{settings.MAX_RETRIES}")
-
-                response = await self.client.messages.create(**api_params)
-
-                # Extract response data
-                content = ""
-                for block in response.content:
-                    if hasattr(block, 'text'):
-                        content += block.text
-
-                if not content:
-                    raise ValueError("Empty response from Anthropic")
-
-                # Extract usage information
-                usage = response.usage
-                input_tokens = usage.input_tokens if usage else 0
-                output_tokens = usage.output_tokens if usage else 0
-                total_tokens = input_tokens + output_tokens
-
-                # Calculate cost
-                cost = self._calculate_cost(model, input_tokens, output_tokens)
-
-                # Log token usage
-                token_logger.log_completion(
-                    model=model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    component=self.logger_name
-                )
-
-                self.logger.info(
-                    f"Anthropic completion successful",
-                    extra={
-                        'model_name': model,
-                        'tokens': total_tokens,
-                        'cost': f"${cost:.6f}"
-                    }
-                )
-
-                return CompletionResponse(
-                    content=content.strip(),
-                    model=model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    total_tokens=total_tokens,
-                    cost=cost,
-                    provider="anthropic",
-                    raw_response=response
-                )
-
-            except (RateLimitError, APIConnectionError) as e:
-                self.logger.warning(f"Anthropic API error (attempt {attempt + 1}): {str(e)}")
-
-                if attempt < settings.MAX_RETRIES - 1:
-                    wait_time = min(
-                        settings.BACKOFF_MIN * (2 ** attempt),
-                        settings.BACKOFF_MAX
-                    )
-                    self.logger.info(f"Retrying in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
-                else:
-                    raise Exception(f"Anthropic API failed after {settings.MAX_RETRIES} attempts: {str(e)}")
+        return api_params
+
+    async def _do_call(self, api_params: dict, model: str) -> CompletionResponse:
+        """
+        Perform a single Anthropic API call and parse the response.
+
+        Args:
+            api_params: Messages API parameters
+            model: Model name used for cost calculation
+
+        Returns:
+            Parsed completion response
+        """
+        try:
+            raw = await self.client.messages.with_raw_response.create(**api_params)
+        except RateLimitError as e:
+            self._record_rate_limits(e.response.headers)
+            raise
 
-            except Exception as e:
-                self.logger.error(f"Unexpected error in Anthropic completion: {str(e)}")
-                raise
+        self._record_rate_limits(raw.headers)
+        return self._parse_response(raw.parse(), model)
+
+    def _parse_response(self, response, model: str, batch: bool = False) -> CompletionResponse:
+        """
+        Convert an Anthropic message into a CompletionResponse.
 
-        raise Exception("Anthropic completion failed: Maximum retries exceeded")
+        Args:
+            response: Message returned by the API
+            model: Model name used for cost calculation
+            batch: True if the message came from the Message Batches API
+
+        Returns:
+            Parsed completion response
+        """
+        # Extract response data (text blocks only)
+        content = "".join(
+            block.text for block in response.content if getattr(block, "type", None) == "text"
+        ).strip()
+
+        if not content:
+            raise ValueError("Empty response from Anthropic")
+
+        # Extract usage information
+        usage = response.usage
+        cached_tokens = (getattr(usage, "cache_read_input_tokens", 0) or 0) if usage else 0
+        cache_creation_tokens = (getattr(usage, "cache_creation_input_tokens", 0) or 0) if usage else 0
+        # Anthropic reports cache reads/writes separately from input_tokens
+        input_tokens = (usage.input_tokens + cached_tokens + cache_creation_tokens) if usage else 0
+        output_tokens = usage.output_tokens if usage else 0
+        total_tokens = input_tokens + output_tokens
+
+        # Calculate cost
+        cost = self._calculate_cost(
+            model, input_tokens, output_tokens,
+            cached_tokens=cached_tokens,
+            cache_creation_tokens=cache_creation_tokens,
+            batch=batch
+        )
+
+        # Log token usage
+        token_logger.log_completion(
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            component=self.logger_name,
+            cached_tokens=cached_tokens
+        )
+
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "Anthropic completion successful",
+                extra={
+                    'model_name': model,
+                    'tokens': total_tokens,
+                    'cost': cost
+                }
+            )
+
+        return CompletionResponse(
+            content=content,
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=total_tokens,
+            cost=cost,
+            provider="anthropic",
+            raw_response=response,
+            cached_input_tokens=cached_tokens,
+            cache_creation_tokens=cache_creation_tokens
+        )
+
+    async def complete_batch(
+        self,
+        requests: List[CompletionRequest],
+        use_batch_api: bool = False,
+        max_concurrency: Optional[int] = None
+    ) -> List[CompletionResponse]:
+        """
+        Generate completions for many requests.
+
+        With ``use_batch_api=True`` the requests are submitted through the
+        Message Batches API (50% cheaper, results within 24h). Otherwise
+        they run as concurrency-bounded ``complete()`` calls.
+
+        Args:
+            requests: Completion requests
+            use_batch_api: Submit through the Message Batches API
+            max_concurrency: Parallel call limit when not using the batch API
+
+        Returns:
+            Completion responses in input order
+
+        Raises:
+            Exception: If any request in the batch fails
+        """
+        if not use_batch_api:
+            return await super().complete_batch(requests, max_concurrency=max_concurrency)
+
+        models = [request.model or settings.MODEL_FALLBACK for request in requests]
+        batch = await self._retrying_client.messages.batches.create(
+            requests=[
+                {"custom_id": f"req-{i}", "params": self._build_params(request, model)}
+                for i, (request, model) in enumerate(zip(requests, models))
+            ]
+        )
+        self.logger.info(f"Anthropic batch submitted: {batch.id} ({len(requests)} requests)")
+
+        # Poll with exponential backoff until processing ends
+        wait_time = settings.BATCH_POLL_MIN
+        while batch.processing_status != "ended":
+            await sleep_until(wait_time)
+            wait_time = min(wait_time * 2, settings.BATCH_POLL_MAX)
+            batch = await self._retrying_client.messages.batches.retrieve(batch.id)
+
+        # Reassemble results in input order via custom_id
+        results: List[Optional[CompletionResponse]] = [None] * len(requests)
+        async for entry in await self._retrying_client.messages.batches.results(batch.id):
+            index = int(entry.custom_id.split("-", 1)[1])
+            if entry.result.type != "succeeded":
+                raise Exception(f"Anthropic batch request {entry.custom_id} {entry.result.type}")
+            results[index] = self._parse_response(entry.result.message, models[index], batch=True)
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            raise Exception(f"Anthropic batch {batch.id} is missing results for requests: {missing}")
+
+        return results
 
 
 # ============================================================
@@ -6,11 +6,22 @@ Defines common data structures and abstract base class that all
 AI clients must implement.
 """
 
+import asyncio
+import hashlib
+import logging
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Any
+from typing import List, Optional, Any, Tuple, AsyncIterator
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
+from core.config import settings
+from ai_clients.cache import LLMCache, get_default_cache
+from ai_clients.limiter import parse_rate_limit_headers
+from ai_clients.prefix_cache import PrefixFormatter
+from ai_clients.serialization import WireMessage
+
 
 class MessageRole(str, Enum):
     """Message role in conversation"""
@@ -19,7 +30,15 @@ class MessageRole(str, Enum):
     ASSISTANT = "assistant"
 
 
-@dataclass
+# Plain-dict lookup for role strings (avoids enum .value access per message)
+_ROLE_STR = {
+    MessageRole.SYSTEM: "system",
+    MessageRole.USER: "user",
+    MessageRole.ASSISTANT: "assistant",
+}
+
+
+@dataclass(slots=True, frozen=True)
 class Message:
     """Conversation message"""
     role: MessageRole
@@ -55,6 +74,8 @@ class CompletionResponse:
         cost: Estimated cost in USD
         provider: AI provider name (openai, anthropic, google)
         raw_response: Original response object for debugging
+        cached_input_tokens: Input tokens served from the provider prompt cache
+        cache_creation_tokens: Input tokens written to the provider prompt cache
     """
     content: str
     model: str
@@ -64,6 +85,8 @@ class CompletionResponse:
     cost: float
     provider: str
     raw_response: Optional[Any] = None
+    cached_input_tokens: int = 0
+    cache_creation_tokens: int = 0
 
 
 class AIClient(ABC):
@@ -74,16 +97,26 @@ class AIClient(ABC):
     consistent behavior across the application.
     """
 
-    def __init__(self, api_key: str, logger_name: str = "ai_client"):
+    def __init__(
+        self,
+        api_key: str,
+        logger_name: str = "ai_client",
+        cache: Optional[LLMCache] = None
+    ):
         """
         Initialize AI client.
 
         Args:
             api_key: API key for the provider
             logger_name: Logger name for tracking
+            cache: Response cache (uses the process-wide cache if None)
         """
         self.api_key = api_key
         self.logger_name = logger_name
+        self.cache = cache if cache is not None else get_default_cache()
+        self._prefix_formatter = PrefixFormatter()
+        # Semantic indexes keyed by (model, system prompt hash, max_tokens)
+        self._semantic_caches: dict[Tuple[Optional[str], str, Optional[int]], LLMCache] = {}
 
     @abstractmethod
     async def complete(self, request: CompletionRequest) -> CompletionResponse:
@@ -101,20 +134,68 @@ class AIClient(ABC):
         """
         pass
 
+    @abstractmethod
+    def stream(self, request: CompletionRequest) -> AsyncIterator[str]:
+        """
+        Stream text completion chunks as they are generated.
+
+        Implementations are async generators that log time-to-first-token
+        and write the full response through to the cache when done.
+
+        Args:
+            request: Completion request with messages and parameters
+
+        Yields:
+            Generated text chunks
+        """
+        pass
+
+    async def complete_batch(
+        self,
+        requests: List[CompletionRequest],
+        use_batch_api: bool = False,
+        max_concurrency: Optional[int] = None
+    ) -> List[CompletionResponse]:
+        """
+        Generate completions for many requests.
+
+        The default implementation runs ``complete()`` calls through a
+        semaphore, so each finished request immediately frees a slot for
+        the next one. Providers with a batch API override this to submit
+        the requests as one discounted job when ``use_batch_api`` is True.
+
+        Args:
+            requests: Completion requests
+            use_batch_api: Use the provider batch API if supported
+            max_concurrency: Parallel call limit (uses settings.BATCH_MAX_CONCURRENCY if None)
+
+        Returns:
+            Completion responses in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.BATCH_MAX_CONCURRENCY)
+
+        async def run(request: CompletionRequest) -> CompletionResponse:
+            async with semaphore:
+                return await self.complete(request)
+
+        return list(await asyncio.gather(*(run(request) for request in requests)))
+
     @abstractmethod
     def _calculate_cost(
         self,
         model: str,
         input_tokens: int,
-        output_tokens: int
+        output_tokens: int,
+        cached_tokens: int = 0
     ) -> float:
         """
         Calculate cost for the API call.
 
         Args:
             model: Model name
-            input_tokens: Input token count
+            input_tokens: Input token count (including cached tokens)
             output_tokens: Output token count
+            cached_tokens: Input tokens served from the provider prompt cache
 
         Returns:
             Estimated cost in USD
@@ -134,30 +215,313 @@ class AIClient(ABC):
         """
         pass
 
-    def _format_messages(self, request: CompletionRequest) -> List[Dict[str, str]]:
+    def _build_rate_table(self) -> None:
+        """
+        Pre-resolve ``self.costs`` into a per-token rate matrix.
+
+        Each row holds (input, output, cache read, cache write) USD per
+        token; missing cache rates fall back to the input rate.
+        ``self._model_ids`` maps cost-table keys to rows, and
+        ``self._model_key_cache`` memoizes model name -> cost-table key.
+        """
+        self._cost_keys = sorted(self.costs, key=len, reverse=True)
+        self._model_ids = {key: row for row, key in enumerate(self.costs)}
+        self._model_key_cache: dict[str, Optional[str]] = {key: key for key in self.costs}
+        self._rates = np.array(
+            [
+                (
+                    rates['input'],
+                    rates['output'],
+                    rates.get('cached', rates['input']),
+                    rates.get('cache_write', rates['input']),
+                )
+                for rates in self.costs.values()
+            ],
+            dtype=np.float64
+        ) / 1_000_000
+
+    def _model_row(self, model: str) -> Optional[int]:
+        """Get the rate-table row for a model, or None if unknown"""
+        return self._model_ids.get(self._resolve_model_key(model))
+
+    def _calculate_cost_batch(
+        self,
+        model_ids: np.ndarray,
+        input_tokens: np.ndarray,
+        output_tokens: np.ndarray,
+        cached_tokens: Optional[np.ndarray] = None,
+        cache_creation_tokens: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Vectorized cost for many calls at once (e.g., a batch job).
+
+        Args:
+            model_ids: Rate-table rows (see ``_model_row``)
+            input_tokens: Input token counts (including cached tokens)
+            output_tokens: Output token counts
+            cached_tokens: Input tokens read from the prompt cache
+            cache_creation_tokens: Input tokens written to the prompt cache
+
+        Returns:
+            Cost in USD per call
+        """
+        input_tokens = np.asarray(input_tokens, dtype=np.float64)
+        cached = np.zeros_like(input_tokens) if cached_tokens is None else np.asarray(cached_tokens, dtype=np.float64)
+        created = np.zeros_like(input_tokens) if cache_creation_tokens is None else np.asarray(cache_creation_tokens, dtype=np.float64)
+
+        usage = np.stack(
+            [input_tokens - cached - created, np.asarray(output_tokens, dtype=np.float64), cached, created],
+            axis=1
+        )
+        rates = np.take(self._rates, np.asarray(model_ids, dtype=np.intp), axis=0)
+        return np.einsum("ij,ij->i", usage, rates)
+
+    def _resolve_model_key(self, model: str) -> Optional[str]:
+        """
+        Resolve a model name to its cost-table key.
+
+        Keys are tried longest first (``self._cost_keys``) so that more
+        specific entries like ``gpt-4o-mini`` win over ``gpt-4o``.
+
+        Args:
+            model: Model name (e.g., "gpt-4o-mini-2024-07-18")
+
+        Returns:
+            Matching cost-table key, or None if no key matches
+        """
+        try:
+            return self._model_key_cache[model]
+        except KeyError:
+            pass
+
+        model_lower = model.lower()
+        key = next((key for key in self._cost_keys if key in model_lower), None)
+        # Model names can come from requests; keep the memo bounded
+        if len(self._model_key_cache) < len(self.costs) + 256:
+            self._model_key_cache[model] = key
+        return key
+
+    def _format_messages(self, request: CompletionRequest) -> List[WireMessage]:
         """
         Convert Message objects to provider-specific format.
 
+        Formatted prefixes are cached, so repeated calls with a growing
+        conversation only format the newly appended messages.
+
         Args:
             request: Completion request
 
         Returns:
             List of message dictionaries
         """
-        messages = []
+        messages, _ = self._prefix_formatter.format(self._message_pairs(request))
+        return messages
+
+    def prompt_token_ids(self, request: CompletionRequest, model: Optional[str] = None) -> Optional[List[int]]:
+        """
+        Tokenize the request's message contents for length-budget checks.
+
+        Token IDs for previously seen conversation prefixes are reused.
+        Requires ``tiktoken`` and a model it recognises.
+
+        Args:
+            request: Completion request
+            model: Model name (uses request.model if None)
+
+        Returns:
+            Token IDs, or None if no tokenizer is available for the model
+        """
+        _, token_ids = self._prefix_formatter.format(
+            self._message_pairs(request), model or request.model
+        )
+        return token_ids
+
+    @staticmethod
+    def _message_pairs(request: CompletionRequest) -> List[Tuple[str, str]]:
+        """Flatten the request into (role, content) pairs"""
+        pairs = []
 
         # Add system prompt if provided
         if request.system_prompt:
-            messages.append({
-                "role": "system",
-                "content": request.system_prompt
-            })
+            pairs.append(("system", request.system_prompt))
 
         # Add conversation messages
         for msg in request.messages:
-            messages.append({
-                "role": msg.role.value,
-                "content": msg.content
-            })
+            pairs.append((_ROLE_STR[msg.role], msg.content))
 
-        return messages
+        return pairs
+
+    @staticmethod
+    def _split_system(request: CompletionRequest) -> Tuple[Optional[str], List[WireMessage]]:
+        """
+        Separate the system prompt from conversation turns in one pass.
+
+        The last SYSTEM message wins; ``request.system_prompt`` is used
+        when the conversation has none.
+
+        Args:
+            request: Completion request
+
+        Returns:
+            Tuple of (system prompt or None, non-system message dicts)
+        """
+        system_prompt = request.system_prompt
+        messages = []
+        for msg in request.messages:
+            if msg.role == MessageRole.SYSTEM:
+                system_prompt = msg.content
+            else:
+                messages.append({"role": _ROLE_STR[msg.role], "content": msg.content})
+        return system_prompt, messages
+
+    async def _cache_lookup(
+        self,
+        request: CompletionRequest,
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        messages: Optional[List[WireMessage]] = None
+    ) -> Tuple[Optional[str], Optional[CompletionResponse]]:
+        """
+        Look up a cached response for the request.
+
+        Deterministic calls (temperature == 0) use an exact-match key;
+        other calls fall back to semantic lookup on the user turns when
+        the cache has an embedder (see ``_semantic_cache``).
+
+        Args:
+            messages: Already formatted messages, if the caller has them
+                      (avoids formatting the conversation a second time)
+
+        Returns:
+            Tuple of (exact-match key or None, cached response or None)
+        """
+        if self.cache is None:
+            return None, None
+
+        if temperature == 0:
+            if messages is None:
+                messages = self._format_messages(request)
+            key = LLMCache.make_key(model, messages, temperature, max_tokens)
+            cached = await self.cache.get(key)
+        else:
+            key = None
+            semantic = self._semantic_cache(request)
+            if semantic is None:
+                return None, None
+            cached = await semantic.get_similar(self._user_text(request))
+
+        if cached is None:
+            return key, None
+
+        return key, CompletionResponse(
+            content=cached["content"],
+            model=cached["model"],
+            input_tokens=cached["input_tokens"],
+            output_tokens=cached["output_tokens"],
+            total_tokens=cached["total_tokens"],
+            cost=0.0,
+            provider=cached["provider"]
+        )
+
+    async def _cache_store(
+        self,
+        key: Optional[str],
+        request: CompletionRequest,
+        response: CompletionResponse
+    ) -> None:
+        """Write a successful response through to the cache"""
+        if self.cache is None:
+            return
+
+        value = {
+            "content": response.content,
+            "model": response.model,
+            "input_tokens": response.input_tokens,
+            "output_tokens": response.output_tokens,
+            "total_tokens": response.total_tokens,
+            "provider": response.provider,
+        }
+
+        if key is not None:
+            await self.cache.set(key, value)
+        else:
+            semantic = self._semantic_cache(request)
+            if semantic is not None:
+                await semantic.set_similar(self._user_text(request), value)
+
+    def _semantic_cache(self, request: CompletionRequest) -> Optional[LLMCache]:
+        """
+        Semantic index for the request's model, system prompt and max_tokens.
+
+        Each combination gets its own index so a hit never crosses models or
+        system prompts. Returns None when the cache has no embedder.
+        """
+        if self.cache is None or self.cache.embedder is None:
+            return None
+
+        system = request.system_prompt or "\n".join(
+            m.content for m in request.messages if m.role == MessageRole.SYSTEM
+        )
+        namespace = (request.model, hashlib.sha256(system.encode()).hexdigest(), request.max_tokens)
+        semantic = self._semantic_caches.get(namespace)
+        if semantic is None:
+            semantic = self._semantic_caches[namespace] = LLMCache(
+                backend=self.cache.backend,
+                ttl=self.cache.ttl,
+                embedder=self.cache.embedder,
+                similarity_threshold=self.cache.similarity_threshold
+            )
+        return semantic
+
+    def _record_rate_limits(self, headers) -> None:
+        """
+        Feed provider rate-limit headers into ``self.limiter``.
+
+        Args:
+            headers: HTTP response headers from a success or 429 response
+        """
+        budget = parse_rate_limit_headers(headers)
+        if not budget:
+            return
+
+        self.limiter.update_budget(**budget)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Rate limit budget updated",
+                extra={
+                    'rpm_remaining': budget.get('requests_remaining'),
+                    'tpm_remaining': budget.get('tokens_remaining')
+                }
+            )
+
+    def _log_stream_metrics(
+        self,
+        model: str,
+        ttft: Optional[float],
+        total_time: float,
+        output_tokens: int
+    ) -> None:
+        """Log time-to-first-token and decode throughput for a streamed call"""
+        ttft = ttft if ttft is not None else total_time
+        decode_time = total_time - ttft
+        self.logger.info(
+            "Streaming completion finished",
+            extra={
+                'model_name': model,
+                'ttft_ms': round(ttft * 1000, 1),
+                'tokens_per_sec': round(output_tokens / decode_time, 1) if decode_time > 0 else None,
+                'duration': round(total_time, 3)
+            }
+        )
+
+    @staticmethod
+    def _estimate_tokens(request: CompletionRequest) -> int:
+        """Estimate input + output tokens for rate limiting (~4 chars/token)"""
+        chars = len(request.system_prompt or "") + sum(len(m.content) for m in request.messages)
+        return chars // 4 + (request.max_tokens or settings.DEFAULT_MAX_TOKENS)
+
+    @staticmethod
+    def _user_text(request: CompletionRequest) -> str:
+        """Concatenate user turns for semantic cache lookup"""
+        return "\n".join(m.content for m in request.messages if m.role == MessageRole.USER)
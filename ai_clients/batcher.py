@@ -0,0 +1,84 @@
+# potensia_ai/ai_clients/batcher.py
+"""
+Micro-batching for AI provider calls.
+
+Concurrent requests that each need a small completion (topic refinement,
+keyword extraction, validation) can be packed into one multi-prompt
+request. ``MicroBatcher`` holds the shared collection loop; subclasses
+implement ``_dispatch`` to issue the packed request and resolve each
+caller's future with its slice of the response.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Set, Tuple
+
+BatchItem = Tuple[Any, asyncio.Future]
+
+
+class MicroBatcher(ABC):
+    """
+    Collects concurrent submissions into batches.
+
+    Callers await ``submit(item)``; a background task collects up to
+    ``max_size`` items or waits ``window_ms``, then hands the batch of
+    ``(item, future)`` pairs to ``_dispatch``. A result of None means the
+    caller should use its regular per-item path: a batch of one is
+    resolved with None without a call, and futures left unresolved by
+    ``_dispatch`` (including after an error) are resolved with None.
+
+    Args:
+        max_size: Items per batched call
+        window_ms: Max wait to fill a batch
+    """
+
+    def __init__(self, max_size: int, window_ms: int):
+        self.max_size = max_size
+        self.window_ms = window_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Strong references to in-flight batch tasks (the loop only keeps weak ones)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its batched result (None = use the regular path)"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+
+        future = loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        window = self.window_ms / 1000
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + window
+            while len(batch) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[BatchItem]) -> None:
+        try:
+            # A single item gains nothing from the batch prompt
+            if len(batch) > 1:
+                await self._dispatch(batch)
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    @abstractmethod
+    async def _dispatch(self, batch: List[BatchItem]) -> None:
+        """Issue one request for the batch and resolve each future"""
@@ -0,0 +1,77 @@
+# potensia_ai/ai_clients/breaker.py
+"""
+Circuit breaker for AI provider calls.
+
+After ``BREAKER_FAIL_MAX`` consecutive failures the breaker opens and
+callers skip the provider (returning their fallback) instead of running
+a full retry/backoff sequence against an outage. After
+``BREAKER_RESET_TIMEOUT`` seconds one probe call is let through; its
+outcome closes the breaker again or re-opens it.
+"""
+
+import time
+from typing import Dict, Optional
+
+from core.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Args:
+        fail_max: Consecutive failures that open the breaker
+        reset_timeout: Seconds to stay open before allowing a probe call
+    """
+
+    def __init__(self, fail_max: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.fail_max = fail_max or settings.BREAKER_FAIL_MAX
+        self.reset_timeout = reset_timeout if reset_timeout is not None else settings.BREAKER_RESET_TIMEOUT
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may proceed.
+
+        Returns:
+            True when closed, or for the single probe once the reset timeout
+            has passed; False while open or while the probe is in flight
+            (a probe that never reports back is replaced after another timeout)
+        """
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._opened_at = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker and reset the failure count"""
+        self.state = CLOSED
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        """Count a failure; open the breaker at the threshold or on a failed probe"""
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.fail_max:
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get the process-wide breaker for a provider (e.g. ``"openai"``)"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker()
+    return breaker
@@ -0,0 +1,216 @@
+# potensia_ai/ai_clients/cache.py
+"""
+Response cache for AI client completions.
+
+Deterministic calls (temperature == 0) are cached by an exact hash of
+the request. Non-deterministic calls can optionally be served by a
+semantic lookup when an embedding function is configured.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import settings
+from ai_clients.serialization import WireMessage, dumps, loads
+
+
+class InMemoryBackend:
+    """LRU cache backend over an ``OrderedDict`` with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._store: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._store[key]
+            return None
+
+        self._store.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._store[key] = (value, expires_at)
+        self._store.move_to_end(key)
+
+        while len(self._store) > self.max_entries:
+            self._store.popitem(last=False)
+
+
+class RedisBackend:
+    """Redis cache backend (requires the ``redis`` package)"""
+
+    def __init__(self, url: str, prefix: str = "llm_cache:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self._redis.get(self.prefix + key)
+        return loads(raw) if raw else None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        await self._redis.set(self.prefix + key, dumps(value), ex=ttl)
+
+
+class LLMCache:
+    """
+    Completion cache with exact-match and optional semantic lookup.
+
+    Args:
+        backend: Storage backend exposing async ``get``/``set``
+        ttl: Entry lifetime in seconds
+        embedder: Optional async function mapping text to an embedding vector.
+                  Enables semantic lookup for non-deterministic calls.
+        similarity_threshold: Minimum cosine similarity for a semantic hit
+    """
+
+    def __init__(
+        self,
+        backend: Optional[Any] = None,
+        ttl: Optional[int] = None,
+        embedder: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        similarity_threshold: Optional[float] = None
+    ):
+        self.backend = backend or InMemoryBackend(settings.LLM_CACHE_MAX_ENTRIES)
+        self.ttl = ttl if ttl is not None else settings.LLM_CACHE_TTL
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold or settings.LLM_CACHE_SIMILARITY
+        self.stats = {"hits": 0, "misses": 0}
+
+        # Semantic index: unit-normalised embeddings and their cached values
+        self._vectors: Optional[np.ndarray] = None
+        self._semantic_values: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[WireMessage],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> str:
+        """Build a stable hash key for a completion request"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        return hashlib.sha256(dumps(payload, sort_keys=True)).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up an exact-match entry"""
+        value = await self.backend.get(key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store an exact-match entry"""
+        await self.backend.set(key, value, ttl if ttl is not None else self.ttl)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        text: Optional[str] = None,
+        ttl: Optional[int] = None,
+        cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the cached value for ``key``, computing and storing it on a miss.
+
+        Args:
+            key: Exact-match key
+            compute: Zero-argument coroutine function producing the value
+            text: Text for the semantic lookup (used only with an embedder)
+            ttl: Entry lifetime override in seconds
+            cacheable: Predicate on the computed value; falsy skips storing it
+
+        Returns:
+            Tuple of (value, whether it came from the cache)
+        """
+        value = await self.get(key)
+        if value is None and text is not None:
+            value = await self.get_similar(text)
+        if value is not None:
+            return value, True
+
+        value = await compute()
+        if cacheable is not None and not cacheable(value):
+            return value, False
+        await self.set(key, value, ttl)
+        if text is not None:
+            await self.set_similar(text, value)
+        return value, False
+
+    async def get_similar(self, text: str) -> Optional[Dict[str, Any]]:
+        """Look up the most similar cached prompt (requires an embedder)"""
+        if self.embedder is None or self._vectors is None:
+            if self.embedder is not None:
+                self.stats["misses"] += 1
+            return None
+
+        query = await self._embed(text)
+        scores = self._vectors @ query
+        best = int(np.argmax(scores))
+
+        if scores[best] >= self.similarity_threshold:
+            self.stats["hits"] += 1
+            return self._semantic_values[best]
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set_similar(self, text: str, value: Dict[str, Any]) -> None:
+        """Index a prompt embedding for semantic lookup"""
+        if self.embedder is None:
+            return
+
+        vector = await self._embed(text)
+        if self._vectors is None:
+            self._vectors = vector[np.newaxis, :]
+        else:
+            self._vectors = np.vstack([self._vectors, vector])
+        self._semantic_values.append(value)
+
+        # Drop the oldest entries beyond capacity
+        overflow = len(self._semantic_values) - settings.LLM_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            self._vectors = self._vectors[overflow:]
+            self._semantic_values = self._semantic_values[overflow:]
+
+    async def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(await self.embedder(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+_default_cache: Optional[LLMCache] = None
+
+
+def get_default_cache() -> Optional[LLMCache]:
+    """
+    Get the process-wide response cache.
+
+    The default cache has no embedder, so only deterministic calls are
+    cached; pass an ``LLMCache`` with an embedder to a client to enable
+    semantic lookup. Returns None when caching is disabled in settings.
+    """
+    global _default_cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        backend = RedisBackend(settings.LLM_CACHE_REDIS_URL) if settings.LLM_CACHE_REDIS_URL else None
+        _default_cache = LLMCache(backend=backend)
+    return _default_cache
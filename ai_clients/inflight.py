@@ -0,0 +1,54 @@
+# potensia_ai/ai_clients/inflight.py
+"""
+In-flight request coalescing for AI provider calls.
+
+When several callers ask for the same result at the same time (e.g. the
+same topic during bulk keyword processing), only the first one issues
+the provider call; the others await its result instead of sending
+duplicate requests.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class RequestCoalescer:
+    """
+    Map of in-flight calls keyed by request identity.
+
+    The shared call runs as its own task, so a cancelled caller does not
+    cancel the work other callers are waiting on. Results (and errors)
+    are delivered to every caller; the entry is dropped once the call
+    finishes, so later requests start a fresh call.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``call`` unless an identical call is already in flight.
+
+        Args:
+            key: Request identity (callers with equal keys share one call)
+            call: Zero-argument coroutine function issuing the request
+
+        Returns:
+            Result of the shared call
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the error as retrieved when every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,206 @@
+# potensia_ai/ai_clients/limiter.py
+"""
+Client-side rate limiting for AI provider calls.
+
+Combines a concurrency semaphore with token buckets for requests per
+minute (RPM) and tokens per minute (TPM). Each finished call releases
+its slot right away, so a fan-out of many requests runs as a sliding
+window rather than in step-wise chunks.
+
+Provider rate-limit response headers can be fed back with
+``update_budget`` so the local buckets track the server's view.
+"""
+
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Mapping, Optional
+
+from core.config import settings
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``capacity`` tokens per minute.
+
+    Refill is computed lazily from elapsed time on each take, so no
+    background task is needed.
+    """
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.tokens = capacity
+        self.refill_rate = capacity / 60.0  # tokens per second
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+
+    def clamp(self, remaining: float) -> None:
+        """Lower the available budget to the server-reported remaining amount"""
+        self._refill()
+        self.tokens = min(self.tokens, max(remaining, 0.0))
+
+    async def take(self, amount: float) -> None:
+        """Wait until ``amount`` tokens are available, then consume them"""
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.refill_rate)
+
+
+class AsyncRateLimiter:
+    """
+    Concurrency + RPM/TPM gate for provider calls.
+
+    Args:
+        max_concurrency: Maximum in-flight calls
+        rpm_limit: Requests per minute (0 disables the RPM bucket)
+        tpm_limit: Tokens per minute (0 disables the TPM bucket)
+    """
+
+    def __init__(self, max_concurrency: int, rpm_limit: int = 0, tpm_limit: int = 0):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rpm = TokenBucket(rpm_limit) if rpm_limit > 0 else None
+        self._tpm = TokenBucket(tpm_limit) if tpm_limit > 0 else None
+        self._resume_at = 0.0
+
+    def update_budget(
+        self,
+        requests_remaining: Optional[float] = None,
+        tokens_remaining: Optional[float] = None,
+        requests_reset: Optional[float] = None,
+        tokens_reset: Optional[float] = None
+    ) -> None:
+        """
+        Sync the limiter with provider rate-limit headers.
+
+        Args:
+            requests_remaining: Requests left in the current window
+            tokens_remaining: Tokens left in the current window
+            requests_reset: Seconds until the request window resets
+            tokens_reset: Seconds until the token window resets
+        """
+        if requests_remaining is not None and self._rpm is not None:
+            self._rpm.clamp(requests_remaining)
+        if tokens_remaining is not None and self._tpm is not None:
+            self._tpm.clamp(tokens_remaining)
+
+        # Exhausted window: hold new calls until the server says it resets
+        now = time.monotonic()
+        if requests_remaining == 0 and requests_reset:
+            self._resume_at = max(self._resume_at, now + requests_reset)
+        if tokens_remaining == 0 and tokens_reset:
+            self._resume_at = max(self._resume_at, now + tokens_reset)
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int = 0) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot and consume rate-limit budget for one call.
+
+        Args:
+            estimated_tokens: Estimated input + output tokens for the call
+        """
+        async with self._semaphore:
+            delay = self._resume_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self._rpm is not None:
+                await self._rpm.take(1)
+            if self._tpm is not None:
+                await self._tpm.take(estimated_tokens)
+            yield
+
+
+def _parse_reset(value: str) -> Optional[float]:
+    """
+    Parse a reset header into seconds from now.
+
+    Accepts OpenAI durations ("1s", "6m0s", "20ms") and Anthropic
+    RFC 3339 timestamps.
+    """
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max((reset_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def parse_rate_limit_headers(headers: Optional[Mapping[str, str]]) -> Dict[str, Any]:
+    """
+    Extract remaining budget and reset times from provider headers.
+
+    Args:
+        headers: HTTP response headers (OpenAI ``x-ratelimit-*`` or
+                 Anthropic ``anthropic-ratelimit-*``)
+
+    Returns:
+        Keyword arguments for ``AsyncRateLimiter.update_budget``
+        (empty if the response carries no rate-limit headers)
+    """
+    if not headers:
+        return {}
+
+    names = {
+        "requests_remaining": ("x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining"),
+        "tokens_remaining": ("x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining"),
+        "requests_reset": ("x-ratelimit-reset-requests", "anthropic-ratelimit-requests-reset"),
+        "tokens_reset": ("x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset"),
+    }
+
+    budget: Dict[str, Any] = {}
+    for field, header_names in names.items():
+        raw = next((headers.get(name) for name in header_names if headers.get(name) is not None), None)
+        if raw is None:
+            continue
+        if field.endswith("_reset"):
+            value = _parse_reset(raw)
+        else:
+            try:
+                value = float(raw)
+            except ValueError:
+                value = None
+        if value is not None:
+            budget[field] = value
+
+    return budget
+
+
+_limiters: Dict[str, AsyncRateLimiter] = {}
+
+
+def get_limiter(provider: str) -> AsyncRateLimiter:
+    """
+    Get the process-wide rate limiter for a provider.
+
+    Args:
+        provider: Provider name (e.g., "openai", "anthropic")
+
+    Returns:
+        Shared limiter configured from settings
+    """
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = AsyncRateLimiter(
+            max_concurrency=settings.MAX_CONCURRENCY,
+            rpm_limit=settings.RPM_LIMIT,
+            tpm_limit=settings.TPM_LIMIT,
+        )
+        _limiters[provider] = limiter
+    return limiter
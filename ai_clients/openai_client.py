@@ -4,11 +4,19 @@ OpenAI client implementation with retry logic and cost tracking.
 """
 
 import asyncio
-from typing import Optional
+import logging
+import time
+from typing import AsyncIterator, ClassVar, Dict, List, Optional, Tuple
 from openai import AsyncOpenAI, APIError, RateLimitError, APIConnectionError
+from openai.types.chat import ChatCompletion
 
 from core.config import settings
 from core.logger import get_logger, token_logger
+from ai_clients.cache import LLMCache
+from ai_clients.http_pool import get_shared_http_client
+from ai_clients.limiter import get_limiter
+from ai_clients.retry import build_retrying, sleep_until
+from ai_clients.serialization import dumps, loads
 from ai_clients.base import AIClient, CompletionRequest, CompletionResponse
 
 
@@ -22,10 +30,14 @@ class OpenAIClient(AIClient):
     - O1 and O3 reasoning models
     """
 
+    # SDK clients keyed by (api_key, shared HTTP pool identity)
+    _sdk_clients: ClassVar[Dict[Tuple[Optional[str], int], AsyncOpenAI]] = {}
+
     def __init__(
         self,
         api_key: Optional[str] = None,
-        logger_name: str = "ai_client.openai"
+        logger_name: str = "ai_client.openai",
+        cache: Optional[LLMCache] = None
     ):
         """
         Initialize OpenAI client.
@@ -33,22 +45,36 @@ class OpenAIClient(AIClient):
         Args:
             api_key: OpenAI API key (uses settings.OPENAI_API_KEY if None)
             logger_name: Logger name
+            cache: Response cache (uses the process-wide cache if None)
         """
-        super().__init__(api_key or settings.OPENAI_API_KEY, logger_name)
+        super().__init__(api_key or settings.OPENAI_API_KEY, logger_name, cache)
         self.logger = get_logger(logger_name)
-        self.client = AsyncOpenAI(api_key=self.api_key)
 
-        # Cost per 1M tokens (as of 2025)
+        # Reuse one SDK client per API key so short-lived instances share auth and pool state.
+        # SDK retries are off: build_retrying() in complete() owns retries and backoff.
+        http_client = get_shared_http_client()
+        sdk_key = (self.api_key, id(http_client))
+        self.client = self._sdk_clients.get(sdk_key)
+        if self.client is None:
+            self.client = AsyncOpenAI(api_key=self.api_key, http_client=http_client, max_retries=0)
+            self._sdk_clients[sdk_key] = self.client
+        # Streaming and batch-job calls run outside build_retrying(), so they keep SDK retries
+        self._retrying_client = self.client.with_options(max_retries=settings.MAX_RETRIES)
+
+        self.limiter = get_limiter("openai")
+
+        # Cost per 1M tokens (as of 2025); 'cached' is the prompt-cache read rate
         self.costs = {
-            'gpt-4o': {'input': 2.50, 'output': 10.00},
-            'gpt-4o-mini': {'input': 0.150, 'output': 0.600},
+            'gpt-4o': {'input': 2.50, 'output': 10.00, 'cached': 1.25},
+            'gpt-4o-mini': {'input': 0.150, 'output': 0.600, 'cached': 0.075},
             'gpt-4-turbo': {'input': 10.00, 'output': 30.00},
             'gpt-4': {'input': 30.00, 'output': 60.00},
             'gpt-3.5-turbo': {'input': 0.50, 'output': 1.50},
-            'o1-preview': {'input': 15.00, 'output': 60.00},
-            'o1-mini': {'input': 3.00, 'output': 12.00},
-            'o3-mini': {'input': 3.00, 'output': 12.00},
+            'o1-preview': {'input': 15.00, 'output': 60.00, 'cached': 7.50},
+            'o1-mini': {'input': 3.00, 'output': 12.00, 'cached': 1.50},
+            'o3-mini': {'input': 3.00, 'output': 12.00, 'cached': 1.50},
         }
+        self._build_rate_table()
 
     def is_reasoning_model(self, model: str) -> bool:
         """Check if model requires reasoning parameters"""
@@ -59,31 +85,36 @@ class OpenAIClient(AIClient):
         self,
         model: str,
         input_tokens: int,
-        output_tokens: int
+        output_tokens: int,
+        cached_tokens: int = 0,
+        batch: bool = False
     ) -> float:
-        """Calculate cost for OpenAI API call"""
-        # Find matching model
-        model_key = None
-        for key in self.costs.keys():
-            if key in model.lower():
-                model_key = key
-                break
-
-        if not model_key:
+        """
+        Calculate cost for OpenAI API call.
+
+        ``cached_tokens`` (part of ``input_tokens``) are billed at the
+        model's cached rate. Batch API calls are billed at 50%.
+        """
+        row = self._model_row(model)
+
+        if row is None:
             self.logger.warning(f"Unknown model for cost calculation: {model}")
             return 0.0
 
-        rates = self.costs[model_key]
-        input_cost = (input_tokens / 1_000_000) * rates['input']
-        output_cost = (output_tokens / 1_000_000) * rates['output']
+        input_rate, output_rate, cached_rate, _ = self._rates[row]
+        cost = float(
+            (input_tokens - cached_tokens) * input_rate
+            + cached_tokens * cached_rate
+            + output_tokens * output_rate
+        )
 
-        return input_cost + output_cost
+        return cost * 0.5 if batch else cost
 
     async def complete(self, request: CompletionRequest) -> CompletionResponse:
         """
         Generate text completion using OpenAI API.
 
-        Implements automatic retry with exponential backoff.
+        Implements automatic retry with jittered exponential backoff.
 
         Args:
             request: Completion request
@@ -97,15 +128,125 @@ class OpenAIClient(AIClient):
         model = request.model or settings.MODEL_PRIMARY
         is_reasoning = self.is_reasoning_model(model)
 
-        self.logger.info(
-            f"Starting OpenAI completion",
-            extra={
-                'model_name': model,
-                'is_reasoning': is_reasoning,
-                'message_count': len(request.messages)
-            }
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "Starting OpenAI completion",
+                extra={
+                    'model_name': model,
+                    'is_reasoning': is_reasoning,
+                    'message_count': len(request.messages)
+                }
+            )
+
+        api_params = self._build_params(request, model)
+
+        # Serve from cache when possible
+        cache_key, cached = await self._cache_lookup(
+            request, model, api_params.get("temperature"), request.max_tokens, api_params["messages"]
         )
+        if cached is not None:
+            self.logger.info("OpenAI completion served from cache", extra={'model_name': model})
+            return cached
+
+        # Retry with jittered exponential backoff; each attempt passes the rate limiter
+        estimated_tokens = self._estimate_tokens(request)
+        try:
+            async for attempt in build_retrying(self.logger, (RateLimitError, APIConnectionError)):
+                with attempt:
+                    self.logger.info(
+                        "OpenAI API call attempt %d/%d", attempt.retry_state.attempt_number, settings.MAX_RETRIES
+                    )
+                    async with self.limiter.acquire(estimated_tokens):
+                        result = await self._do_call(api_params, model)
+
+        except (RateLimitError, APIConnectionError) as e:
+            raise Exception(f"OpenAI API failed after {settings.MAX_RETRIES} attempts: {str(e)}")
+
+        except Exception as e:
+            self.logger.error(f"Unexpected error in OpenAI completion: {str(e)}")
+            raise
+
+        await self._cache_store(cache_key, request, result)
+        return result
+
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[str]:
+        """
+        Stream text completion chunks from the OpenAI API.
 
+        Args:
+            request: Completion request
+
+        Yields:
+            Generated text chunks
+        """
+        model = request.model or settings.MODEL_PRIMARY
+        api_params = self._build_params(request, model)
+
+        cache_key, cached = await self._cache_lookup(
+            request, model, api_params.get("temperature"), request.max_tokens, api_params["messages"]
+        )
+        if cached is not None:
+            yield cached.content
+            return
+
+        t_start = time.monotonic()
+        ttft = None
+        parts = []
+        usage = None
+
+        async with self.limiter.acquire(self._estimate_tokens(request)):
+            response = await self._retrying_client.chat.completions.create(
+                **api_params,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in response:
+                if chunk.usage:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content or ""
+                if text:
+                    if ttft is None:
+                        ttft = time.monotonic() - t_start
+                    parts.append(text)
+                    yield text
+
+        input_tokens = usage.prompt_tokens if usage else 0
+        output_tokens = usage.completion_tokens if usage else 0
+        cached_tokens = self._cached_tokens(usage)
+        self._log_stream_metrics(model, ttft, time.monotonic() - t_start, output_tokens)
+
+        token_logger.log_completion(
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            component=self.logger_name,
+            cached_tokens=cached_tokens
+        )
+
+        await self._cache_store(cache_key, request, CompletionResponse(
+            content="".join(parts).strip(),
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+            cost=self._calculate_cost(model, input_tokens, output_tokens, cached_tokens=cached_tokens),
+            provider="openai",
+            cached_input_tokens=cached_tokens
+        ))
+
+    def _build_params(self, request: CompletionRequest, model: str) -> dict:
+        """
+        Build chat completion parameters for a request.
+
+        Args:
+            request: Completion request
+            model: Resolved model name
+
+        Returns:
+            Chat completion API parameters
+        """
         # Format messages
         messages = self._format_messages(request)
 
@@ -116,81 +257,182 @@ class OpenAIClient(AIClient):
         }
 
         # Reasoning models use different parameters
-        if is_reasoning:
+        if self.is_reasoning_model(model):
             api_params["max_completion_tokens"] = request.max_tokens or 2000
             # Reasoning models don't support temperature
         else:
             api_params["max_tokens"] = request.max_tokens or settings.DEFAULT_MAX_TOKENS
-            api_params["temperature"] = request.temperature or settings.DEFAULT_TEMPERATURE
-
-        # Retry loop
-        for attempt in range(settings.MAX_RETRIES):
-            try:
-                self.logger.info(f"OpenAI API call attempt {attempt + 1}/{settings.MAX_RETRIES}")
-
-                response = await self.client.chat.completions.create(**api_params)
-
-                # Extract response data
-                content = response.choices[0].message.content
-
-                if not content:
-                    raise ValueError("Empty response from OpenAI")
-
-                # Extract usage information
-                usage = response.usage
-                input_tokens = usage.prompt_tokens if usage else 0
-                output_tokens = usage.completion_tokens if usage else 0
-                total_tokens = usage.total_tokens if usage else (input_tokens + output_tokens)
-
-                # Calculate cost
-                cost = self._calculate_cost(model, input_tokens, output_tokens)
-
-                # Log token usage
-                token_logger.log_completion(
-                    model=model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    component=self.logger_name
-                )
-
-                self.logger.info(
-                    f"OpenAI completion successful",
-                    extra={
-                        'model_name': model,
-                        'tokens': total_tokens,
-                        'cost': f"${cost:.6f}"
-                    }
-                )
-
-                return CompletionResponse(
-                    content=content.strip(),
-                    model=model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    total_tokens=total_tokens,
-                    cost=cost,
-                    provider="openai",
-                    raw_response=response
-                )
-
-            except (RateLimitError, APIConnectionError) as e:
-                self.logger.warning(f"OpenAI API error (attempt {attempt + 1}): {str(e)}")
-
-                if attempt < settings.MAX_RETRIES - 1:
-                    wait_time = min(
-                        settings.BACKOFF_MIN * (2 ** attempt),
-                        settings.BACKOFF_MAX
-                    )
-                    self.logger.info(f"Retrying in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
-                else:
-                    raise Exception(f"OpenAI API failed after {settings.MAX_RETRIES} attempts: {str(e)}")
+            api_params["temperature"] = (
+                request.temperature if request.temperature is not None else settings.DEFAULT_TEMPERATURE
+            )
+
+        return api_params
 
-            except Exception as e:
-                self.logger.error(f"Unexpected error in OpenAI completion: {str(e)}")
-                raise
+    async def _do_call(self, api_params: dict, model: str) -> CompletionResponse:
+        """
+        Perform a single OpenAI API call and parse the response.
+
+        Args:
+            api_params: Chat completion parameters
+            model: Model name used for cost calculation
+
+        Returns:
+            Parsed completion response
+        """
+        try:
+            raw = await self.client.chat.completions.with_raw_response.create(**api_params)
+        except RateLimitError as e:
+            self._record_rate_limits(e.response.headers)
+            raise
 
-        raise Exception("OpenAI completion failed: Maximum retries exceeded")
+        self._record_rate_limits(raw.headers)
+        return self._parse_response(raw.parse(), model)
+
+    @staticmethod
+    def _cached_tokens(usage) -> int:
+        """Prompt tokens served from OpenAI's automatic prompt cache"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        return getattr(details, "cached_tokens", 0) or 0
+
+    def _parse_response(self, response: ChatCompletion, model: str, batch: bool = False) -> CompletionResponse:
+        """
+        Convert a chat completion into a CompletionResponse.
+
+        Args:
+            response: Chat completion returned by the API
+            model: Model name used for cost calculation
+            batch: True if the response came from the Batch API
+
+        Returns:
+            Parsed completion response
+        """
+        # Extract response data
+        content = response.choices[0].message.content
+
+        if not content:
+            raise ValueError("Empty response from OpenAI")
+
+        # Extract usage information
+        usage = response.usage
+        input_tokens = usage.prompt_tokens if usage else 0
+        output_tokens = usage.completion_tokens if usage else 0
+        total_tokens = usage.total_tokens if usage else (input_tokens + output_tokens)
+        cached_tokens = self._cached_tokens(usage)
+
+        # Calculate cost
+        cost = self._calculate_cost(model, input_tokens, output_tokens, cached_tokens=cached_tokens, batch=batch)
+
+        # Log token usage
+        token_logger.log_completion(
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            component=self.logger_name,
+            cached_tokens=cached_tokens
+        )
+
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "OpenAI completion successful",
+                extra={
+                    'model_name': model,
+                    'tokens': total_tokens,
+                    'cost': cost
+                }
+            )
+
+        return CompletionResponse(
+            content=content.strip(),
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=total_tokens,
+            cost=cost,
+            provider="openai",
+            raw_response=response,
+            cached_input_tokens=cached_tokens
+        )
+
+    async def complete_batch(
+        self,
+        requests: List[CompletionRequest],
+        use_batch_api: bool = False,
+        max_concurrency: Optional[int] = None
+    ) -> List[CompletionResponse]:
+        """
+        Generate completions for many requests.
+
+        With ``use_batch_api=True`` the requests are submitted through the
+        OpenAI Batch API (50% cheaper, results within 24h). Otherwise they
+        run as concurrency-bounded ``complete()`` calls.
+
+        Args:
+            requests: Completion requests
+            use_batch_api: Submit through the Batch API
+            max_concurrency: Parallel call limit when not using the Batch API
+
+        Returns:
+            Completion responses in input order
+
+        Raises:
+            Exception: If the batch job or any request in it fails
+        """
+        if not use_batch_api:
+            return await super().complete_batch(requests, max_concurrency=max_concurrency)
+
+        models = [request.model or settings.MODEL_PRIMARY for request in requests]
+        lines = [
+            dumps({
+                "custom_id": f"req-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_params(request, model),
+            })
+            for i, (request, model) in enumerate(zip(requests, models))
+        ]
+
+        input_file = await self._retrying_client.files.create(
+            file=("batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self._retrying_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        self.logger.info(f"OpenAI batch submitted: {batch.id} ({len(requests)} requests)")
+
+        # Poll with exponential backoff until the job reaches a terminal state
+        wait_time = settings.BATCH_POLL_MIN
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await sleep_until(wait_time)
+            wait_time = min(wait_time * 2, settings.BATCH_POLL_MAX)
+            batch = await self._retrying_client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise Exception(f"OpenAI batch {batch.id} ended with status: {batch.status}")
+
+        output = await self._retrying_client.files.content(batch.output_file_id)
+
+        # Reassemble results in input order via custom_id
+        results: List[Optional[CompletionResponse]] = [None] * len(requests)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = loads(line)
+            index = int(item["custom_id"].split("-", 1)[1])
+            body = (item.get("response") or {}).get("body")
+            if item.get("error") or not body:
+                raise Exception(f"OpenAI batch request {item['custom_id']} failed: {item.get('error')}")
+            results[index] = self._parse_response(
+                ChatCompletion.model_validate(body), models[index], batch=True
+            )
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            raise Exception(f"OpenAI batch {batch.id} is missing results for requests: {missing}")
+
+        return results
 
 
 # ============================================================
@@ -0,0 +1,164 @@
+# potensia_ai/ai_clients/prefix_cache.py
+"""
+Prefix cache for message formatting.
+
+Agent loops resend the same system prompt and conversation history on
+every turn with only a few new messages appended. ``PrefixFormatter``
+keeps one entry per conversation (formatted message list and optionally
+its token IDs) keyed by a rolling hash of the whole prefix, and grows it
+in place, so a new turn only formats and tokenizes the messages added
+since the previous turn.
+"""
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.config import settings
+from ai_clients.serialization import WireMessage
+
+
+def _load_encoding(model: Optional[str]):
+    """Get a tiktoken encoding for the model, or None if unavailable"""
+    if not model:
+        return None
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model)
+    except (ImportError, KeyError):
+        return None
+
+
+@dataclass(slots=True)
+class _Conversation:
+    """Formatted messages (and token IDs) for one cached conversation"""
+    formatted: List[WireMessage] = field(default_factory=list)
+    token_ids: Optional[List[int]] = None
+    size: int = 0
+
+
+class PrefixFormatter:
+    """
+    LRU cache of formatted conversations that grow by appending.
+
+    An entry is keyed by a rolling sha256 over every ``(role, content)``
+    pair of its prefix, so a cached list is reused only when the whole
+    prefix matches. When a conversation grows, its entry is extended in
+    place and re-keyed, keeping one entry per conversation.
+
+    Args:
+        token_budget: Maximum number of cached tokens (estimated at
+                      4 chars/token when no tokenizer is available)
+    """
+
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = token_budget or settings.PREFIX_CACHE_TOKEN_BUDGET
+        self._store: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self._cached_tokens = 0
+        self._encodings: Dict[str, object] = {}
+
+    def format(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        model: Optional[str] = None
+    ) -> Tuple[List[WireMessage], Optional[List[int]]]:
+        """
+        Format ``(role, content)`` pairs into message dicts.
+
+        Cached message dicts are shared between calls and must not be
+        mutated by callers.
+
+        Args:
+            pairs: Conversation as ``(role, content)`` tuples
+            model: Model name used to pick a tokenizer (optional)
+
+        Returns:
+            Tuple of (message dicts, token IDs or None if no tokenizer)
+        """
+        encoding = self._get_encoding(model)
+        if not pairs:
+            return [], [] if encoding is not None else None
+
+        # Rolling hash over the prefix; digests[i] covers pairs[:i + 1].
+        # Fields are length-prefixed so no two conversations share a stream.
+        hasher = hashlib.sha256(getattr(encoding, "name", "").encode("utf-8"))
+        digests = []
+        for role, content in pairs:
+            for field_bytes in (role.encode("utf-8"), content.encode("utf-8")):
+                hasher.update(len(field_bytes).to_bytes(8, "little"))
+                hasher.update(field_bytes)
+            digests.append(hasher.hexdigest())
+
+        # Cached entry for the longest matching prefix (taken out; re-keyed below)
+        start = 0
+        entry = None
+        for i in range(len(digests) - 1, -1, -1):
+            entry = self._store.pop(digests[i], None)
+            if entry is not None:
+                start = i + 1
+                break
+
+        if entry is None:
+            entry = _Conversation(token_ids=[] if encoding is not None else None)
+
+        # Format only the tail, appending to the conversation's entry
+        added = 0
+        for role, content in pairs[start:]:
+            entry.formatted.append({"role": role, "content": content})
+            if entry.token_ids is not None:
+                tokens = encoding.encode(content, disallowed_special=())
+                entry.token_ids.extend(tokens)
+                added += len(tokens)
+            else:
+                added += len(content) // 4
+        entry.size += added
+        self._cached_tokens += added
+
+        self._store[digests[-1]] = entry
+        self._evict()
+
+        # Copy the list shells: the entry keeps growing on later turns
+        token_ids = list(entry.token_ids) if entry.token_ids is not None else None
+        return list(entry.formatted), token_ids
+
+    def _evict(self) -> None:
+        while self._cached_tokens > self.token_budget and len(self._store) > 1:
+            _, evicted = self._store.popitem(last=False)
+            self._cached_tokens -= evicted.size
+
+    def _get_encoding(self, model: Optional[str]):
+        if not model:
+            return None
+        if model not in self._encodings:
+            self._encodings[model] = _load_encoding(model)
+        return self._encodings[model]
+
+
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    print("\n" + "="*80)
+    print("PrefixFormatter Test")
+    print("="*80 + "\n")
+
+    formatter = PrefixFormatter()
+    system = ("system", "You are a helpful assistant.")
+
+    # Test 1: Same count and same first/last messages, different middle
+    first, _ = formatter.format([system, ("user", "hi"), ("assistant", "X"), ("user", "ok")])
+    second, _ = formatter.format([system, ("user", "hi"), ("assistant", "Y"), ("user", "ok")])
+    if second[2]["content"] == "Y" and first[2]["content"] == "X":
+        print("[PASS] Different middle messages are not reused")
+    else:
+        print(f"[FAIL] Wrong prefix reused: {second}")
+
+    # Test 2: Appended turn reuses the cached prefix
+    conversation = [system, ("user", "hi"), ("assistant", "Y"), ("user", "ok"), ("assistant", "done")]
+    messages, _ = formatter.format(conversation)
+    if [(m["role"], m["content"]) for m in messages] == conversation:
+        print(f"[PASS] Appended turn formatted ({len(formatter._store)} cached entries)")
+    else:
+        print(f"[FAIL] Unexpected messages: {messages}")
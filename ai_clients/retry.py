@@ -0,0 +1,184 @@
+# potensia_ai/ai_clients/retry.py
+"""
+Retry policy shared by AI provider clients.
+
+Uses tenacity with full-jitter exponential backoff so that a fleet of
+workers rate-limited at the same moment does not retry in lockstep.
+A provider ``Retry-After`` hint, when present, is used as the wait.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional, Tuple, Type
+
+from tenacity import (
+    AsyncRetrying,
+    before_sleep_log,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from core.config import settings
+
+# Server hints below this are treated as "retry immediately"
+_MIN_SLEEP = 0.001
+
+# 4xx statuses that are still worth retrying (timeout, conflict, rate limit)
+_RETRYABLE_CLIENT_STATUSES = frozenset({408, 409, 429})
+
+# 4xx statuses caused by the request itself (bad request, unprocessable);
+# auth / not-found errors are provider-specific and another provider may succeed
+_REQUEST_ERROR_STATUSES = frozenset({400, 422})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How often and how long to retry a provider call.
+
+    Args:
+        attempts: Maximum number of attempts per model
+        backoff_min: Backoff multiplier in seconds
+        backoff_max: Maximum wait between attempts in seconds
+        retry_on: Exception types that trigger a retry
+    """
+    attempts: int
+    backoff_min: float
+    backoff_max: float
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,)
+
+    @classmethod
+    def from_settings(cls, retry_on: Tuple[Type[BaseException], ...] = (Exception,)) -> "RetryPolicy":
+        """Build the default policy from MAX_RETRIES / BACKOFF_MIN / BACKOFF_MAX"""
+        return cls(
+            attempts=settings.MAX_RETRIES,
+            backoff_min=settings.BACKOFF_MIN,
+            backoff_max=settings.BACKOFF_MAX,
+            retry_on=retry_on,
+        )
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        """
+        Check whether an error can succeed on another attempt.
+
+        Provider 4xx responses other than 408/409/429 (bad request, auth,
+        not found, unprocessable) fail the same way every time.
+
+        Args:
+            exc: Exception raised by the provider SDK
+
+        Returns:
+            False for non-retryable client errors or types outside ``retry_on``
+        """
+        status = getattr(exc, "status_code", None)
+        if isinstance(status, int) and 400 <= status < 500 and status not in _RETRYABLE_CLIENT_STATUSES:
+            return False
+        return isinstance(exc, self.retry_on)
+
+    def is_request_error(self, exc: BaseException) -> bool:
+        """
+        Check whether an error is caused by the request shape itself.
+
+        400/422 responses fail the same way on every model, unlike auth
+        or not-found errors (401/403/404) that a fallback provider can avoid.
+
+        Args:
+            exc: Exception raised by the provider SDK
+
+        Returns:
+            True for 400/422 provider responses
+        """
+        return getattr(exc, "status_code", None) in _REQUEST_ERROR_STATUSES
+
+
+def retry_after_seconds(exc: Optional[BaseException]) -> Optional[float]:
+    """
+    Extract the server-suggested retry delay from a provider error.
+
+    Args:
+        exc: Exception raised by the provider SDK
+
+    Returns:
+        Delay in seconds, or None if the response carries no hint
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+
+    return None
+
+
+class wait_retry_after(wait_random_exponential):
+    """Wait for the server's Retry-After; jittered exponential backoff when absent"""
+
+    def __call__(self, retry_state) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        server_hint = retry_after_seconds(exc)
+        if server_hint is None:
+            return super().__call__(retry_state)
+        if server_hint < _MIN_SLEEP:
+            return 0.0
+        return server_hint
+
+
+async def sleep_until(delay: float) -> None:
+    """
+    Sleep on a bare loop timer; skips the event-loop round trip for near-zero delays.
+
+    Args:
+        delay: Seconds to wait
+    """
+    if delay < _MIN_SLEEP:
+        return
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    handle = loop.call_later(delay, future.set_result, None)
+    try:
+        await future
+    finally:
+        handle.cancel()
+
+
+def build_retrying(
+    logger: logging.Logger,
+    retry_exceptions: Tuple[Type[BaseException], ...],
+    policy: Optional[RetryPolicy] = None
+) -> AsyncRetrying:
+    """
+    Build the retry controller for a provider call.
+
+    Args:
+        logger: Logger used to report each retry
+        retry_exceptions: Exception types that trigger a retry
+        policy: Attempt/backoff limits (defaults to the settings-based policy)
+
+    Returns:
+        Configured ``AsyncRetrying`` instance (re-raises the last error)
+    """
+    policy = policy or RetryPolicy.from_settings(retry_exceptions)
+    return AsyncRetrying(
+        sleep=sleep_until,
+        stop=stop_after_attempt(policy.attempts),
+        wait=wait_retry_after(multiplier=policy.backoff_min, max=policy.backoff_max),
+        retry=retry_if_exception_type(retry_exceptions),
+        reraise=True,
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+    )
@@ -0,0 +1,51 @@
+# potensia_ai/ai_clients/serialization.py
+"""
+JSON encoding helpers for cache keys, cache values and batch payloads.
+
+Uses ``orjson`` when it is installed and falls back to the standard
+library otherwise. Both paths emit the same compact UTF-8 output, so
+cache keys stay stable across environments.
+"""
+
+import json
+from typing import Any, TypedDict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class WireMessage(TypedDict):
+    """Provider-ready message; always exactly these two keys, in this order"""
+    role: str
+    content: str
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """
+    Encode an object as compact UTF-8 JSON.
+
+    Args:
+        obj: JSON-serializable object (dataclasses are supported)
+        sort_keys: Sort object keys (for stable hashing)
+
+    Returns:
+        Encoded JSON bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_DATACLASS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+
+    return json.dumps(
+        obj, sort_keys=sort_keys, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Decode JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,18 +1,108 @@
 # potensia_ai/ai_tools/keyword/analyzer.py
 import asyncio
+import copy
+import functools
 import logging
 import random
-import json
-import re
-from typing import List, Dict
-from openai import AsyncOpenAI
+import sys
+import unicodedata
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from cachetools import TTLCache
+from openai import APIError
 from core.config import settings
+from core.clients import get_openai
+from ai_clients.batcher import MicroBatcher
+from ai_clients.cache import LLMCache
+from ai_clients.limiter import get_limiter
+from ai_clients.retry import build_retrying
+from ai_clients.serialization import loads
 
 # Configure logging
 logger = logging.getLogger("keyword.analyzer")
 
-# Initialize OpenAI client
-openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+# Calls go through the provider limiter
+limiter = get_limiter("openai")
+
+
+def canonicalize_topic(topic: str) -> str:
+    """
+    Canonical form of a topic: stripped, NFC-normalized and interned.
+
+    Composed and decomposed Hangul compare equal after this, so every
+    cache key derived from the topic is NFC-based.
+    """
+    return sys.intern(unicodedata.normalize("NFC", topic.strip()))
+
+
+# Exact-match cache: normalized topic -> {"keywords": sorted list, "complete": bool}
+_exact_cache: TTLCache = TTLCache(maxsize=settings.KEYWORD_CACHE_MAX_ENTRIES, ttl=settings.LLM_CACHE_TTL)
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def _normalize_topic(topic: str) -> str:
+    """Cache key for a canonical topic (additionally case insensitive)"""
+    return topic.casefold()
+
+
+# Recent topic embeddings (a cache miss embeds the same topic for lookup and store)
+_embedding_memo: Dict[str, List[float]] = {}
+_EMBEDDING_MEMO_SIZE = 256
+
+
+async def _embed_topic(topic: str) -> List[float]:
+    """Embed a topic for semantic cache lookup"""
+    embedding = _embedding_memo.get(topic)
+    if embedding is None:
+        response = await get_openai().embeddings.create(model=settings.EMBEDDING_MODEL, input=topic)
+        embedding = response.data[0].embedding
+        if len(_embedding_memo) >= _EMBEDDING_MEMO_SIZE:
+            _embedding_memo.pop(next(iter(_embedding_memo)))
+        _embedding_memo[topic] = embedding
+    return embedding
+
+
+# Semantic cache: near-duplicate topics reuse a previous keyword list
+_kw_cache = LLMCache(embedder=_embed_topic)
+
+
+def _covers(entry: Optional[Dict], max_results: int) -> Optional[List[Dict]]:
+    """Return an entry's keywords if it can serve max_results, else None"""
+    if entry is None:
+        return None
+    if entry["complete"] or len(entry["keywords"]) >= max_results:
+        return entry["keywords"]
+    return None
+
+
+async def _semantic_lookup(topic: str, max_results: int) -> Optional[List[Dict]]:
+    """Return cached keywords for a similar topic, or None on miss/failure"""
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    try:
+        cached = await _kw_cache.get_similar(topic)
+    except Exception as e:
+        logger.warning("Semantic cache lookup failed: %s", e)
+        return None
+    return _covers(cached, max_results)
+
+
+async def _remember(topic: str, keywords: List[Dict], complete: bool = True) -> None:
+    """
+    Store a topic's keyword list in the exact and semantic caches.
+
+    ``complete`` is False when the stream was cut short at max_results;
+    such entries only serve requests for at most that many keywords.
+    """
+    entry = {"keywords": copy.deepcopy(keywords), "complete": complete}
+    _exact_cache[_normalize_topic(topic)] = entry
+
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return
+    try:
+        await _kw_cache.set_similar(topic, entry)
+    except Exception as e:
+        logger.warning("Semantic cache store failed: %s", e)
 
 # System prompt for keyword extraction
 KEYWORD_EXTRACTION_PROMPT = """You are an SEO keyword research expert specializing in Korean and English markets.
@@ -47,6 +137,36 @@ IMPORTANT:
 - Competition and difficulty should be between 0.0 and 1.0
 - NO explanations, NO markdown, ONLY the JSON array"""
 
+# Batched variant: several numbered topics, one JSON object keyed by topic number
+KEYWORD_BATCH_PROMPT = KEYWORD_EXTRACTION_PROMPT.split("Return ONLY")[0] + """You will receive several numbered topics.
+Return ONLY a valid JSON object mapping each topic number (as a string) to its keyword array:
+{
+  "1": [
+    {
+      "keyword": "keyword phrase",
+      "search_volume": 15000,
+      "competition": 0.45,
+      "difficulty": 0.6,
+      "type": "primary|long-tail|semantic|question"
+    }
+  ],
+  "2": [...]
+}
+
+IMPORTANT:
+- Return 10-20 keywords per topic
+- Mix different types (primary, long-tail, semantic, question)
+- Use realistic search volumes (100-100000 range)
+- Competition and difficulty should be between 0.0 and 1.0
+- NO explanations, NO markdown, ONLY the JSON object"""
+
+
+# Random source for heuristic metrics (draws are batched per call)
+_rng = np.random.default_rng()
+
+# Prefixes that mark question-style keywords (matched with one str.startswith call)
+QUESTION_PREFIXES = ("어떻게", "왜", "무엇", "how", "why", "what", "when")
+
 
 def calculate_estimated_metrics(keyword: str, topic: str) -> Dict[str, float]:
     """
@@ -78,7 +198,7 @@ def calculate_estimated_metrics(keyword: str, topic: str) -> Dict[str, float]:
         difficulty = random.uniform(0.6, 0.9)
 
     # Question keywords typically have moderate volume
-    if keyword.startswith(("어떻게", "왜", "무엇", "how", "why", "what", "when")):
+    if keyword.startswith(QUESTION_PREFIXES):
         search_volume = random.randint(500, 5000)
         competition = random.uniform(0.2, 0.5)
         difficulty = random.uniform(0.3, 0.6)
@@ -90,6 +210,310 @@ def calculate_estimated_metrics(keyword: str, topic: str) -> Dict[str, float]:
     }
 
 
+# User prompt for a single topic; ``focus`` lists the keyword types to ask for
+KEYWORD_USER_PROMPT = """Topic: {topic}
+
+Extract SEO keywords for this topic. Focus on:
+{focus}
+
+Return the JSON array with {count} keywords."""
+
+_DEFAULT_FOCUS = """1. Main keywords that best represent this topic
+2. Long-tail variations with specific intent
+3. Related semantic keywords
+4. Common questions people search"""
+
+# Large requests are split into two focused calls decoded in parallel
+_SPLIT_THRESHOLD = 20
+_SPLIT_FOCUS = (
+    """1. Main keywords that best represent this topic
+2. Long-tail variations with specific intent""",
+    """1. Related semantic keywords
+2. Common questions people search""",
+)
+
+# Model class is fixed for the process; reasoning models take different parameters
+_IS_REASONING = any(keyword in settings.MODEL_PRIMARY.lower() for keyword in ("o1-", "o3-", "gpt-5"))
+
+# Shared system messages (read-only)
+_SYSTEM_MESSAGES = {
+    KEYWORD_EXTRACTION_PROMPT: {"role": "system", "content": KEYWORD_EXTRACTION_PROMPT},
+    KEYWORD_BATCH_PROMPT: {"role": "system", "content": KEYWORD_BATCH_PROMPT},
+}
+
+
+def _build_api_params(system_prompt: str, user_prompt: str, max_tokens: int) -> Dict:
+    """Build chat completion parameters for the keyword model"""
+    api_params = {
+        "model": settings.MODEL_PRIMARY,
+        "messages": [
+            _SYSTEM_MESSAGES.get(system_prompt) or {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+    }
+
+    # Reasoning models use max_completion_tokens
+    if _IS_REASONING:
+        api_params["max_completion_tokens"] = max_tokens
+    else:
+        api_params["max_tokens"] = max_tokens
+        api_params["temperature"] = 0.3  # Lower temp for more consistent output
+
+    return api_params
+
+
+def _estimate_tokens(api_params: Dict) -> int:
+    """Estimate input + output tokens of a call for the rate limiter (~4 chars/token)"""
+    chars = sum(len(m["content"]) for m in api_params["messages"])
+    return chars // 4 + api_params.get("max_tokens", api_params.get("max_completion_tokens", 0))
+
+
+def _enrich_keywords(keywords_data: List) -> List[Dict]:
+    """
+    Validate raw keyword entries from the model and fill in missing fields.
+
+    Numeric fields are clamped, rounded and sorted as NumPy columns; dicts
+    are only built once, in final order.
+
+    Args:
+        keywords_data: Parsed JSON array from the model
+
+    Returns:
+        List[Dict]: Valid keyword entries sorted by search volume descending
+    """
+    entries = []
+    for kw in keywords_data:
+        if not isinstance(kw, dict) or "keyword" not in kw:
+            logger.warning("Skipping invalid keyword entry: %s", kw)
+            continue
+        keyword = kw.get("keyword", "").strip()
+        if keyword:
+            entries.append((keyword, kw))
+
+    if not entries:
+        return []
+
+    count = len(entries)
+    volumes = np.fromiter((int(kw.get("search_volume", 1000)) for _, kw in entries), dtype=np.int64, count=count)
+    competitions = np.fromiter((float(kw.get("competition", 0.5)) for _, kw in entries), dtype=np.float64, count=count)
+    difficulties = np.fromiter((float(kw.get("difficulty", 0.5)) for _, kw in entries), dtype=np.float64, count=count)
+
+    # Validate numeric fields
+    np.clip(volumes, 0, None, out=volumes)
+    competitions = np.clip(np.round(competitions, 2), 0.0, 1.0)
+    difficulties = np.clip(np.round(difficulties, 2), 0.0, 1.0)
+
+    # Sort by search volume descending (stable, like list.sort)
+    order = np.argsort(-volumes, kind="stable")
+
+    volumes, competitions, difficulties = volumes.tolist(), competitions.tolist(), difficulties.tolist()
+    return [
+        {
+            "keyword": entries[i][0],
+            "search_volume": volumes[i],
+            "competition": competitions[i],
+            "difficulty": difficulties[i],
+            "type": entries[i][1].get("type", "primary")
+        }
+        for i in order.tolist()
+    ]
+
+
+class _JsonArrayItems:
+    """
+    Incremental parser for the objects of a streamed top-level JSON array.
+
+    Tracks bracket depth (ignoring brackets inside strings) and parses
+    each object as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self._done = False
+
+    def feed(self, text: str) -> List:
+        items = []
+        for char in text:
+            if self._done:
+                break
+            if self._depth >= 2:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"' and self._depth >= 1:
+                self._in_string = True
+            elif char in "[{":
+                if char == "[" and not self._started:
+                    self._started = True
+                elif self._depth == 1:
+                    self._buffer = [char]
+                elif not self._started:
+                    continue
+                self._depth += 1
+            elif char in "]}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 1 and self._buffer:
+                    items.append(loads("".join(self._buffer)))
+                    self._buffer = []
+                elif self._depth == 0:
+                    self._done = True
+        return items
+
+
+async def _stream_keywords(api_params: Dict, limit: int):
+    """
+    Stream a keyword completion and parse entries incrementally.
+
+    Args:
+        api_params: Chat completion parameters
+        limit: Stop reading once this many usable entries have arrived
+
+    Returns:
+        Tuple of (raw keyword entries, True if the full response was read)
+    """
+    parser = _JsonArrayItems()
+    entries = []
+    usable = 0
+
+    async with limiter.acquire(_estimate_tokens(api_params)):
+        stream = await get_openai().chat.completions.create(**api_params, stream=True)
+        async with stream:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                for item in parser.feed(text):
+                    entries.append(item)
+                    if isinstance(item, dict) and str(item.get("keyword", "")).strip():
+                        usable += 1
+                if usable >= limit:
+                    return entries, False
+
+    return entries, True
+
+
+async def _complete_keywords(api_params: Dict) -> List:
+    """
+    Request a keyword completion without streaming and parse its JSON array.
+
+    Raises:
+        ValueError: If the response is empty or contains no JSON array
+    """
+    async with limiter.acquire(_estimate_tokens(api_params)):
+        response = await get_openai().chat.completions.create(**api_params)
+
+    content = (response.choices[0].message.content or "").strip()
+    logger.info("Response content length: %d chars", len(content))
+
+    if not content:
+        logger.warning("Empty response from OpenAI (finish reason: %s)", response.choices[0].finish_reason)
+        raise ValueError("Empty response from OpenAI")
+
+    # Extract JSON array from response (handle markdown code blocks)
+    start, end = content.find("["), content.rfind("]")
+    if start < 0 or end <= start:
+        logger.error("No JSON array found in response: %.200s", content)
+        raise ValueError("Invalid response format from OpenAI")
+
+    return loads(content[start:end + 1])
+
+
+async def _fetch_keywords(api_params: Dict, limit: int):
+    """
+    Run one keyword call, streaming unless the model is a reasoning model.
+
+    Returns:
+        Tuple of (raw keyword entries, True if the full response was read)
+    """
+    if not _IS_REASONING:
+        # Stream and parse entries as they arrive; stop once ``limit`` are in
+        return await _stream_keywords(api_params, limit)
+    # Reasoning models: wait for the full completion
+    return await _complete_keywords(api_params), True
+
+
+def _merge_keyword_lists(parts: List[List]) -> List:
+    """Concatenate raw keyword lists, dropping repeated keywords (case-insensitive)"""
+    merged = []
+    seen = set()
+    for entries in parts:
+        for item in entries:
+            if isinstance(item, dict) and isinstance(item.get("keyword"), str):
+                key = item["keyword"].strip().casefold()
+                if key in seen:
+                    continue
+                seen.add(key)
+            merged.append(item)
+    return merged
+
+
+# Output tokens budgeted per topic (same as the single-topic call)
+_KW_TOKENS_PER_TOPIC = 2000
+
+
+class _KeywordBatcher(MicroBatcher):
+    """
+    Micro-batcher that packs concurrent topics into one chat completion.
+
+    Callers await ``submit(topic)``; up to ``KW_BATCH_MAX_SIZE`` topics
+    collected within ``KW_BATCH_WINDOW_MS`` are sent as a single request.
+    The batch size is also capped so that ``_KW_TOKENS_PER_TOPIC`` per topic
+    stays within ``KW_BATCH_MAX_OUTPUT_TOKENS``.
+    A result of None means the caller should use the regular per-topic path.
+    """
+
+    def __init__(self):
+        max_size = min(settings.KW_BATCH_MAX_SIZE, settings.KW_BATCH_MAX_OUTPUT_TOKENS // _KW_TOKENS_PER_TOPIC)
+        super().__init__(max(max_size, 1), settings.KW_BATCH_WINDOW_MS)
+
+    async def _dispatch(self, batch: List) -> None:
+        topics_block = "\n".join(f"{i}. {topic}" for i, (topic, _) in enumerate(batch, 1))
+        user_prompt = f"""Topics:
+{topics_block}
+
+Extract SEO keywords for each topic. Return the JSON object with 10-20 keywords per topic."""
+
+        try:
+            logger.info("Batched keyword analysis for %d topics", len(batch))
+            api_params = _build_api_params(KEYWORD_BATCH_PROMPT, user_prompt, max_tokens=min(
+                _KW_TOKENS_PER_TOPIC * len(batch), settings.KW_BATCH_MAX_OUTPUT_TOKENS
+            ))
+            async with limiter.acquire(_estimate_tokens(api_params)):
+                response = await get_openai().chat.completions.create(**api_params)
+            content = (response.choices[0].message.content or "").strip()
+
+            start, end = content.find("{"), content.rfind("}")
+            results = loads(content[start:end + 1]) if start != -1 and end > start else {}
+            if not isinstance(results, dict):
+                results = {}
+
+            for i, (_, future) in enumerate(batch, 1):
+                keywords_data = results.get(str(i))
+                keywords = _enrich_keywords(keywords_data) if isinstance(keywords_data, list) else []
+                if not future.done():
+                    future.set_result(keywords or None)
+
+        except Exception as e:
+            logger.warning("Batched keyword analysis failed, falling back to per-topic calls: %s", e)
+
+
+_batcher = _KeywordBatcher()
+
+
 async def analyze_keywords(topic: str, max_results: int = 10) -> List[Dict]:
     """
     Analyze a blog topic and extract SEO/AEO optimized keywords.
@@ -124,146 +548,107 @@ async def analyze_keywords(topic: str, max_results: int = 10) -> List[Dict]:
             "type": "primary"
         }
     """
-    logger.info(f"Starting keyword analysis for topic: {topic[:50]}...")
-
-    # Build user prompt with topic
-    user_prompt = f"""Topic: {topic}
-
-Extract SEO keywords for this topic. Focus on:
-1. Main keywords that best represent this topic
-2. Long-tail variations with specific intent
-3. Related semantic keywords
-4. Common questions people search
-
-Return the JSON array with 10-20 keywords."""
+    topic = canonicalize_topic(topic)
+    logger.info("Starting keyword analysis for topic: %.50s...", topic)
+
+    # Serve repeated topics from the exact-match cache
+    cached = _covers(_exact_cache.get(_normalize_topic(topic)), max_results)
+    if cached is not None:
+        cache_stats["hits"] += 1
+        logger.info("Keyword analysis served from cache")
+        return copy.deepcopy(cached[:max_results])
+    cache_stats["misses"] += 1
+
+    # Serve near-duplicate topics from the semantic cache
+    cached = await _semantic_lookup(topic, max_results)
+    if cached is not None:
+        logger.info("Keyword analysis served from semantic cache")
+        return copy.deepcopy(cached[:max_results])
+
+    # Coalesce with concurrent requests into one batched API call.
+    # The batch prompt asks for at most 20 keywords per topic, so larger
+    # requests take the per-topic path, and batched entries are cached as
+    # incomplete (they only serve requests for up to as many keywords).
+    if settings.KW_BATCH_ENABLED and max_results <= _SPLIT_THRESHOLD:
+        keywords = await _batcher.submit(topic)
+        if keywords:
+            await _remember(topic, keywords, complete=False)
+            result = keywords[:max_results]
+            logger.info("Successfully extracted %d keywords (batched)", len(result))
+            return result
 
-    # Retry logic with exponential backoff
-    for attempt in range(settings.MAX_RETRIES):
-        try:
-            logger.info(f"OpenAI API call attempt {attempt + 1}/{settings.MAX_RETRIES}")
-
-            # Determine if this is a reasoning model
-            model_name_lower = settings.MODEL_PRIMARY.lower()
-            is_reasoning = any(keyword in model_name_lower
-                             for keyword in ["o1-", "o3-", "gpt-5"])
-
-            # Build API parameters
-            api_params = {
-                "model": settings.MODEL_PRIMARY,
-                "messages": [
-                    {"role": "system", "content": KEYWORD_EXTRACTION_PROMPT},
-                    {"role": "user", "content": user_prompt}
-                ],
-            }
-
-            # Reasoning models use max_completion_tokens
-            if is_reasoning:
-                api_params["max_completion_tokens"] = 2000
-            else:
-                api_params["max_tokens"] = 2000
-                api_params["temperature"] = 0.3  # Lower temp for more consistent output
-
-            response = await openai_client.chat.completions.create(**api_params)
-
-            # Debug: Check response structure
-            message_content = response.choices[0].message.content
-            if message_content:
-                content = message_content.strip()
-            else:
-                content = ""
-
-            logger.info(f"Response content length: {len(content)} chars")
-
-            if not content:
-                logger.warning(f"Empty response from OpenAI (attempt {attempt + 1})")
-                # Log finish reason for debugging
-                finish_reason = response.choices[0].finish_reason
-                logger.warning(f"Finish reason: {finish_reason}")
-
-                if attempt < settings.MAX_RETRIES - 1:
-                    wait_time = min(settings.BACKOFF_MIN * (2 ** attempt), settings.BACKOFF_MAX)
-                    await asyncio.sleep(wait_time)
-                    continue
+    # Parameters are loop-invariant; build them once for all attempts.
+    # Large requests ask for primary/long-tail and semantic/question keywords
+    # in two parallel calls, since generation time grows with output length.
+    if max_results > _SPLIT_THRESHOLD:
+        per_part = -(-max_results // len(_SPLIT_FOCUS))
+        count = f"{per_part}-{per_part + 5}"
+        params_list = [
+            _build_api_params(
+                KEYWORD_EXTRACTION_PROMPT,
+                KEYWORD_USER_PROMPT.format(topic=topic, focus=focus, count=count),
+                max_tokens=2000
+            )
+            for focus in _SPLIT_FOCUS
+        ]
+    else:
+        user_prompt = KEYWORD_USER_PROMPT.format(topic=topic, focus=_DEFAULT_FOCUS, count="10-20")
+        params_list = [_build_api_params(KEYWORD_EXTRACTION_PROMPT, user_prompt, max_tokens=2000)]
+
+    # Retry with jittered exponential backoff (honours Retry-After); heuristics on final failure
+    try:
+        async for attempt in build_retrying(logger, (APIError, ValueError, TypeError)):
+            with attempt:
+                logger.info(
+                    "OpenAI API call attempt %d/%d", attempt.retry_state.attempt_number, settings.MAX_RETRIES
+                )
+
+                if len(params_list) == 1:
+                    keywords_data, complete = await _fetch_keywords(params_list[0], max_results)
                 else:
-                    raise ValueError("Empty response from OpenAI after all retries")
-
-            # Parse JSON response
-
-            # Extract JSON array from response (handle markdown code blocks)
-            json_match = re.search(r'\[[\s\S]*\]', content)
-            if not json_match:
-                logger.error(f"No JSON array found in response: {content[:200]}")
-                raise ValueError("Invalid response format from OpenAI")
-
-            keywords_data = json.loads(json_match.group())
+                    parts = await asyncio.gather(*(_fetch_keywords(p, max_results) for p in params_list))
+                    keywords_data = _merge_keyword_lists([entries for entries, _ in parts])
+                    complete = all(done for _, done in parts)
 
-            if not isinstance(keywords_data, list) or len(keywords_data) == 0:
-                logger.warning("Parsed data is not a valid list or is empty")
-                if attempt < settings.MAX_RETRIES - 1:
-                    wait_time = min(settings.BACKOFF_MIN * (2 ** attempt), settings.BACKOFF_MAX)
-                    await asyncio.sleep(wait_time)
-                    continue
-                else:
+                if not isinstance(keywords_data, list) or len(keywords_data) == 0:
+                    logger.warning("Parsed data is not a valid list or is empty")
                     raise ValueError("Invalid keyword data structure")
 
-            # Validate and enrich keyword data
-            enriched_keywords = []
-            for kw in keywords_data:
-                if not isinstance(kw, dict) or "keyword" not in kw:
-                    logger.warning(f"Skipping invalid keyword entry: {kw}")
-                    continue
+                # Validate, enrich and sort keyword data
+                enriched_keywords = _enrich_keywords(keywords_data)
 
-                # Ensure all required fields exist
-                keyword_entry = {
-                    "keyword": kw.get("keyword", "").strip(),
-                    "search_volume": kw.get("search_volume", 1000),
-                    "competition": round(kw.get("competition", 0.5), 2),
-                    "difficulty": round(kw.get("difficulty", 0.5), 2),
-                    "type": kw.get("type", "primary")
-                }
+    except Exception as e:
+        logger.error("Keyword analysis failed after %d attempts: %s", settings.MAX_RETRIES, e)
+        logger.warning("Falling back to heuristic keyword generation")
+        return generate_fallback_keywords(topic, max_results)
 
-                # Validate numeric fields
-                keyword_entry["search_volume"] = max(0, int(keyword_entry["search_volume"]))
-                keyword_entry["competition"] = max(0.0, min(1.0, float(keyword_entry["competition"])))
-                keyword_entry["difficulty"] = max(0.0, min(1.0, float(keyword_entry["difficulty"])))
+    # Cache the list (a partial stream only serves requests it covers)
+    await _remember(topic, enriched_keywords, complete)
 
-                if keyword_entry["keyword"]:
-                    enriched_keywords.append(keyword_entry)
+    # Limit to max_results
+    result = enriched_keywords[:max_results]
 
-            # Sort by search volume descending
-            enriched_keywords.sort(key=lambda x: x["search_volume"], reverse=True)
+    logger.info("Successfully extracted %d keywords", len(result))
+    return result
 
-            # Limit to max_results
-            result = enriched_keywords[:max_results]
 
-            logger.info(f"Successfully extracted {len(result)} keywords")
-            return result
+# Long-tail prefixes used by the heuristic fallback
+LONG_TAIL_PREFIXES = ("어떻게", "방법", "가이드", "튜토리얼")
 
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing failed (attempt {attempt + 1}): {str(e)}")
-            if attempt < settings.MAX_RETRIES - 1:
-                wait_time = min(settings.BACKOFF_MIN * (2 ** attempt), settings.BACKOFF_MAX)
-                logger.info(f"Retrying in {wait_time}s...")
-                await asyncio.sleep(wait_time)
-                continue
-            else:
-                # Fallback: generate keywords using heuristics
-                logger.warning("Falling back to heuristic keyword generation")
-                return generate_fallback_keywords(topic, max_results)
 
-        except Exception as e:
-            logger.error(f"Keyword analysis failed (attempt {attempt + 1}): {str(e)}")
-            if attempt < settings.MAX_RETRIES - 1:
-                wait_time = min(settings.BACKOFF_MIN * (2 ** attempt), settings.BACKOFF_MAX)
-                logger.info(f"Retrying in {wait_time}s...")
-                await asyncio.sleep(wait_time)
-                continue
-            else:
-                logger.error("All retry attempts failed, using fallback")
-                return generate_fallback_keywords(topic, max_results)
+@functools.lru_cache(maxsize=512)
+def _fallback_template(topic: str) -> Tuple[Tuple[str, ...], Optional[str], Tuple[str, ...], str]:
+    """
+    Deterministic fallback strings for a topic.
 
-    # Should not reach here, but just in case
-    return generate_fallback_keywords(topic, max_results)
+    Returns:
+        Tuple of (topic words, two-word short keyword or None,
+        long-tail keywords, example keyword)
+    """
+    words = tuple(topic.split())
+    short_kw = " ".join(words[:2]) if len(words) >= 2 else None
+    long_tail_keywords = tuple(f"{prefix} {topic}" for prefix in LONG_TAIL_PREFIXES)
+    return words, short_kw, long_tail_keywords, f"{topic} 예제"
 
 
 def generate_fallback_keywords(topic: str, max_results: int = 10) -> List[Dict]:
@@ -277,10 +662,11 @@ def generate_fallback_keywords(topic: str, max_results: int = 10) -> List[Dict]:
     Returns:
         List[Dict]: List of generated keywords with estimated metrics
     """
-    logger.info(f"Generating fallback keywords for: {topic[:50]}")
+    topic = canonicalize_topic(topic)
+    logger.info("Generating fallback keywords for: %.50s", topic)
 
-    # Extract main words from topic
-    words = topic.split()
+    # Deterministic strings for this topic (memoized)
+    words, short_kw, long_tail_keywords, example_kw = _fallback_template(topic)
 
     # Generate basic keyword variations
     keywords = []
@@ -288,47 +674,62 @@ def generate_fallback_keywords(topic: str, max_results: int = 10) -> List[Dict]:
     # Add the topic itself
     keywords.append({
         "keyword": topic,
-        "search_volume": random.randint(5000, 20000),
+        "search_volume": int(_rng.integers(5000, 20001)),
         "competition": 0.6,
         "difficulty": 0.7,
         "type": "primary"
     })
 
     # Add shorter variations (take first 2-3 words)
-    if len(words) >= 2:
-        short_kw = " ".join(words[:2])
+    if short_kw is not None:
         keywords.append({
             "keyword": short_kw,
-            "search_volume": random.randint(10000, 50000),
+            "search_volume": int(_rng.integers(10000, 50001)),
             "competition": 0.75,
             "difficulty": 0.8,
             "type": "primary"
         })
 
     # Add long-tail variations
-    long_tail_prefixes = ["어떻게", "방법", "가이드", "튜토리얼"]
-    for prefix in long_tail_prefixes[:min(3, max_results - len(keywords))]:
+    long_tail_keywords = long_tail_keywords[:min(3, max_results - len(keywords))]
+    long_tail_volumes = _rng.integers(500, 3001, size=len(long_tail_keywords)).tolist()
+    for long_tail_kw, volume in zip(long_tail_keywords, long_tail_volumes):
         keywords.append({
-            "keyword": f"{prefix} {topic}",
-            "search_volume": random.randint(500, 3000),
+            "keyword": long_tail_kw,
+            "search_volume": volume,
             "competition": 0.3,
             "difficulty": 0.4,
             "type": "long-tail"
         })
 
-    # Fill remaining with variations
-    while len(keywords) < max_results:
+    # Fill remaining with variations (random draws made up front in one batch)
+    fill_count = max(0, max_results - len(keywords))
+    coins = _rng.random(fill_count).tolist()
+    volumes = _rng.integers(1000, 10001, size=fill_count).tolist()
+    competitions = _rng.uniform(0.3, 0.7, size=fill_count).tolist()
+    difficulties = _rng.uniform(0.4, 0.7, size=fill_count).tolist()
+
+    # Two distinct word indices per slot: draw the second from n - 1 values
+    # and skip over the first, so no per-iteration sampling is needed
+    n_words = len(words)
+    if n_words >= 2:
+        first = _rng.integers(0, n_words, size=fill_count)
+        second = _rng.integers(0, n_words - 1, size=fill_count)
+        second += second >= first
+        first, second = first.tolist(), second.tolist()
+
+    for i in range(fill_count):
         # Generate random variations
-        if random.random() > 0.5 and len(words) >= 2:
-            variation = " ".join(random.sample(words, min(len(words), 2)))
+        if coins[i] > 0.5 and n_words >= 2:
+            variation = words[first[i]] + " " + words[second[i]]
         else:
-            variation = f"{topic} 예제"
+            variation = example_kw
 
         keywords.append({
             "keyword": variation,
-            "search_volume": random.randint(1000, 10000),
-            "competition": random.uniform(0.3, 0.7),
-            "difficulty": random.uniform(0.4, 0.7),
+            "search_volume": volumes[i],
+            "competition": competitions[i],
+            "difficulty": difficulties[i],
             "type": "semantic"
         })
 
@@ -381,4 +782,15 @@ if __name__ == "__main__":
                 print(f"ERROR: {str(e)}")
                 logger.exception("Test failed")
 
+    if not settings.OPENAI_API_KEY:
+        print("OPENAI_API_KEY is not set; skipping API test")
+        sys.exit(0)
+
+    # Use uvloop when installed (not available on Windows)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     asyncio.run(test())
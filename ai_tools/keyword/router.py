@@ -3,15 +3,16 @@ import logging
 import datetime
 from typing import List
 from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, TypeAdapter
 
-from ai_tools.keyword.analyzer import analyze_keywords
+from ai_tools.keyword.analyzer import analyze_keywords, cache_stats, canonicalize_topic
 
 # Configure logging
 logger = logging.getLogger("api.keyword")
 
 # Create router
-router = APIRouter(prefix="/api/keyword", tags=["Keyword"])
+router = APIRouter(prefix="/api/keyword", tags=["Keyword"], default_response_class=ORJSONResponse)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -41,6 +42,10 @@ class KeywordAnalyzeResponse(BaseModel):
     total_keywords: int = Field(..., description="Total number of keywords returned")
 
 
+# Prebuilt validator: validates the whole keyword list in one core-schema call
+_KW_LIST = TypeAdapter(List[KeywordItem])
+
+
 class ErrorResponse(BaseModel):
     """Error response model"""
     status: str = "error"
@@ -51,16 +56,17 @@ class ErrorResponse(BaseModel):
 # Helper: Logging
 # ─────────────────────────────────────────────────────────────────────────────
 
-def log_api(endpoint: str, status: str, detail: str = ""):
-    """Structured logging helper for API endpoints"""
-    log_message = f"[API:keyword/{endpoint}] [{status}] {detail}"
+def log_api(endpoint: str, status: str, detail: str = "", *args):
+    """
+    Structured logging helper for API endpoints.
 
-    if status in ["ERROR", "WARN"]:
-        logger.warning(log_message)
-    elif status == "SUCCESS":
-        logger.info(log_message)
-    else:
-        logger.info(log_message)
+    ``detail`` is a %-style format string; ``args`` are only interpolated
+    when the record is actually emitted.
+    """
+    level = logging.WARNING if status in ("ERROR", "WARN") else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, "[API:keyword/%s] [%s] " + detail, endpoint, status, *args)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -91,11 +97,12 @@ async def analyze_topic_keywords(request: KeywordAnalyzeRequest):
 
     Each keyword includes estimated search volume, competition level, and SEO difficulty.
     """
-    log_api("analyze", "START", f"topic='{request.topic[:50]}...', max_results={request.max_results}")
+    log_api("analyze", "START", "topic='%.50s...', max_results=%s", request.topic, request.max_results)
 
     try:
-        # Input validation
-        if not request.topic or not request.topic.strip():
+        # Input validation (topic is NFC-normalized once here)
+        topic = canonicalize_topic(request.topic)
+        if not topic:
             log_api("analyze", "ERROR", "Empty topic provided")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -104,7 +111,7 @@ async def analyze_topic_keywords(request: KeywordAnalyzeRequest):
 
         # Call analyzer
         log_api("analyze", "PROCESSING", "Calling keyword analyzer...")
-        keywords = await analyze_keywords(request.topic, max_results=request.max_results)
+        keywords = await analyze_keywords(topic, max_results=request.max_results)
 
         if not keywords or len(keywords) == 0:
             log_api("analyze", "WARN", "No keywords extracted")
@@ -113,20 +120,22 @@ async def analyze_topic_keywords(request: KeywordAnalyzeRequest):
                 detail="Keyword analysis service failed to extract keywords"
             )
 
-        log_api("analyze", "SUCCESS", f"Extracted {len(keywords)} keywords")
+        log_api("analyze", "SUCCESS", "Extracted %d keywords", len(keywords))
 
         return KeywordAnalyzeResponse(
             status="success",
             topic=request.topic,
-            keywords=[KeywordItem(**kw) for kw in keywords],
+            keywords=_KW_LIST.validate_python(keywords),
             total_keywords=len(keywords)
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        log_api("analyze", "ERROR", f"Unexpected error: {str(e)}")
-        logger.exception("Keyword analysis failed")
+        log_api("analyze", "ERROR", "Unexpected error: %s", e)
+        # Full traceback only when debugging (the error itself is logged above)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.exception("Keyword analysis failed")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred during keyword analysis"
@@ -152,6 +161,26 @@ async def ping():
     }
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Endpoint 3: GET /api/keyword/cache_stats
+# ─────────────────────────────────────────────────────────────────────────────
+
+@router.get(
+    "/cache_stats",
+    status_code=status.HTTP_200_OK,
+    summary="Keyword cache statistics",
+    description="Hit/miss counts for the exact-match keyword cache"
+)
+async def get_cache_stats():
+    """Keyword cache statistics endpoint"""
+    total = cache_stats["hits"] + cache_stats["misses"]
+    return {
+        "hits": cache_stats["hits"],
+        "misses": cache_stats["misses"],
+        "hit_rate": round(cache_stats["hits"] / total, 4) if total else 0.0
+    }
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Local Test Runner
 # ─────────────────────────────────────────────────────────────────────────────
@@ -165,9 +194,19 @@ if __name__ == "__main__":
     from fastapi import FastAPI
 
     # Create test app
-    app = FastAPI(title="Keyword API Test")
+    app = FastAPI(title="Keyword API Test", default_response_class=ORJSONResponse)
     app.include_router(router)
 
+    # Warm the OpenAI connection pool (DNS + TLS) before the first request
+    from core.clients import get_openai
+
+    @app.on_event("startup")
+    async def warm_openai_client():
+        try:
+            await get_openai().models.list()
+        except Exception:
+            logger.warning("OpenAI warmup failed")
+
     # Configure logging for test
     logging.basicConfig(level=logging.INFO)
 
@@ -177,7 +216,15 @@ if __name__ == "__main__":
     print("Endpoints:")
     print("  POST   http://localhost:8001/api/keyword/analyze")
     print("  GET    http://localhost:8001/api/keyword/ping")
+    print("  GET    http://localhost:8001/api/keyword/cache_stats")
     print("  GET    http://localhost:8001/docs - Interactive API docs")
     print("="*80 + "\n")
 
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # uvloop + httptools on Linux/macOS; uvloop has no Windows build, so fall back to stock asyncio there
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8001,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
+    )
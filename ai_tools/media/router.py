@@ -1,8 +1,10 @@
 # potensia_ai/ai_tools/media/router.py
 import logging
 import datetime
-from typing import Optional
+import sys
+from typing import Literal, Optional
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
 from ai_tools.media.thumbnail import generate_thumbnail
@@ -11,7 +13,11 @@ from ai_tools.media.thumbnail import generate_thumbnail
 logger = logging.getLogger("api.media")
 
 # Create router
-router = APIRouter(prefix="/api/media", tags=["Media"])
+router = APIRouter(prefix="/api/media", tags=["Media"], default_response_class=ORJSONResponse)
+
+# Supported image sizes (DALL-E 2: 256/512/1024 square, DALL-E 3: 1024 square and wide/tall)
+ThumbnailSize = Literal["256x256", "512x512", "1024x1024", "1792x1024", "1024x1792"]
+_DEFAULT_SIZE = sys.intern("1024x1024")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -21,7 +27,7 @@ router = APIRouter(prefix="/api/media", tags=["Media"])
 class ThumbnailRequest(BaseModel):
     """Request model for thumbnail generation"""
     topic: str = Field(..., min_length=1, max_length=1000, description="Topic or description for thumbnail image")
-    size: Optional[str] = Field(None, description="Image size (e.g., '1024x1024', '1792x1024', '1024x1792')")
+    size: Optional[ThumbnailSize] = Field(None, description="Image size (e.g., '1024x1024', '1792x1024', '1024x1792')")
 
 
 class ThumbnailResponse(BaseModel):
@@ -43,16 +49,17 @@ class ErrorResponse(BaseModel):
 # Helper: Logging
 # ─────────────────────────────────────────────────────────────────────────────
 
-def log_api(endpoint: str, status: str, detail: str = ""):
-    """Structured logging helper for API endpoints"""
-    log_message = f"[API:media/{endpoint}] [{status}] {detail}"
+def log_api(endpoint: str, status: str, detail: str = "", *args):
+    """
+    Structured logging helper for API endpoints.
 
-    if status in ["ERROR", "WARN"]:
-        logger.warning(log_message)
-    elif status == "SUCCESS":
-        logger.info(log_message)
-    else:
-        logger.info(log_message)
+    ``detail`` is a %-style format string; ``args`` are only interpolated
+    when the record is actually emitted.
+    """
+    level = logging.WARNING if status in ("ERROR", "WARN") else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, "[API:media/%s] [%s] " + detail, endpoint, status, *args)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -81,7 +88,7 @@ async def create_thumbnail(request: ThumbnailRequest):
     The AI interprets the topic description and generates a relevant,
     professional-looking image.
     """
-    log_api("thumbnail", "START", f"topic='{request.topic[:50]}...', size={request.size}")
+    log_api("thumbnail", "START", "topic='%.50s...', size=%s", request.topic, request.size)
 
     try:
         # Input validation
@@ -92,17 +99,8 @@ async def create_thumbnail(request: ThumbnailRequest):
                 detail="Topic cannot be empty"
             )
 
-        # Set default size if not provided
-        size = request.size or "1024x1024"
-
-        # Validate size format
-        valid_sizes = ["256x256", "512x512", "1024x1024", "1792x1024", "1024x1792"]
-        if size not in valid_sizes:
-            log_api("thumbnail", "ERROR", f"Invalid size: {size}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid size '{size}'. Must be one of: {', '.join(valid_sizes)}"
-            )
+        # Set default size if not provided (size itself is validated by ThumbnailRequest)
+        size = request.size or _DEFAULT_SIZE
 
         # Call thumbnail generator
         log_api("thumbnail", "PROCESSING", "Calling image generation API...")
@@ -110,13 +108,13 @@ async def create_thumbnail(request: ThumbnailRequest):
 
         # Check for errors in result
         if "error" in result:
-            log_api("thumbnail", "ERROR", result["error"])
+            log_api("thumbnail", "ERROR", "%s", result["error"])
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Image generation failed: {result['error']}"
             )
 
-        log_api("thumbnail", "SUCCESS", f"Generated image: {result['url'][:80]}...")
+        log_api("thumbnail", "SUCCESS", "Generated image: %.80s...", result["url"])
 
         response_data = {
             "status": "success",
@@ -134,8 +132,10 @@ async def create_thumbnail(request: ThumbnailRequest):
     except HTTPException:
         raise
     except Exception as e:
-        log_api("thumbnail", "ERROR", f"Unexpected error: {str(e)}")
-        logger.exception("Thumbnail generation failed")
+        log_api("thumbnail", "ERROR", "Unexpected error: %s", e)
+        # Full traceback only when debugging (the error itself is logged above)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.exception("Thumbnail generation failed")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred during thumbnail generation"
@@ -174,9 +174,19 @@ if __name__ == "__main__":
     from fastapi import FastAPI
 
     # Create test app
-    app = FastAPI(title="Media API Test")
+    app = FastAPI(title="Media API Test", default_response_class=ORJSONResponse)
     app.include_router(router)
 
+    # Warm the OpenAI connection pool (DNS + TLS) before the first request
+    from core.clients import get_openai
+
+    @app.on_event("startup")
+    async def warm_openai_client():
+        try:
+            await get_openai().models.list()
+        except Exception:
+            logger.warning("OpenAI warmup failed")
+
     # Configure logging for test
     logging.basicConfig(level=logging.INFO)
 
@@ -194,4 +204,11 @@ if __name__ == "__main__":
     print('       -d \'{"topic": "겨울철 싱크대 냄새 일러스트"}\'')
     print("="*80 + "\n")
 
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    # uvloop + httptools on Linux/macOS; uvloop has no Windows build, so fall back to stock asyncio there
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8002,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
+    )
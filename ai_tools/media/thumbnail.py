@@ -1,16 +1,63 @@
 # potensia_ai/ai_tools/media/thumbnail.py
 import asyncio
+import hashlib
 import logging
-from datetime import datetime
+import os
 from typing import Dict, Optional
-from openai import AsyncOpenAI
+from openai import RateLimitError
 from core.config import settings
+from core.clients import get_openai
+from ai_clients.cache import InMemoryBackend, RedisBackend
+from ai_clients.http_pool import get_shared_http_client
+from ai_clients.retry import build_retrying
 
 # Configure logging
 logger = logging.getLogger("media.thumbnail")
 
-# Initialize OpenAI client
-openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+# Supported sizes, built once at import
+VALID_SIZES_DALLE3 = frozenset({"1024x1024", "1792x1024", "1024x1792"})
+VALID_SIZES_DALLE2 = frozenset({"256x256", "512x512", "1024x1024"})
+VALID_SIZES = VALID_SIZES_DALLE3 | VALID_SIZES_DALLE2
+
+IMAGE_QUALITY = "standard"  # "standard" or "hd" (hd costs more)
+
+# Generated images keyed by model/size/quality/prompt
+if settings.LLM_CACHE_REDIS_URL:
+    _thumbnail_cache = RedisBackend(settings.LLM_CACHE_REDIS_URL, prefix="thumbnail:")
+else:
+    _thumbnail_cache = InMemoryBackend(settings.LLM_CACHE_MAX_ENTRIES)
+
+
+def _cache_key(model: str, size: str, quality: str, prompt: str) -> str:
+    """Stable cache key for an image generation request"""
+    return hashlib.sha256(f"{model}|{size}|{quality}|{prompt}".encode("utf-8")).hexdigest()
+
+
+async def _store_image(key: str, image_url: str) -> Optional[str]:
+    """
+    Download a generated image to THUMBNAIL_STORAGE_DIR.
+
+    Returns:
+        Permanent public URL of the stored image, or None if local
+        storage is not configured
+    """
+    if not (settings.THUMBNAIL_STORAGE_DIR and settings.THUMBNAIL_PUBLIC_URL):
+        return None
+
+    response = await get_shared_http_client().get(image_url)
+    response.raise_for_status()
+
+    filename = f"{key}.png"
+    path = os.path.join(settings.THUMBNAIL_STORAGE_DIR, filename)
+    os.makedirs(settings.THUMBNAIL_STORAGE_DIR, exist_ok=True)
+    await asyncio.to_thread(_write_file, path, response.content)
+
+    return f"{settings.THUMBNAIL_PUBLIC_URL.rstrip('/')}/{filename}"
+
+
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
 
 
 async def generate_thumbnail(prompt: str, size: str = "1024x1024") -> Dict:
@@ -47,15 +94,12 @@ async def generate_thumbnail(prompt: str, size: str = "1024x1024") -> Dict:
         >>> print(result["url"])
         https://oaidalleapiprodscus.blob.core.windows.net/private/...
     """
-    logger.info(f"[{datetime.now()}] [MEDIA] [START] Generating thumbnail for: {prompt[:100]}")
+    logger.info("[MEDIA] [START] Generating thumbnail for: %.100s", prompt)
 
     try:
         # Validate size format
-        valid_sizes_dalle3 = ["1024x1024", "1792x1024", "1024x1792"]
-        valid_sizes_dalle2 = ["256x256", "512x512", "1024x1024"]
-
-        if size not in valid_sizes_dalle3 and size not in valid_sizes_dalle2:
-            logger.warning(f"Invalid size '{size}', defaulting to 1024x1024")
+        if size not in VALID_SIZES:
+            logger.warning("Invalid size '%s', defaulting to 1024x1024", size)
             size = "1024x1024"
 
         # Determine which model to use based on size
@@ -66,22 +110,43 @@ async def generate_thumbnail(prompt: str, size: str = "1024x1024") -> Dict:
             # Use DALL-E 3 for better quality (can fallback to dall-e-2 if needed)
             model = "dall-e-3"
 
-        logger.info(f"[{datetime.now()}] [MEDIA] Using model: {model}, size: {size}")
-
-        # Call OpenAI Image Generation API
-        response = await openai_client.images.generate(
-            model=model,
-            prompt=prompt,
-            size=size,
-            quality="standard",  # "standard" or "hd" (hd costs more)
-            n=1,  # Number of images to generate
-        )
+        logger.info("[MEDIA] Using model: %s, size: %s", model, size)
+
+        # Serve identical requests from the cache
+        key = _cache_key(model, size, IMAGE_QUALITY, prompt)
+        if settings.THUMBNAIL_CACHE_ENABLED:
+            cached = await _thumbnail_cache.get(key)
+            if cached is not None:
+                logger.info("[MEDIA] [CACHE] Serving cached image for: %.100s", prompt)
+                return {**cached, "prompt_used": prompt, "size": size}
+
+        # Call OpenAI Image Generation API; back off only when rate limited (honours Retry-After)
+        async for attempt in build_retrying(logger, (RateLimitError,)):
+            with attempt:
+                response = await get_openai().images.generate(
+                    model=model,
+                    prompt=prompt,
+                    size=size,
+                    quality=IMAGE_QUALITY,
+                    n=1,  # Number of images to generate
+                )
 
         # Extract image URL from response
         image_url = response.data[0].url
         revised_prompt = getattr(response.data[0], 'revised_prompt', None)
 
-        logger.info(f"[{datetime.now()}] [MEDIA] [SUCCESS] Image generated: {image_url[:80]}...")
+        # OpenAI URLs expire, so only locally stored images get the long TTL
+        ttl = min(settings.THUMBNAIL_CACHE_TTL, settings.THUMBNAIL_URL_TTL)
+        try:
+            stored_url = await _store_image(key, image_url)
+        except Exception as e:
+            logger.warning("[MEDIA] Failed to store image locally: %s", e)
+            stored_url = None
+        if stored_url:
+            image_url = stored_url
+            ttl = settings.THUMBNAIL_CACHE_TTL
+
+        logger.info("[MEDIA] [SUCCESS] Image generated: %.80s...", image_url)
 
         result = {
             "url": image_url,
@@ -92,14 +157,18 @@ async def generate_thumbnail(prompt: str, size: str = "1024x1024") -> Dict:
         # DALL-E 3 often provides a revised prompt
         if revised_prompt:
             result["revised_prompt"] = revised_prompt
-            logger.info(f"[{datetime.now()}] [MEDIA] Revised prompt: {revised_prompt[:100]}...")
+            logger.info("[MEDIA] Revised prompt: %.100s...", revised_prompt)
+
+        if settings.THUMBNAIL_CACHE_ENABLED:
+            cached = {k: v for k, v in result.items() if k in ("url", "revised_prompt")}
+            await _thumbnail_cache.set(key, cached, ttl)
 
         return result
 
     except Exception as e:
         error_msg = f"Failed to generate thumbnail: {str(e)}"
-        logger.error(f"[{datetime.now()}] [MEDIA] [ERROR] {error_msg}")
-        logger.exception("Thumbnail generation error details")
+        # Full traceback only when debugging
+        logger.error("[MEDIA] [ERROR] %s", error_msg, exc_info=logger.isEnabledFor(logging.DEBUG))
 
         return {
             "error": error_msg,
@@ -134,30 +203,34 @@ if __name__ == "__main__":
         print("Thumbnail Generator Test")
         print("="*80 + "\n")
 
-        for prompt, size in test_prompts:
+        # Image calls are network-bound; run them concurrently with bounded fan-out
+        sem = asyncio.Semaphore(3)
+
+        async def run_one(prompt: str, size: str) -> Dict:
+            async with sem:
+                return await generate_thumbnail(prompt, size)
+
+        results = await asyncio.gather(
+            *(run_one(prompt, size) for prompt, size in test_prompts),
+            return_exceptions=True
+        )
+
+        for (prompt, size), result in zip(test_prompts, results):
             print(f"\nPrompt: {prompt}")
             print(f"Size: {size}")
             print("-" * 80)
 
-            try:
-                result = await generate_thumbnail(prompt, size)
-
-                if "error" in result:
-                    print(f"❌ ERROR: {result['error']}")
-                else:
-                    print(f"✅ SUCCESS!")
-                    print(f"   URL: {result['url']}")
-                    print(f"   Size: {result['size']}")
-                    if "revised_prompt" in result:
-                        print(f"   Revised Prompt: {result['revised_prompt'][:100]}...")
-
-                # Add delay to avoid rate limiting
-                print("\nWaiting 5 seconds before next request...")
-                await asyncio.sleep(5)
-
-            except Exception as e:
-                print(f"❌ EXCEPTION: {str(e)}")
-                logger.exception("Test failed")
+            if isinstance(result, Exception):
+                print(f"❌ EXCEPTION: {str(result)}")
+                logger.error("Test failed", exc_info=result)
+            elif "error" in result:
+                print(f"❌ ERROR: {result['error']}")
+            else:
+                print(f"✅ SUCCESS!")
+                print(f"   URL: {result['url']}")
+                print(f"   Size: {result['size']}")
+                if "revised_prompt" in result:
+                    print(f"   Revised Prompt: {result['revised_prompt'][:100]}...")
 
         print("\n" + "="*80)
         print("Test Complete")
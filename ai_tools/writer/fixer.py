@@ -2,19 +2,14 @@
 import asyncio
 import json
 import re
-import datetime
-from openai import AsyncOpenAI
+import logging
+from typing import TypedDict
 from core.config import settings
+from core.clients import get_openai
+from ai_clients.serialization import dumps
 
-# Lazy initialization: 클라이언트를 필요할 때 생성
-_openai_client = None
-
-def get_openai_client():
-    """OpenAI 클라이언트를 lazy하게 초기화"""
-    global _openai_client
-    if _openai_client is None:
-        _openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    return _openai_client
+# Configure logging
+logger = logging.getLogger("fixer")
 
 # ─────────────────────────────────────────────────────────────────────────────
 # System Prompt for Claude
@@ -55,10 +50,16 @@ FIXER_SYSTEM_PROMPT = """너는 고급 SEO·콘텐츠 에디터이자 자연스
 # Helper Functions
 # ─────────────────────────────────────────────────────────────────────────────
 
-def log_fixer(status: str, detail: str = ""):
-    """로깅 헬퍼"""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] [FIXER] [{status}] {detail}")
+def log_fixer(status: str, detail: str = "", *args):
+    """로깅 헬퍼 (detail은 %-포맷 문자열, args는 실제로 출력될 때만 포맷)"""
+    level = logging.WARNING if status in ("ERROR", "WARN") else logging.INFO
+    if logger.isEnabledFor(level):
+        logger.log(level, "[FIXER] [%s] " + detail, status, *args)
+
+
+# 키워드 밀도 계산용 패턴: 코드 블록(키워드 카운트에서 제외) 또는 마크다운 기호
+_CODE_OR_MARKUP = re.compile(r'```[\s\S]*?```|[#*`\[\]\(\)]')
+_WORD = re.compile(r'\S+')
 
 
 def calculate_keyword_density(content: str, keyphrase: str) -> float:
@@ -75,22 +76,17 @@ def calculate_keyword_density(content: str, keyphrase: str) -> float:
     if not keyphrase or not content:
         return 0.0
 
-    # 코드 블록 제거 (키워드 카운트에서 제외)
-    content_no_code = re.sub(r'```[\s\S]*?```', '', content)
+    # 코드 블록과 마크다운 기호를 한 번에 제거하고 소문자로 변환 (대소문자 무시)
+    clean_text = _CODE_OR_MARKUP.sub('', content).lower()
 
-    # 마크다운 제거하고 순수 텍스트만
-    clean_text = re.sub(r'[#*`\[\]\(\)]', '', content_no_code)
-
-    # 단어 수 계산
-    words = clean_text.split()
-    total_words = len(words)
+    # 단어 수 계산 (리스트 생성 없이)
+    total_words = sum(1 for _ in _WORD.finditer(clean_text))
 
     if total_words == 0:
         return 0.0
 
-    # 키워드 출현 횟수 (대소문자 무시)
-    keyphrase_lower = keyphrase.lower()
-    keyword_count = clean_text.lower().count(keyphrase_lower)
+    # 키워드 출현 횟수
+    keyword_count = clean_text.count(keyphrase.lower())
 
     # 밀도 계산: (키워드 출현 횟수 / 총 단어 수) * 100
     density = (keyword_count / total_words) * 100
@@ -108,18 +104,20 @@ def extract_fix_needs(validation_report: dict) -> list[str]:
     Returns:
         list: 수정 필요 항목 목록 (type 기반)
     """
-    fix_needs = []
+    # 순서를 유지하는 집합 (dict 키): 중복 제거와 포함 검사가 O(1)
+    fix_needs: dict[str, None] = {}
 
     # 새로운 구조: issues 리스트에서 type 추출
     issues = validation_report.get('issues', [])
-    for issue in issues:
-        if isinstance(issue, dict) and 'type' in issue:
-            fix_needs.append(issue['type'])
+    fix_needs.update(
+        (issue['type'], None) for issue in issues
+        if isinstance(issue, dict) and 'type' in issue
+    )
 
     # FAQ 누락 확인 (레거시 호환)
     has_faq = validation_report.get('has_faq', False)
-    if not has_faq and 'faq_missing' not in fix_needs:
-        fix_needs.append('faq_missing')
+    if not has_faq:
+        fix_needs.setdefault('faq_missing')
 
     # 점수 기반 개선 필요 항목 (레거시 호환)
     scores = validation_report.get('scores', {})
@@ -127,14 +125,24 @@ def extract_fix_needs(validation_report: dict) -> list[str]:
     human_score = scores.get('human', validation_report.get('human_score', 10))
     seo_score = scores.get('seo', validation_report.get('seo_score', 10))
 
-    if grammar_score < 7 and 'grammar_improvement' not in fix_needs:
-        fix_needs.append('grammar_improvement')
-    if human_score < 7 and 'humanize_content' not in fix_needs:
-        fix_needs.append('humanize_content')
-    if seo_score < 7 and 'seo_optimization' not in fix_needs:
-        fix_needs.append('seo_optimization')
+    if grammar_score < 7:
+        fix_needs.setdefault('grammar_improvement')
+    if human_score < 7:
+        fix_needs.setdefault('humanize_content')
+    if seo_score < 7:
+        fix_needs.setdefault('seo_optimization')
+
+    return list(fix_needs)
 
-    return fix_needs
+
+# 후처리 패턴 (모듈 로드 시 1회 컴파일)
+_SPACES = re.compile(r' +')
+_STRAY_BACKTICK = re.compile(r'(?<!`)`(?!`)')
+_TRAIL_WS = re.compile(r'[^\S\n]+(?=\n|\Z)')
+_NEWLINES = re.compile(r'\n{3,}')
+
+# FAQ 섹션 제목 (## FAQ / ## 자주 묻는 질문)
+_FAQ_HEADING = re.compile(r'##\s*(?:FAQ|자주\s*묻는\s*질문)', re.IGNORECASE)
 
 
 def post_process_content(content: str) -> str:
@@ -148,30 +156,87 @@ def post_process_content(content: str) -> str:
         str: 정리된 콘텐츠
     """
     # 불필요한 공백 제거
-    content = re.sub(r' +', ' ', content)
-
-    # 3개 이상의 연속 개행을 2개로
-    content = re.sub(r'\n{3,}', '\n\n', content)
+    content = _SPACES.sub(' ', content)
 
     # 마크다운 코드 블록 외의 백틱 정리
-    content = re.sub(r'(?<!`)`(?!`)', '', content)
+    content = _STRAY_BACKTICK.sub('', content)
 
-    # 문장 끝 공백 제거
-    lines = [line.rstrip() for line in content.split('\n')]
-    content = '\n'.join(lines)
+    # 문장 끝 공백 제거 (split/join 없이 한 번에)
+    content = _TRAIL_WS.sub('', content)
+
+    # 3개 이상의 연속 개행을 2개로
+    content = _NEWLINES.sub('\n\n', content)
 
     return content.strip()
 
 
+# 키워드 밀도 로컬 조정 (LLM 호출 없이 처리 가능한 경우)
+DENSITY_MIN, DENSITY_MAX = 1.5, 2.5          # 목표 밀도 범위 (%)
+LOCAL_TUNE_MIN, LOCAL_TUNE_MAX = 1.3, 2.7    # 로컬 조정을 시도할 밀도 범위 (%)
+# Validator가 키워드 밀도 문제로 보고하는 issue type (이것만 있을 때 로컬 조정 시도)
+DENSITY_ISSUE_TYPES = frozenset({'keyword_density_low', 'keyword_density_high'})
+
+# 서론(첫 번째 H2)과 FAQ 섹션 제목
+_FIRST_H2 = re.compile(r'^##[ \t]+(?!#)(.+)$', re.MULTILINE)
+_FAQ_HEADING_LINE = re.compile(r'^##[ \t]+((?:FAQ|자주\s*묻는\s*질문).*)$', re.MULTILINE | re.IGNORECASE)
+
+# 처리 경로별 호출 수 (local: 로컬 조정, llm: OpenAI 교정, skipped: 수정 불필요)
+fix_stats = {"local": 0, "llm": 0, "skipped": 0}
+
+
+def _local_density_tune(content: str, keyphrase: str) -> str | None:
+    """
+    키워드 밀도를 결정적으로 조정 (서론/FAQ 제목에 키워드 삽입)
+
+    본문에 문장을 덧붙이지 않고, 키워드가 없는 서론(첫 H2)과 FAQ 제목에만
+    키워드를 넣는다 (각 1회, 최대 2회).
+
+    Args:
+        content: 원본 콘텐츠
+        keyphrase: Focus Keyphrase
+
+    Returns:
+        str | None: 밀도가 목표 범위에 들어온 콘텐츠, 로컬 조정으로 맞출 수 없으면 None
+    """
+    density = calculate_keyword_density(content, keyphrase)
+    if density >= DENSITY_MIN:
+        # 이미 범위 안이면 조정할 것이 없고, 키워드를 빼는 작업은
+        # 문장 재구성이 필요하므로 LLM에 맡긴다
+        return None
+
+    lowered = keyphrase.lower()
+    for pattern, template in ((_FIRST_H2, "## {keyphrase}: {title}"), (_FAQ_HEADING_LINE, "## {keyphrase} {title}")):
+        match = pattern.search(content)
+        if match is None or lowered in match.group(1).lower():
+            continue
+        heading = template.format(keyphrase=keyphrase, title=match.group(1).strip())
+        content = content[:match.start()] + heading + content[match.end():]
+        density = calculate_keyword_density(content, keyphrase)
+        if density >= DENSITY_MIN:
+            break
+
+    if not DENSITY_MIN <= density <= DENSITY_MAX:
+        return None
+    return content
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Main Fixer Function
 # ─────────────────────────────────────────────────────────────────────────────
 
+class FixResult(TypedDict):
+    """fix_content 반환 구조 (FixResponse 필드와 동일)"""
+    fixed_content: str
+    fix_summary: list[str]
+    added_FAQ: bool
+    keyword_density: float
+
+
 async def fix_content(
     content: str,
     validation_report: dict,
     metadata: dict | None = None
-) -> dict:
+) -> FixResult:
     """
     Validator 리포트를 기반으로 콘텐츠 자동 교정
 
@@ -181,14 +246,9 @@ async def fix_content(
         metadata: 메타데이터 (focus_keyphrase, language, style 등)
 
     Returns:
-        dict: {
-            "fixed_content": str,
-            "fix_summary": list[str],
-            "added_FAQ": bool,
-            "keyword_density": float
-        }
+        FixResult: {fixed_content, fix_summary, added_FAQ, keyword_density}
     """
-    log_fixer("START", f"content_length={len(content)}")
+    log_fixer("START", "content_length=%d", len(content))
 
     # 메타데이터 기본값 설정
     if metadata is None:
@@ -200,11 +260,12 @@ async def fix_content(
 
     # 수정 필요 항목 추출
     fix_needs = extract_fix_needs(validation_report)
-    log_fixer("ANALYSIS", f"fix_needs={fix_needs}")
+    log_fixer("ANALYSIS", "fix_needs=%s", fix_needs)
 
     # 수정이 필요 없는 경우
     if not fix_needs and validation_report.get('grammar_score', 0) >= 8:
         log_fixer("SKIP", "Content quality is already good")
+        fix_stats["skipped"] += 1
         return {
             "fixed_content": content,
             "fix_summary": ["콘텐츠 품질이 우수하여 수정 불필요"],
@@ -212,11 +273,32 @@ async def fix_content(
             "keyword_density": calculate_keyword_density(content, focus_keyphrase)
         }
 
+    # Validator가 키워드 밀도 문제만 보고했고 밀도가 약간 벗어난 경우: LLM 호출 없이 로컬 조정
+    if focus_keyphrase and fix_needs and set(fix_needs) <= DENSITY_ISSUE_TYPES:
+        density = calculate_keyword_density(content, focus_keyphrase)
+        if LOCAL_TUNE_MIN <= density <= LOCAL_TUNE_MAX:
+            tuned = _local_density_tune(content, focus_keyphrase)
+            if tuned is not None:
+                final_density = calculate_keyword_density(tuned, focus_keyphrase)
+                log_fixer("LOCAL", "density %s%% -> %s%%", density, final_density)
+                fix_stats["local"] += 1
+                return {
+                    "fixed_content": tuned,
+                    "fix_summary": [f"키워드 밀도 로컬 조정: {final_density}%"],
+                    "added_FAQ": False,
+                    "keyword_density": final_density
+                }
+
+    fix_stats["llm"] += 1
+
+    # Validator 리포트는 한 번만 직렬화 (compact JSON, orjson 사용 가능 시 orjson)
+    report_json = dumps(validation_report).decode("utf-8")
+
     # Claude에 전달할 User Prompt 구성
     user_prompt = f"""다음은 Validator 리포트와 원문이다.
 
 [Validator Report]
-{json.dumps(validation_report, ensure_ascii=False, indent=2)}
+{report_json}
 
 [Fix Needs]
 {', '.join(fix_needs)}
@@ -241,7 +323,7 @@ async def fix_content(
     for attempt in range(settings.MAX_RETRIES):
         try:
             # OpenAI API 호출 (settings.MODEL_PRIMARY 사용)
-            log_fixer("OPENAI_CALL", f"model={settings.MODEL_PRIMARY}, attempt={attempt+1}/{settings.MAX_RETRIES}")
+            log_fixer("OPENAI_CALL", "model=%s, attempt=%d/%d", settings.MODEL_PRIMARY, attempt + 1, settings.MAX_RETRIES)
 
             # Determine if this is a reasoning model
             model_name_lower = settings.MODEL_PRIMARY.lower()
@@ -263,13 +345,13 @@ async def fix_content(
                 api_params["max_tokens"] = 3000
                 api_params["temperature"] = 0.4
 
-            response = await get_openai_client().chat.completions.create(**api_params)
+            response = await get_openai().chat.completions.create(**api_params)
 
             # 응답 추출
             fixed_content = response.choices[0].message.content.strip()
 
             if not fixed_content:
-                log_fixer("WARN", f"Empty response from OpenAI (attempt {attempt+1})")
+                log_fixer("WARN", "Empty response from OpenAI (attempt %d)", attempt + 1)
                 if attempt < settings.MAX_RETRIES - 1:
                     wait_time = min(settings.BACKOFF_MIN * (2 ** attempt), settings.BACKOFF_MAX)
                     await asyncio.sleep(wait_time)
@@ -286,10 +368,10 @@ async def fix_content(
             break
 
         except Exception as e:
-            log_fixer("ERROR", f"Attempt {attempt+1} failed: {str(e)}")
+            log_fixer("ERROR", "Attempt %d failed: %s", attempt + 1, e)
             if attempt < settings.MAX_RETRIES - 1:
                 wait_time = min(settings.BACKOFF_MIN * (2 ** attempt), settings.BACKOFF_MAX)
-                log_fixer("INFO", f"Retrying in {wait_time}s...")
+                log_fixer("INFO", "Retrying in %ss...", wait_time)
                 await asyncio.sleep(wait_time)
                 continue
             else:
@@ -302,16 +384,16 @@ async def fix_content(
                 }
 
     # 성공 시 후처리
-    # 후처리
-    fixed_content = post_process_content(fixed_content)
+    # 후처리 (정규식 처리는 이벤트 루프를 막지 않도록 워커 스레드에서 실행)
+    fixed_content = await asyncio.to_thread(post_process_content, fixed_content)
 
     # FAQ 추가 여부 확인 (개선된 정규식)
     had_faq = validation_report.get('has_faq', False)
-    now_has_faq = bool(re.search(r'(?:##\s*FAQ|##\s*자주\s*묻는\s*질문)', fixed_content, re.IGNORECASE))
+    now_has_faq = bool(_FAQ_HEADING.search(fixed_content))
     added_faq = not had_faq and now_has_faq
 
     # 키워드 밀도 계산
-    final_density = calculate_keyword_density(fixed_content, focus_keyphrase)
+    final_density = await asyncio.to_thread(calculate_keyword_density, fixed_content, focus_keyphrase)
 
     # 수정 요약 생성
     fix_summary = []
@@ -330,7 +412,7 @@ async def fix_content(
     if focus_keyphrase and (final_density < 1.5 or final_density > 2.5):
         fix_summary.append(f"[주의] 키워드 밀도 범위 초과 ({final_density}%) - 수동 조정 권장")
 
-    log_fixer("SUCCESS", f"fixed_length={len(fixed_content)}, density={final_density}%")
+    log_fixer("SUCCESS", "fixed_length=%d, density=%s%%", len(fixed_content), final_density)
 
     return {
         "fixed_content": fixed_content,
@@ -419,4 +501,10 @@ if __name__ == "__main__":
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+    # Configure logging for test
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
     asyncio.run(test_fixer())
@@ -0,0 +1,121 @@
+# potensia_ai/ai_tools/writer/fused.py
+"""
+Fused writer pipeline
+
+refine → generate → validate 세 단계를 하나의 structured-output 호출로 처리한다.
+세 번의 순차 왕복 대신 한 번의 요청으로 {refined_topic, content, validation}을 받는다.
+"""
+
+import logging
+from core.config import settings
+from core.clients import get_openai
+from ai_clients.serialization import loads
+from ai_tools.writer.generator import is_reasoning_model
+from ai_tools.writer.prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
+from ai_tools.writer.validator import structure_validation
+
+logger = logging.getLogger("fused")
+
+FUSED_PROMPT_CACHE_KEY = "fused-writer-v1"
+
+FUSED_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+🔗 FUSED PIPELINE
+아래 세 단계를 순서대로 수행하고, 결과를 하나의 JSON 객체로만 반환한다.
+
+1. refined_topic: 입력 주제를 25~45자의 자연스러운 한국어 질문형 블로그 제목으로 다듬는다.
+   (원래 의미 유지, 따옴표 없이, 물음표로 끝낼 것)
+2. content: refined_topic을 주제로 위 규칙에 맞는 블로그 글 전체를 작성한다.
+3. validation: 작성한 글을 스스로 엄격하게 평가한다.
+   - grammar_score, human_score, seo_score: 0~10 정수
+   - has_faq: FAQ 섹션 포함 여부
+   - suggestions: 개선점 목록 (type은 "grammar", "human", "seo", "faq" 중 하나)
+"""
+
+FUSED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "refined_topic": {"type": "string"},
+        "content": {"type": "string"},
+        "validation": {
+            "type": "object",
+            "properties": {
+                "grammar_score": {"type": "integer"},
+                "human_score": {"type": "integer"},
+                "seo_score": {"type": "integer"},
+                "has_faq": {"type": "boolean"},
+                "suggestions": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "type": {"type": "string"},
+                            "message": {"type": "string"}
+                        },
+                        "required": ["type", "message"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["grammar_score", "human_score", "seo_score", "has_faq", "suggestions"],
+            "additionalProperties": False
+        }
+    },
+    "required": ["refined_topic", "content", "validation"],
+    "additionalProperties": False
+}
+
+
+async def full_pipeline(topic: str, model: str | None = None) -> dict:
+    """
+    주제 정제, 글 생성, 품질 평가를 한 번의 OpenAI 호출로 수행
+
+    Args:
+        topic: 사용자 입력 주제
+        model: 사용할 OpenAI 모델 (기본값: settings.MODEL_PRIMARY)
+
+    Returns:
+        {"refined_topic": str, "content": str, "validation": dict}
+        (validation은 validate_content와 같은 구조)
+
+    Raises:
+        ValueError: 응답이 비어 있거나 스키마에 맞지 않을 때
+    """
+    model_name = model or settings.MODEL_PRIMARY
+
+    api_params = {
+        "model": model_name,
+        "messages": [
+            {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+            {"role": "user", "content": USER_PROMPT_TEMPLATE.format(topic=topic)}
+        ],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "fused_write", "strict": True, "schema": FUSED_SCHEMA}
+        },
+        "prompt_cache_key": FUSED_PROMPT_CACHE_KEY,
+    }
+    if is_reasoning_model(model_name):
+        api_params["max_completion_tokens"] = 10000
+    else:
+        api_params["max_tokens"] = settings.DEFAULT_MAX_TOKENS + 500
+        api_params["temperature"] = settings.DEFAULT_TEMPERATURE
+
+    logger.info("[%s] [START] Topic: %.50s...", model_name, topic)
+    response = await get_openai().chat.completions.create(**api_params)
+
+    raw = response.choices[0].message.content
+    if not raw:
+        raise ValueError("Empty response from fused pipeline")
+
+    try:
+        data = loads(raw)
+        result = {
+            "refined_topic": data["refined_topic"].strip(),
+            "content": data["content"].strip(),
+            "validation": structure_validation(data["validation"]),
+        }
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid fused response: {e}") from e
+
+    logger.info("[%s] [SUCCESS] Topic: %.50s...", model_name, topic)
+    return result
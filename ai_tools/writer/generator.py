@@ -1,34 +1,29 @@
 # potensia_ai/ai_tools/writer/generator.py
 import asyncio
-import datetime
 import random
 import logging
-from openai import AsyncOpenAI
-from anthropic import AsyncAnthropic
+from typing import AsyncIterator
 from core.config import settings
+from core.clients import get_anthropic, get_openai
+from ai_clients.cache import LLMCache, RedisBackend
+from ai_clients.retry import RetryPolicy
 from ai_tools.writer.prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
 from ai_tools.writer.topic_refiner import refine_topic
 
 # Configure logging
 logger = logging.getLogger("generator")
 
-# Lazy initialization: 클라이언트를 필요할 때 생성
-_openai_client = None
-_claude_client = None
+# Replay cache: identical model/prompt/params return the stored content.
+# At temperature > 0 this replays one sample instead of drawing a new one,
+# so it is opt-in (settings.GENERATOR_REPLAY_CACHE).
+_replay_cache = LLMCache(
+    backend=RedisBackend(settings.LLM_CACHE_REDIS_URL, prefix="generator:") if settings.LLM_CACHE_REDIS_URL else None,
+    ttl=settings.GENERATOR_REPLAY_CACHE_TTL,
+)
 
-def get_openai_client():
-    """OpenAI 클라이언트를 lazy하게 초기화"""
-    global _openai_client
-    if _openai_client is None:
-        _openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    return _openai_client
 
-def get_claude_client():
-    """Claude 클라이언트를 lazy하게 초기화"""
-    global _claude_client
-    if _claude_client is None:
-        _claude_client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
-    return _claude_client
+class NonRetryableError(RuntimeError):
+    """요청 자체가 잘못되어 다른 모델/재시도로도 성공할 수 없는 오류 (400/422)"""
 
 
 def is_reasoning_model(model_name: str) -> bool:
@@ -37,21 +32,86 @@ def is_reasoning_model(model_name: str) -> bool:
     return any(keyword in model_lower for keyword in ["o1-", "o3-", "gpt-5"])
 
 
-def log_event(model: str, topic: str, status: str, error: str | None = None):
-    """Structured logging helper"""
-    log_message = f"[{model}] [{status}] Topic: {topic[:50]}..."
+def get_model_sequence() -> list[str]:
+    """
+    settings.MODEL_SEQUENCE에서 모델 실행 순서를 읽는다.
+
+    같은 모델 안에서의 재시도는 SDK(RetryPolicy.attempts회 시도)가
+    Retry-After와 지터를 포함해 처리하므로, 연속으로 반복된 항목은 하나로 합친다.
+    (예: "GPT,GPT,GPT,Claude" → ["GPT", "Claude"])
+    """
+    sequence = []
+    for model in settings.MODEL_SEQUENCE.split(","):
+        model = model.strip()
+        if model and (not sequence or sequence[-1] != model):
+            sequence.append(model)
+    return sequence
+
 
+def log_event(model: str, topic: str, status: str, error: str | None = None):
+    """Structured logging helper (formats only when the level is enabled)"""
     if error:
-        logger.error(f"{log_message} | Error: {error}")
-    elif status in ["SUCCESS", "RETRY_SUCCESS"]:
-        logger.info(log_message)
-    elif status in ["FAIL", "RETRY_FAIL", "RETRY_LIMIT_REACHED", "TOTAL_FAIL"]:
-        logger.warning(log_message)
+        logger.error("[%s] [%s] Topic: %.50s... | Error: %s", model, status, topic, error)
+    elif status in ("FAIL", "RETRY_FAIL", "RETRY_LIMIT_REACHED", "TOTAL_FAIL"):
+        logger.warning("[%s] [%s] Topic: %.50s...", model, status, topic)
     else:
-        logger.info(log_message)
+        logger.info("[%s] [%s] Topic: %.50s...", model, status, topic)
+
+
+def _replay_key(model_name: str, user_prompt: str) -> str:
+    """Replay cache key: sha256 of model, messages, temperature and max tokens"""
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+    if model_name == "GPT" and is_reasoning_model(settings.MODEL_PRIMARY):
+        return LLMCache.make_key(settings.MODEL_PRIMARY, messages, None, 10000)
+    model = settings.MODEL_PRIMARY if model_name == "GPT" else settings.MODEL_FALLBACK
+    return LLMCache.make_key(model, messages, settings.DEFAULT_TEMPERATURE, settings.DEFAULT_MAX_TOKENS)
+
+
+async def try_model(
+    model_name: str,
+    topic: str,
+    user_prompt: str,
+    policy: RetryPolicy | None = None
+) -> str | None:
+    """
+    GPT or Claude 실행 (실패 시 None 반환, replay cache 사용 시 동일 요청은 캐시에서 반환)
 
+    Args:
+        model_name: "GPT" or "Claude"
+        topic: 주제 (로깅용)
+        user_prompt: 사용자 프롬프트
+        policy: 재시도 정책 (기본값: settings 기반)
 
-async def try_model(model_name: str, topic: str, user_prompt: str) -> str | None:
+    Returns:
+        str | None: 생성된 콘텐츠 또는 실패 시 None
+
+    Raises:
+        NonRetryableError: 요청 자체가 잘못된 경우 (400/422)
+    """
+    if not settings.GENERATOR_REPLAY_CACHE:
+        return await call_model(model_name, topic, user_prompt, policy)
+
+    key = _replay_key(model_name, user_prompt)
+    cached = await _replay_cache.get(key)
+    if cached is not None:
+        log_event(model_name, topic, "CACHE_HIT")
+        return cached["content"]
+
+    content = await call_model(model_name, topic, user_prompt, policy)
+    if content:
+        await _replay_cache.set(key, {"content": content})
+    return content
+
+
+async def call_model(
+    model_name: str,
+    topic: str,
+    user_prompt: str,
+    policy: RetryPolicy | None = None
+) -> str | None:
     """
     GPT or Claude 실행 (실패 시 None 반환)
 
@@ -59,10 +119,15 @@ async def try_model(model_name: str, topic: str, user_prompt: str) -> str | None
         model_name: "GPT" or "Claude"
         topic: 주제 (로깅용)
         user_prompt: 사용자 프롬프트
+        policy: 재시도 정책 (기본값: settings 기반)
 
     Returns:
         str | None: 생성된 콘텐츠 또는 실패 시 None
+
+    Raises:
+        NonRetryableError: 요청 자체가 잘못된 경우 (400/422)
     """
+    policy = policy or RetryPolicy.from_settings()
     try:
         if model_name == "GPT":
             # Determine if this is a reasoning model
@@ -84,7 +149,7 @@ async def try_model(model_name: str, topic: str, user_prompt: str) -> str | None
                 api_params["max_tokens"] = settings.DEFAULT_MAX_TOKENS
                 api_params["temperature"] = settings.DEFAULT_TEMPERATURE
 
-            resp = await get_openai_client().chat.completions.create(**api_params)
+            resp = await get_openai().with_options(max_retries=policy.attempts - 1).chat.completions.create(**api_params)
             text = resp.choices[0].message.content
 
             # Check for empty content
@@ -97,7 +162,7 @@ async def try_model(model_name: str, topic: str, user_prompt: str) -> str | None
             return text.strip()
 
         elif model_name == "Claude":
-            resp = await get_claude_client().messages.create(
+            resp = await get_anthropic().with_options(max_retries=policy.attempts - 1).messages.create(
                 model=settings.MODEL_FALLBACK,
                 max_tokens=settings.DEFAULT_MAX_TOKENS,
                 temperature=settings.DEFAULT_TEMPERATURE,
@@ -108,51 +173,240 @@ async def try_model(model_name: str, topic: str, user_prompt: str) -> str | None
             return text if text else None
 
     except Exception as e:
+        if policy.is_request_error(e):
+            log_event(model_name, topic, "NON_RETRYABLE", f"{type(e).__name__}: {e}")
+            raise NonRetryableError(f"{model_name} rejected the request: {e}") from e
+        # 인증/모델 없음(401/403/404) 등은 이 모델만 포기하고 다음 모델로 넘어감
         log_event(model_name, topic, "FAIL", f"{type(e).__name__}: {e}")
-        logger.exception(f"Exception in try_model({model_name})")
+        # Full traceback only when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.exception("Exception in call_model(%s)", model_name)
+        return None
+
+
+async def stream_model(
+    model_name: str,
+    user_prompt: str,
+    policy: RetryPolicy | None = None
+) -> AsyncIterator[str]:
+    """
+    GPT or Claude 스트리밍 실행 (텍스트 조각을 도착 순서대로 yield)
+
+    Args:
+        model_name: "GPT" or "Claude"
+        user_prompt: 사용자 프롬프트
+        policy: 재시도 정책 (기본값: settings 기반)
+
+    Yields:
+        str: 생성된 텍스트 조각
+    """
+    policy = policy or RetryPolicy.from_settings()
+    if model_name == "GPT":
+        api_params = {
+            "model": settings.MODEL_PRIMARY,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt},
+            ],
+        }
+
+        # Reasoning models use max_completion_tokens and don't support temperature
+        if is_reasoning_model(settings.MODEL_PRIMARY):
+            api_params["max_completion_tokens"] = 10000
+        else:
+            api_params["max_tokens"] = settings.DEFAULT_MAX_TOKENS
+            api_params["temperature"] = settings.DEFAULT_TEMPERATURE
+
+        client = get_openai().with_options(max_retries=policy.attempts - 1)
+        stream = await client.chat.completions.create(**api_params, stream=True)
+        async with stream:
+            async for event in stream:
+                if event.choices and event.choices[0].delta.content:
+                    yield event.choices[0].delta.content
+
+    elif model_name == "Claude":
+        async with get_anthropic().with_options(max_retries=policy.attempts - 1).messages.stream(
+            model=settings.MODEL_FALLBACK,
+            max_tokens=settings.DEFAULT_MAX_TOKENS,
+            temperature=settings.DEFAULT_TEMPERATURE,
+            system=SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": user_prompt}],
+        ) as stream:
+            async for text in stream.text_stream:
+                if text:
+                    yield text
+
+
+async def generate_content_stream(
+    topic: str,
+    policy: RetryPolicy | None = None,
+    refine: bool = True
+) -> AsyncIterator[str]:
+    """
+    콘텐츠 생성 파이프라인의 스트리밍 버전
+
+    generate_content와 같은 순서(Topic Refiner → GPT → Claude)로 실행하되,
+    생성된 텍스트를 도착하는 대로 yield한다. 첫 조각이 나오기 전에 실패한
+    모델은 다음 모델로 넘어가며, 출력이 시작된 뒤의 실패는 그대로 전파된다.
+
+    Args:
+        topic: 원본 주제
+        policy: 재시도 정책 (기본값: settings 기반)
+        refine: False면 topic을 이미 정제된 제목으로 보고 Topic Refiner를 건너뜀
+
+    Yields:
+        str: 생성된 블로그 콘텐츠 조각
+
+    Raises:
+        NonRetryableError: 요청 자체가 잘못된 경우 (400/422)
+        RuntimeError: 모든 모델이 출력 없이 실패한 경우
+    """
+    policy = policy or RetryPolicy.from_settings()
+    generated_topic = topic
+    if refine:
+        try:
+            generated_topic = await refine_topic(topic)
+            logger.info("Topic refined: %s → %s", topic, generated_topic)
+        except Exception as e:
+            logger.warning("TopicRefiner failed, using original: %s", e)
+
+    user_prompt = USER_PROMPT_TEMPLATE.format(topic=generated_topic)
+    model_sequence = get_model_sequence()
+
+    for attempt, model in enumerate(model_sequence, start=1):
+        log_event(model, generated_topic, "RETRY_START" if attempt > 1 else "START")
+
+        started = False
+        try:
+            async for text in stream_model(model, user_prompt, policy):
+                started = True
+                yield text
+        except Exception as e:
+            if started:
+                raise
+            if policy.is_request_error(e):
+                log_event(model, generated_topic, "NON_RETRYABLE", f"{type(e).__name__}: {e}")
+                raise NonRetryableError(f"{model} rejected the request: {e}") from e
+            log_event(model, generated_topic, "FAIL", f"{type(e).__name__}: {e}")
+
+        if started:
+            log_event(model, generated_topic, "RETRY_SUCCESS" if attempt > 1 else "SUCCESS")
+            return
+
+        log_event(model, generated_topic, "RETRY_FAIL" if attempt > 1 else "FAIL")
+
+    log_event("SYSTEM", generated_topic, "TOTAL_FAIL", "All attempts failed")
+    raise RuntimeError(f"All model attempts failed for topic: {generated_topic}")
+
+
+async def hedge_models(
+    primary: str,
+    fallback: str,
+    topic: str,
+    user_prompt: str,
+    policy: RetryPolicy | None = None
+) -> str | None:
+    """
+    Primary 모델을 먼저 실행하고, settings.HEDGE_DELAY_S 안에 끝나지 않으면
+    Fallback 모델을 동시에 실행해 먼저 성공한 결과를 사용 (나머지는 취소)
+
+    Args:
+        primary: 먼저 실행할 모델 ("GPT" 등)
+        fallback: 지연 후 함께 실행할 모델 ("Claude" 등)
+        topic: 주제 (로깅용)
+        user_prompt: 사용자 프롬프트
+        policy: 재시도 정책 (기본값: settings 기반)
+
+    Returns:
+        str | None: 먼저 성공한 콘텐츠, 두 모델 모두 실패하면 None
+
+    Raises:
+        NonRetryableError: 요청 자체가 잘못된 경우 (400/422)
+    """
+    log_event(primary, topic, "START")
+    tasks = {asyncio.create_task(try_model(primary, topic, user_prompt, policy)): primary}
+
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=settings.HEDGE_DELAY_S)
+        for task in done:
+            if task.result():
+                log_event(primary, topic, "SUCCESS")
+                return task.result()
+
+        # Primary가 느리거나 실패: Fallback 시작
+        log_event(fallback, topic, "HEDGE_START")
+        tasks[asyncio.create_task(try_model(fallback, topic, user_prompt, policy))] = fallback
+        pending = {task for task in tasks if not task.done()}
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.result():
+                    log_event(tasks[task], topic, "HEDGE_SUCCESS")
+                    return task.result()
         return None
 
+    finally:
+        for task in tasks:
+            task.cancel()
 
-async def generate_content(topic: str) -> str:
+
+async def generate_content(
+    topic: str,
+    policy: RetryPolicy | None = None,
+    refine: bool = True
+) -> str:
     """
     콘텐츠 생성 파이프라인 (재시도 로직 포함)
 
     Step 1: Topic Refiner로 질문형 제목 생성
     Step 2: 생성된 제목을 user_prompt에 삽입
-    Step 3: GPT (PRIMARY) → Claude (FALLBACK) 순서로 재시도
-    Step 4: 모든 실패 시 RuntimeError
+    Step 3: GPT (PRIMARY) → Claude (FALLBACK) 순서로 실행 (모델별 재시도는 SDK가 처리)
+    Step 4: 모든 실패 시 RuntimeError (요청 형식 오류 400/422는 즉시 중단)
 
     Args:
         topic: 원본 주제
+        policy: 재시도 정책 (기본값: settings 기반, 엔드포인트별로 조정 가능)
+        refine: False면 topic을 이미 정제된 제목으로 보고 Step 1을 건너뜀
 
     Returns:
         str: 생성된 블로그 콘텐츠
 
     Raises:
+        NonRetryableError: 요청 자체가 잘못된 경우 (400/422, 다음 모델로 넘어가지 않음)
         RuntimeError: 모든 재시도 실패 시
     """
+    policy = policy or RetryPolicy.from_settings()
 
     # 1️⃣ Topic refinement (질문형 제목으로 보정)
-    try:
-        generated_topic = await refine_topic(topic)
-        logger.info(f"Topic refined: {topic} → {generated_topic}")
-    except Exception as e:
-        generated_topic = topic
-        logger.warning(f"TopicRefiner failed, using original: {e}")
+    generated_topic = topic
+    if refine:
+        try:
+            generated_topic = await refine_topic(topic)
+            logger.info("Topic refined: %s → %s", topic, generated_topic)
+        except Exception as e:
+            logger.warning("TopicRefiner failed, using original: %s", e)
 
     # 2️⃣ User prompt 생성
     user_prompt = USER_PROMPT_TEMPLATE.format(topic=generated_topic)
 
-    # 3️⃣ 모델 실행 순서: GPT → GPT (재시도) → Claude (최종 폴백)
-    # Read from settings.MODEL_SEQUENCE (e.g., "GPT,GPT,GPT,Claude")
-    model_sequence = [m.strip() for m in settings.MODEL_SEQUENCE.split(",")]
+    # 3️⃣ 모델 실행 순서: GPT → Claude (최종 폴백)
+    # Read from settings.MODEL_SEQUENCE (e.g., "GPT,Claude")
+    model_sequence = get_model_sequence()
 
-    # 4️⃣ 실행 루프 with exponential backoff
+    # Hedged request: 느린 Primary를 기다리는 대신 Fallback을 함께 실행
+    if settings.HEDGE_ENABLED and len(model_sequence) >= 2:
+        content = await hedge_models(model_sequence[0], model_sequence[1], generated_topic, user_prompt, policy)
+        if content:
+            return content
+        model_sequence = model_sequence[2:]
+
+    # 4️⃣ 실행 루프 (재시도/백오프는 SDK 내부에서 처리, 요청 형식 오류만 즉시 전파)
     for attempt, model in enumerate(model_sequence, start=1):
         retry_label = "RETRY_START" if attempt > 1 else "START"
         log_event(model, generated_topic, retry_label)
 
-        content = await try_model(model, generated_topic, user_prompt)
+        content = await try_model(model, generated_topic, user_prompt, policy)
 
         if content:
             # 성공
@@ -164,12 +418,6 @@ async def generate_content(topic: str) -> str:
         fail_label = "RETRY_FAIL" if attempt > 1 else "FAIL"
         log_event(model, generated_topic, fail_label)
 
-        # Exponential backoff (마지막 시도가 아닐 경우만)
-        if attempt < len(model_sequence):
-            backoff = min(settings.BACKOFF_MIN * (2 ** (attempt - 1)), settings.BACKOFF_MAX)
-            logger.info(f"Waiting {backoff:.1f}s before next retry...")
-            await asyncio.sleep(backoff)
-
     # 5️⃣ 모든 모델/재시도 실패
     log_event("SYSTEM", generated_topic, "TOTAL_FAIL", "All attempts failed")
     raise RuntimeError(f"All model attempts failed for topic: {generated_topic}")
@@ -184,7 +432,10 @@ if __name__ == "__main__":
     sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
     # Configure logging for test
-    logging.basicConfig(level=logging.INFO)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
 
     async def test():
         test_topic = "생애최초 주택담보대출, 신청 자격과 한도·금리는?"
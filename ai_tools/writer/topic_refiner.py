@@ -1,21 +1,49 @@
 # potensia_ai/ai_tools/writer/topic_refiner.py
 import asyncio
 import logging
-from openai import AsyncOpenAI
 from core.config import settings
+from core.clients import get_openai
+from ai_clients.batcher import MicroBatcher
+from ai_clients.breaker import get_breaker
+from ai_clients.cache import LLMCache, RedisBackend
+from ai_clients.inflight import RequestCoalescer
+from ai_clients.serialization import loads
 
 # Configure logging
 logger = logging.getLogger("topic_refiner")
 
-# Lazy initialization: 클라이언트를 필요할 때 생성
-_openai_client = None
+# 동일 topic 동시 요청은 하나의 API 호출을 공유
+_inflight = RequestCoalescer()
 
-def get_openai_client():
-    """OpenAI 클라이언트를 lazy하게 초기화"""
-    global _openai_client
-    if _openai_client is None:
-        _openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    return _openai_client
+# 최근 topic 임베딩 (캐시 미스 시 조회와 저장에 같은 임베딩을 재사용)
+_embedding_memo: dict[str, list[float]] = {}
+_EMBEDDING_MEMO_SIZE = 256
+
+
+async def embed_topic(topic: str) -> list[float]:
+    """시맨틱 캐시 조회용 topic 임베딩 (API 응답 캐시와 공용)"""
+    embedding = _embedding_memo.get(topic)
+    if embedding is None:
+        response = await get_openai().embeddings.create(model=settings.EMBEDDING_MODEL, input=topic)
+        embedding = response.data[0].embedding
+        if len(_embedding_memo) >= _EMBEDDING_MEMO_SIZE:
+            _embedding_memo.pop(next(iter(_embedding_memo)))
+        _embedding_memo[topic] = embedding
+    return embedding
+
+
+def _semantic_text(user_topic: str) -> str:
+    """시맨틱 캐시 입력 정규화 (공백/대소문자 차이 무시)"""
+    return " ".join(user_topic.split()).casefold()
+
+
+# 정제 결과 캐시 (키에 모델과 TOPIC_PROMPT 전문이 포함되어 프롬프트 수정 시 자동 무효화)
+# REFINER_SEMANTIC_CACHE 사용 시 유사한 topic("학비" vs "수강료")도 같은 결과를 재사용
+_refine_cache = LLMCache(
+    backend=RedisBackend(settings.LLM_CACHE_REDIS_URL, prefix="refiner:") if settings.LLM_CACHE_REDIS_URL else None,
+    ttl=settings.REFINER_CACHE_TTL,
+    embedder=embed_topic,
+)
 
 # ============================================================
 # SEO + AEO 통합 프롬프트
@@ -37,6 +65,19 @@ TOPIC_PROMPT = """당신은 SEO 전문가입니다. 주어진 키워드를 자
 
 입력받은 키워드를 위 형식으로 변환해주세요."""
 
+# OpenAI prompt caching 라우팅 키 (프롬프트 수정 시 버전 변경)
+TOPIC_PROMPT_CACHE_KEY = "topic-refiner-v1"
+TOPIC_BATCH_PROMPT_CACHE_KEY = "topic-refiner-batch-v1"
+
+# 여러 키워드를 한 번에 변환하는 배치 프롬프트 (번호 → 제목 JSON)
+TOPIC_BATCH_PROMPT = TOPIC_PROMPT.rsplit("\n\n", 1)[0].replace(
+    "4. 따옴표나 설명 없이 제목만 출력하세요", "4. 제목에 따옴표를 넣지 마세요"
+) + """
+
+번호가 매겨진 여러 키워드가 주어집니다. 각 키워드를 위 형식으로 변환하고,
+설명 없이 번호(문자열)를 제목에 매핑한 JSON 객체만 출력하세요:
+{"1": "첫 번째 제목?", "2": "두 번째 제목?"}"""
+
 
 # ============================================================
 # Helper: 모델 타입 감지
@@ -47,6 +88,82 @@ def is_reasoning_model(model_name: str) -> bool:
     return any(keyword in model_lower for keyword in ["o1-", "o3-", "gpt-5"])
 
 
+# ============================================================
+# 배치 처리: 동시에 들어온 topic을 한 번의 API 호출로 변환
+# ============================================================
+class _RefinerBatcher(MicroBatcher):
+    """
+    동시 요청 topic을 모아 한 번의 chat completion으로 변환하는 마이크로 배처
+
+    submit(topic)은 REFINER_BATCH_MAX_SIZE개가 모이거나 REFINER_BATCH_WINDOW_MS가
+    지나면 함께 전송되며, None 결과는 개별 호출 경로를 사용하라는 의미
+    """
+
+    def __init__(self):
+        super().__init__(settings.REFINER_BATCH_MAX_SIZE, settings.REFINER_BATCH_WINDOW_MS)
+
+    async def _dispatch(self, batch: list) -> None:
+        topics_block = "\n".join(f"{i}. {topic}" for i, (topic, _) in enumerate(batch, 1))
+        api_params = {
+            "model": settings.MODEL_PRIMARY,
+            "messages": [
+                {"role": "system", "content": TOPIC_BATCH_PROMPT},
+                {"role": "user", "content": topics_block}
+            ],
+            "prompt_cache_key": TOPIC_BATCH_PROMPT_CACHE_KEY,
+        }
+        if is_reasoning_model(settings.MODEL_PRIMARY):
+            api_params["max_completion_tokens"] = 500 * len(batch)
+        else:
+            api_params["max_tokens"] = 80 * len(batch)
+            api_params["temperature"] = settings.DEFAULT_TEMPERATURE
+
+        breaker = get_breaker("openai")
+        if not breaker.allow():
+            return
+
+        try:
+            logger.info(f"Batched topic refinement for {len(batch)} topics")
+            try:
+                response = await get_openai().chat.completions.create(**api_params)
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+            content = (response.choices[0].message.content or "").strip()
+
+            start, end = content.find("{"), content.rfind("}")
+            results = loads(content[start:end + 1]) if start != -1 and end > start else {}
+            if not isinstance(results, dict):
+                results = {}
+
+            for i, (topic, future) in enumerate(batch, 1):
+                title = results.get(str(i))
+                if isinstance(title, str):
+                    title = title.strip().replace('"', "").replace("'", "")
+                # 빈 결과나 동일 반환은 개별 호출로 재시도
+                valid = isinstance(title, str) and title and title != topic.strip()
+                if not future.done():
+                    future.set_result(title if valid else None)
+
+        except Exception as e:
+            logger.warning(f"Batched topic refinement failed, falling back to per-topic calls: {e}")
+
+
+_batcher = _RefinerBatcher()
+
+
+async def _remember(user_topic: str, cache_key: str | None, title: str) -> None:
+    """정제 결과를 exact/semantic 캐시에 저장"""
+    if cache_key is not None:
+        await _refine_cache.set(cache_key, {"title": title})
+    if settings.REFINER_SEMANTIC_CACHE:
+        try:
+            await _refine_cache.set_similar(_semantic_text(user_topic), {"title": title})
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
+
+
 # ============================================================
 # 메인 함수
 # ============================================================
@@ -60,28 +177,83 @@ async def refine_topic(user_topic: str) -> str:
     Returns:
         str: 변환된 질문형 제목
     """
+    # 빈 입력이나 이미 규칙(질문형, 25-35자 안팎)을 만족하는 제목은 API 호출 없이 반환
+    topic = user_topic.strip()
+    if not topic:
+        return ""
+    if topic.endswith("?") and 25 <= len(topic) <= 45:
+        logger.info(f"Skipping refinement, already in question form: {topic[:50]}...")
+        return topic
+
+    return await _inflight.run(user_topic, lambda: _refine_topic(user_topic))
+
+
+async def _refine_topic(user_topic: str) -> str:
+    """refine_topic 본체 (OpenAI 호출 + 재시도)"""
     logger.info(f"Starting topic refinement: {user_topic[:50]}...")
 
-    # 재시도 로직 with exponential backoff
+    # 모델별 파라미터 설정
+    api_params = {
+        "model": settings.MODEL_PRIMARY,
+        "messages": [
+            {"role": "system", "content": TOPIC_PROMPT},
+            {"role": "user", "content": user_topic}
+        ],
+        "prompt_cache_key": TOPIC_PROMPT_CACHE_KEY,
+    }
+
+    # Reasoning 모델 vs 일반 모델
+    if is_reasoning_model(settings.MODEL_PRIMARY):
+        api_params["max_completion_tokens"] = 500
+    else:
+        api_params["max_tokens"] = 80  # 35자 안팎의 제목 한 줄
+        api_params["temperature"] = settings.DEFAULT_TEMPERATURE
+
+    # 캐시 조회
+    cache_key = None
+    if settings.LLM_CACHE_ENABLED:
+        cache_key = LLMCache.make_key(
+            api_params["model"], api_params["messages"],
+            api_params.get("temperature"),
+            api_params.get("max_tokens", api_params.get("max_completion_tokens"))
+        )
+        cached = await _refine_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Topic refinement cache hit: {cached['title'][:50]}...")
+            return cached["title"]
+
+    if settings.REFINER_SEMANTIC_CACHE:
+        try:
+            cached = await _refine_cache.get_similar(_semantic_text(user_topic))
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            logger.info(f"Topic refinement semantic cache hit: {cached['title'][:50]}...")
+            return cached["title"]
+
+    # 동시 요청과 묶어서 한 번의 API 호출로 처리
+    if settings.REFINER_BATCH_ENABLED:
+        title = await _batcher.submit(user_topic)
+        if title:
+            logger.info(f"Topic refined successfully (batched): {title[:50]}...")
+            await _remember(user_topic, cache_key, title)
+            return title
+
+    # 재시도 로직 with exponential backoff (장애로 circuit이 열리면 즉시 원문 반환)
+    breaker = get_breaker("openai")
     for attempt in range(settings.MAX_RETRIES):
+        if not breaker.allow():
+            logger.warning(f"OpenAI circuit open, returning original topic: {user_topic}")
+            return user_topic
+
         try:
-            # 모델별 파라미터 설정
-            api_params = {
-                "model": settings.MODEL_PRIMARY,
-                "messages": [
-                    {"role": "system", "content": TOPIC_PROMPT},
-                    {"role": "user", "content": user_topic}
-                ],
-            }
-
-            # Reasoning 모델 vs 일반 모델
-            if is_reasoning_model(settings.MODEL_PRIMARY):
-                api_params["max_completion_tokens"] = 500
-            else:
-                api_params["max_tokens"] = 500
-                api_params["temperature"] = settings.DEFAULT_TEMPERATURE
-
-            response = await get_openai_client().chat.completions.create(**api_params)
+            try:
+                response = await get_openai().chat.completions.create(**api_params)
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
 
             # 응답 파싱
             content = response.choices[0].message.content
@@ -93,6 +265,7 @@ async def refine_topic(user_topic: str) -> str:
                 return user_topic.strip()
 
             logger.info(f"Topic refined successfully: {title[:50]}...")
+            await _remember(user_topic, cache_key, title)
             return title
 
         except Exception as e:
@@ -128,9 +301,10 @@ if __name__ == "__main__":
             "목동 영어유치원"
         ]
 
-        for topic in test_topics:
+        # 독립적인 topic은 동시에 변환
+        results = await asyncio.gather(*(refine_topic(topic) for topic in test_topics))
+        for topic, result in zip(test_topics, results):
             print(f"\n입력: {topic}")
-            result = await refine_topic(topic)
             print(f"결과: {result}")
 
     asyncio.run(test())
@@ -1,11 +1,18 @@
 # potensia_ai/ai_tools/writer/validator.py
 import asyncio
+import copy
+import hashlib
 import json
-import datetime
 import re
 import logging
-from openai import AsyncOpenAI
+from typing import AsyncIterator
 from core.config import settings
+from core.clients import get_openai
+from ai_clients.batcher import MicroBatcher
+from ai_clients.breaker import get_breaker
+from ai_clients.cache import LLMCache, RedisBackend
+from ai_clients.inflight import RequestCoalescer
+from ai_clients.serialization import dumps, loads
 
 # Configure logging
 logging.basicConfig(
@@ -14,15 +21,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger("validator")
 
-# Lazy initialization: 클라이언트를 필요할 때 생성
-_openai_client = None
+# 모델 응답에서 JSON 객체 추출 (첫 '{'부터 마지막 '}'까지)
+_JSON_BRACES = re.compile(r'\{[\s\S]*\}')
 
-def get_openai_client():
-    """OpenAI 클라이언트를 lazy하게 초기화"""
-    global _openai_client
-    if _openai_client is None:
-        _openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    return _openai_client
+# 스트리밍 중 완성된 점수 필드 ("grammar_score": 8, 뒤에 구분자가 와야 숫자가 끝난 것)
+_SCORE_FIELD = re.compile(r'"(grammar|human|seo)_score"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}\n]')
+
+# Reasoning 모델 이름 표식 (o1, o3, gpt-5 계열)
+_REASONING_MODEL_MARKERS = frozenset(("o1-", "o3-", "gpt-5"))
+
+# 동일 콘텐츠 동시 검증은 하나의 API 호출을 공유
+_inflight = RequestCoalescer()
+
+# 검증 결과 캐시 (키에 모델과 VALIDATOR_PROMPT 전문이 포함되어 프롬프트 수정 시 자동 무효화)
+_validation_cache = LLMCache(
+    backend=RedisBackend(settings.LLM_CACHE_REDIS_URL, prefix="validator:") if settings.LLM_CACHE_REDIS_URL else None,
+    ttl=settings.VALIDATOR_CACHE_TTL,
+)
 
 VALIDATOR_PROMPT = """You are an expert content quality analyst specializing in SEO, AEO (Answer Engine Optimization), and AI-written content detection.
 
@@ -69,6 +84,18 @@ Analyze the content for:
 
 Do NOT include any explanation outside the JSON structure."""
 
+# OpenAI prompt caching 라우팅 키 (프롬프트 수정 시 버전 변경)
+VALIDATOR_PROMPT_CACHE_KEY = "validator-v1"
+
+# 여러 글을 한 번에 평가하는 배치 프롬프트
+VALIDATOR_BATCH_PROMPT = VALIDATOR_PROMPT + """
+
+**BATCH MODE**: The user message contains several articles, each starting with a line like [ARTICLE 1].
+Evaluate every article independently and respond with ONE JSON object that maps each article number
+(as a string) to its evaluation object in the format above, e.g. {"1": {...}, "2": {...}}."""
+VALIDATOR_BATCH_PROMPT_CACHE_KEY = "validator-batch-v1"
+_REQUIRED_KEYS = ("grammar_score", "human_score", "seo_score", "has_faq", "suggestions")
+
 
 def log_validation(status: str, message: str | None = None, **kwargs):
     """
@@ -78,19 +105,77 @@ def log_validation(status: str, message: str | None = None, **kwargs):
         status: 상태 (START, OK, ERROR 등)
         message: 로그 메시지
         **kwargs: 추가 컨텍스트 정보
+
+    타임스탬프는 로그 포매터(asctime)가 레코드 출력 시점에 붙이며,
+    해당 레벨이 비활성화된 경우 페이로드를 만들지 않는다.
     """
+    level = logging.ERROR if status == "ERROR" else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+
     log_data = {
-        "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
         "module": "validator",
         "status": status,
         "message": message or "",
         **kwargs
     }
+    logger.log(level, dumps(log_data).decode())
 
-    if status == "ERROR":
-        logger.error(json.dumps(log_data, ensure_ascii=False))
-    else:
-        logger.info(json.dumps(log_data, ensure_ascii=False))
+
+class _ValidatorBatcher(MicroBatcher):
+    """
+    동시 요청 글을 모아 한 번의 chat completion으로 평가하는 마이크로 배처
+
+    submit(content)은 VALIDATOR_BATCH_MAX_SIZE개가 모이거나 VALIDATOR_BATCH_WINDOW_MS가
+    지나면 함께 전송되며, None 결과는 개별 호출 경로를 사용하라는 의미
+    """
+
+    def __init__(self):
+        super().__init__(settings.VALIDATOR_BATCH_MAX_SIZE, settings.VALIDATOR_BATCH_WINDOW_MS)
+
+    async def _dispatch(self, batch: list) -> None:
+        articles = "\n\n".join(f"[ARTICLE {i}]\n{content}" for i, (content, _) in enumerate(batch, 1))
+        api_params = {
+            "model": settings.MODEL_PRIMARY,
+            "messages": [
+                {"role": "system", "content": VALIDATOR_BATCH_PROMPT},
+                {"role": "user", "content": f"다음 블로그 글들을 평가해주세요:\n\n{articles}"}
+            ],
+            "max_tokens": 250 * len(batch),
+            "temperature": 0.3,
+            "response_format": {"type": "json_object"},
+            "prompt_cache_key": VALIDATOR_BATCH_PROMPT_CACHE_KEY,
+        }
+
+        breaker = get_breaker("openai")
+        if not breaker.allow():
+            return
+
+        try:
+            log_validation("START", "Batched content validation", batch_size=len(batch))
+            try:
+                response = await get_openai().chat.completions.create(**api_params)
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+
+            results = loads(response.choices[0].message.content or "{}")
+            if not isinstance(results, dict):
+                results = {}
+
+            for i, (_, future) in enumerate(batch, 1):
+                data = results.get(str(i))
+                # 누락되거나 구조가 잘못된 항목은 개별 호출로 재시도
+                valid = isinstance(data, dict) and all(key in data for key in _REQUIRED_KEYS)
+                if not future.done():
+                    future.set_result(structure_validation(data) if valid else None)
+
+        except Exception as e:
+            log_validation("ERROR", f"Batched validation failed, falling back to per-article calls: {str(e)}")
+
+
+_batcher = _ValidatorBatcher()
 
 
 async def validate_content(content: str, model: str | None = None) -> dict:
@@ -105,15 +190,18 @@ async def validate_content(content: str, model: str | None = None) -> dict:
         dict: 평가 결과 (grammar_score, human_score, seo_score, has_faq, suggestions)
               JSON 파싱 실패 시 {"raw_output": result} 반환
     """
-    log_validation("START", "Starting content validation", content_length=len(content), model=model)
-
-    # Use provided model or fall back to settings
     model_to_use = model or settings.MODEL_PRIMARY
+    key = hashlib.blake2b(f"{model_to_use}\0{content}".encode("utf-8")).hexdigest()
+    result = await _inflight.run(key, lambda: _validate_content(content, model))
+    # 공유된 결과를 호출자별로 복사 (Fixer 등이 리포트를 수정해도 서로 영향 없음)
+    return copy.deepcopy(result)
+
 
+def _build_api_params(content: str, model_to_use: str) -> dict:
+    """모델 타입에 맞는 검증 API 파라미터 생성"""
     # Determine if this is a reasoning model (o1, o3, gpt-5, etc.)
     model_name = model_to_use.lower()
-    is_reasoning_model = any(keyword in model_name
-                            for keyword in ["o1-", "o3-", "gpt-5"])
+    is_reasoning_model = any(marker in model_name for marker in _REASONING_MODEL_MARKERS)
 
     # Prepare API call parameters based on model type
     api_params = {
@@ -122,19 +210,77 @@ async def validate_content(content: str, model: str | None = None) -> dict:
             {"role": "system", "content": VALIDATOR_PROMPT},
             {"role": "user", "content": f"다음 블로그 글을 평가해주세요:\n\n{content}"}
         ],
+        "prompt_cache_key": VALIDATOR_PROMPT_CACHE_KEY,
     }
 
     # Reasoning models use max_completion_tokens and don't support temperature
     if is_reasoning_model:
         api_params["max_completion_tokens"] = 800
     else:
-        api_params["max_tokens"] = 800
+        api_params["max_tokens"] = 250  # 점수 3개 + 제안 몇 개의 JSON
         api_params["temperature"] = 0.3
+        # JSON mode: 설명 문장이나 코드 펜스 없이 JSON 객체만 반환
+        api_params["response_format"] = {"type": "json_object"}
+    return api_params
+
+
+def _cache_key(api_params: dict) -> str | None:
+    """검증 결과 캐시 키 (캐시 비활성화 시 None)"""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return LLMCache.make_key(
+        api_params["model"], api_params["messages"],
+        api_params.get("temperature"),
+        api_params.get("max_tokens", api_params.get("max_completion_tokens"))
+    )
+
+
+async def _validate_content(content: str, model: str | None = None) -> dict:
+    """validate_content 본체 (OpenAI 호출 + 재시도 + JSON 파싱)"""
+    log_validation("START", "Starting content validation", content_length=len(content), model=model)
+
+    # Use provided model or fall back to settings
+    model_to_use = model or settings.MODEL_PRIMARY
+    api_params = _build_api_params(content, model_to_use)
+
+    # 캐시 조회 (성공한 검증 결과만 저장됨)
+    cache_key = _cache_key(api_params)
+    if cache_key is not None:
+        cached = await _validation_cache.get(cache_key)
+        if cached is not None:
+            log_validation("CACHE_HIT", "Returning cached validation", model=model_to_use)
+            return cached
+
+    # 기본(non-reasoning) 모델은 동시 요청과 묶어 한 번에 평가
+    is_reasoning_model = any(marker in model_to_use.lower() for marker in _REASONING_MODEL_MARKERS)
+    if settings.VALIDATOR_BATCH_ENABLED and model_to_use == settings.MODEL_PRIMARY and not is_reasoning_model:
+        batched = await _batcher.submit(content)
+        if batched is not None:
+            if cache_key is not None:
+                await _validation_cache.set(cache_key, batched)
+            return batched
 
     # Retry logic with exponential backoff (from settings)
+    breaker = get_breaker("openai")
     for attempt in range(settings.MAX_RETRIES):
+        # OpenAI 장애로 circuit이 열려 있으면 재시도 없이 즉시 실패 반환
+        if not breaker.allow():
+            log_validation("ERROR", "OpenAI circuit open, skipping validation", attempt=attempt+1)
+            return {
+                "error": "OpenAI circuit open",
+                "scores": {"grammar": 0, "human": 0, "seo": 0},
+                "has_faq": False,
+                "issues": [{"type": "validation_error", "message": "검증 중 오류가 발생했습니다."}],
+                "raw_output": ""
+            }
+
         try:
-            response = await get_openai_client().chat.completions.create(**api_params)
+            try:
+                response = await get_openai().chat.completions.create(**api_params)
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
             result = response.choices[0].message.content
 
             if not result or not result.strip():
@@ -166,61 +312,83 @@ async def validate_content(content: str, model: str | None = None) -> dict:
                 "raw_output": ""
             }
 
+    structured_response, ok = _parse_validation(result)
+    if ok and cache_key is not None:
+        await _validation_cache.set(cache_key, structured_response)
+    return structured_response
+
+
+def structure_validation(validated_data: dict) -> dict:
+    """
+    모델의 평가 JSON(grammar_score, human_score, seo_score, has_faq, suggestions)을
+    Fixer 친화적인 구조로 변환 (레거시 키 포함)
+    """
+    return {
+        "scores": {
+            "grammar": validated_data["grammar_score"],
+            "human": validated_data["human_score"],
+            "seo": validated_data["seo_score"]
+        },
+        "has_faq": validated_data["has_faq"],
+        "issues": validated_data["suggestions"],  # Fixer가 바로 사용 가능
+
+        # 레거시 호환성을 위해 유지
+        "grammar_score": validated_data["grammar_score"],
+        "human_score": validated_data["human_score"],
+        "seo_score": validated_data["seo_score"],
+        "suggestions": [
+            item["message"] if isinstance(item, dict) else item
+            for item in validated_data["suggestions"]
+        ]
+    }
+
+
+def _parse_validation(result: str) -> tuple[dict, bool]:
+    """
+    모델 응답(JSON)을 Fixer 친화적인 구조로 변환
+
+    Returns:
+        tuple: (평가 결과 dict, 파싱 성공 여부)
+    """
     try:
 
-        # Enhanced JSON extraction with fallback
-        json_match = re.search(r'\{[\s\S]*\}', result)
-        if not json_match:
-            log_validation("ERROR", "No valid JSON found in response")
-            return {
-                "scores": {"grammar": 0, "human": 0, "seo": 0},
-                "has_faq": False,
-                "issues": [{"type": "parse_error", "message": "응답 파싱 실패"}],
-                "raw_output": result
-            }
+        # JSON mode 응답은 그대로 파싱, 그 외(reasoning 모델)는 본문에서 JSON 추출
+        result_clean = result.strip()
+        if not result_clean.startswith("{"):
+            json_match = _JSON_BRACES.search(result)
+            if not json_match:
+                log_validation("ERROR", "No valid JSON found in response")
+                return {
+                    "scores": {"grammar": 0, "human": 0, "seo": 0},
+                    "has_faq": False,
+                    "issues": [{"type": "parse_error", "message": "응답 파싱 실패"}],
+                    "raw_output": result
+                }, False
+            result_clean = json_match.group().strip()
 
-        result_clean = json_match.group().strip()
-        validated_data = json.loads(result_clean)
+        validated_data = loads(result_clean)
 
         # 필수 키 검증
-        required_keys = ["grammar_score", "human_score", "seo_score", "has_faq", "suggestions"]
-        if not all(key in validated_data for key in required_keys):
+        if not all(key in validated_data for key in _REQUIRED_KEYS):
             log_validation("ERROR", "Missing required keys",
-                          expected=required_keys,
+                          expected=list(_REQUIRED_KEYS),
                           got=list(validated_data.keys()))
             return {
                 "scores": {"grammar": 0, "human": 0, "seo": 0},
                 "has_faq": False,
                 "issues": [{"type": "parse_error", "message": "응답 구조 오류"}],
                 "raw_output": result
-            }
+            }, False
 
         # 구조화된 응답 반환 (Fixer 친화적)
-        structured_response = {
-            "scores": {
-                "grammar": validated_data["grammar_score"],
-                "human": validated_data["human_score"],
-                "seo": validated_data["seo_score"]
-            },
-            "has_faq": validated_data["has_faq"],
-            "issues": validated_data["suggestions"],  # Fixer가 바로 사용 가능
-
-            # 레거시 호환성을 위해 유지
-            "grammar_score": validated_data["grammar_score"],
-            "human_score": validated_data["human_score"],
-            "seo_score": validated_data["seo_score"],
-            "suggestions": [
-                item["message"] if isinstance(item, dict) else item
-                for item in validated_data["suggestions"]
-            ]
-        }
+        structured_response = structure_validation(validated_data)
 
         log_validation("OK", "Validation completed successfully",
                       grammar=structured_response["scores"]["grammar"],
                       human=structured_response["scores"]["human"],
                       seo=structured_response["scores"]["seo"])
 
-        return structured_response
+        return structured_response, True
 
     except json.JSONDecodeError as e:
         log_validation("ERROR", f"JSON parse failed: {str(e)}", raw_output=result[:200])
@@ -229,7 +397,77 @@ async def validate_content(content: str, model: str | None = None) -> dict:
             "has_faq": False,
             "issues": [{"type": "parse_error", "message": f"JSON 파싱 실패: {str(e)}"}],
             "raw_output": result
-        }
+        }, False
+
+
+async def validate_content_stream(content: str, model: str | None = None) -> AsyncIterator[dict]:
+    """
+    validate_content의 스트리밍 버전
+
+    응답을 스트리밍으로 받아 grammar/human/seo 점수가 모두 도착하는 즉시
+    {"scores": {...}, "partial": True}를 먼저 yield하고, 응답이 끝나면
+    validate_content와 같은 최종 결과를 yield한다.
+    (Reasoning 모델이거나 출력 전에 스트림이 실패하면 validate_content 결과만 yield)
+
+    Args:
+        content: 평가할 블로그 콘텐츠 (Markdown 형식)
+        model: 사용할 OpenAI 모델 (기본값: settings.MODEL_PRIMARY)
+
+    Yields:
+        dict: 부분 점수, 이후 최종 평가 결과
+    """
+    model_to_use = model or settings.MODEL_PRIMARY
+    api_params = _build_api_params(content, model_to_use)
+    cache_key = _cache_key(api_params)
+
+    if cache_key is not None:
+        cached = await _validation_cache.get(cache_key)
+        if cached is not None:
+            log_validation("CACHE_HIT", "Returning cached validation", model=model_to_use)
+            yield copy.deepcopy(cached)
+            return
+
+    # Reasoning 모델은 전체 응답을 기다림
+    if "max_completion_tokens" in api_params:
+        yield await validate_content(content, model)
+        return
+
+    # circuit이 열려 있으면 validate_content가 즉시 실패 결과를 반환
+    breaker = get_breaker("openai")
+    if not breaker.allow():
+        yield await validate_content(content, model)
+        return
+
+    log_validation("START", "Starting streamed content validation", content_length=len(content), model=model)
+    result = ""
+    scores: dict[str, float] = {}
+    try:
+        stream = await get_openai().chat.completions.create(**api_params, stream=True)
+        async with stream:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                # 조각 경계에 걸친 필드도 잡도록 직전 64자부터 다시 검사
+                scan_from = max(len(result) - 64, 0)
+                result += chunk.choices[0].delta.content
+                if len(scores) < 3:
+                    for match in _SCORE_FIELD.finditer(result, scan_from):
+                        scores[match[1]] = loads(match[2])
+                    if len(scores) == 3:
+                        yield {"scores": dict(scores), "partial": True}
+        breaker.record_success()
+    except Exception as e:
+        breaker.record_failure()
+        if result:
+            raise
+        log_validation("ERROR", f"Streaming validation failed, retrying without streaming: {str(e)}")
+        yield await validate_content(content, model)
+        return
+
+    structured_response, ok = _parse_validation(result)
+    if ok and cache_key is not None:
+        await _validation_cache.set(cache_key, structured_response)
+    yield copy.deepcopy(structured_response)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1,11 +1,11 @@
 # potensia_ai/api/keyword_extractor.py
-import os
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from openai import OpenAI
+from core.clients import get_openai
+from ai_clients.serialization import loads
 
-router = APIRouter()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+router = APIRouter(default_response_class=ORJSONResponse)
 
 SYSTEM_PROMPT = """
 너는 고급 SEO·콘텐츠 전략가이자 키워드 분석 전문가다.
@@ -36,22 +36,22 @@ async def get_top_keywords(req: KeywordRequest):
     """
     try:
         prompt = f"/키워드추출 [{req.keyword}]"
-        completion = client.chat.completions.create(
+        completion = await get_openai().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
+            response_format={"type": "json_object"},  # 항상 파싱 가능한 JSON 객체로 응답
         )
 
         response_text = completion.choices[0].message.content.strip()
 
         # 응답이 JSON 형태면 그대로 파싱
-        import json
         try:
-            data = json.loads(response_text)
-        except json.JSONDecodeError:
+            data = loads(response_text)
+        except ValueError:  # json/orjson JSONDecodeError
             raise HTTPException(status_code=500, detail="응답 파싱 실패")
 
         return {"status": "success", "keyword": req.keyword, "data": data["top_keywords"]}
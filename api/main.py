@@ -4,10 +4,17 @@ PotensiaAI Writer API - Main Application Entry Point
 """
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 스크립트로 직접 실행할 때만 프로젝트 루트를 import 경로에 추가 (python api/main.py)
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from core.config import settings
+from core.clients import get_anthropic, get_openai
+from ai_clients.http_pool import close_shared_http_client
 from api.router import router
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -19,19 +26,37 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # ─────────────────────────────────────────────────────────────────────────────
 # CORS 설정 (필요시)
 # ─────────────────────────────────────────────────────────────────────────────
+# 운영: settings.CORS_ORIGINS에 지정된 도메인만 credentials와 함께 허용
+# 개발(미지정): 모든 도메인 허용, credentials 없이 고정 "*" 헤더 반환
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 운영환경에서는 특정 도메인으로 제한
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.CORS_ORIGINS or ("*",),
+    allow_credentials=bool(settings.CORS_ORIGINS),
+    allow_methods=("GET", "POST"),
+    allow_headers=("Authorization", "Content-Type"),
 )
 
+# ─────────────────────────────────────────────────────────────────────────────
+# 공유 SDK 클라이언트 / HTTP 커넥션 풀
+# ─────────────────────────────────────────────────────────────────────────────
+@app.on_event("startup")
+async def create_clients():
+    """첫 요청 전에 공유 클라이언트 생성 (모든 모듈이 같은 커넥션 풀 사용)"""
+    app.state.openai = get_openai()
+    app.state.anthropic = get_anthropic()
+
+
+@app.on_event("shutdown")
+async def close_http_pool():
+    await close_shared_http_client()
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Router 등록
 # ─────────────────────────────────────────────────────────────────────────────
@@ -77,4 +102,13 @@ if __name__ == "__main__":
     print("  GET    http://localhost:8000/docs          - Interactive API docs")
     print("="*80 + "\n")
 
-    uvicorn.run("api.main:app", host="0.0.0.0", port=8000, reload=True)
+    # 개발(DEBUG): 자동 리로드 단일 프로세스 / 운영: WEB_CONCURRENCY개 워커
+    uvicorn.run(
+        "api.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        reload=settings.DEBUG,
+        workers=None if settings.DEBUG else int(os.getenv("WEB_CONCURRENCY", "4")),
+    )
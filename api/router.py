@@ -1,93 +1,270 @@
 # api/router.py
+import asyncio
 import datetime
+import hashlib
 import logging
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel, Field
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
 
 # ✅ 루트 기준으로 import (potensia_ai. ❌)
-from ai_tools.writer.topic_refiner import refine_topic
-from ai_tools.writer.generator import generate_content
+from ai_tools.writer.topic_refiner import embed_topic, refine_topic
+from ai_tools.writer.generator import generate_content, generate_content_stream
 from ai_tools.writer.validator import validate_content
 from ai_tools.writer.fixer import fix_content
+from ai_tools.writer.fused import full_pipeline
+from ai_clients.cache import InMemoryBackend, LLMCache, RedisBackend
+from ai_clients.serialization import dumps, loads
+from core.config import settings
+from core.logger import get_logger
+from api.schemas import (
+    BatchWriteError, BatchWriteRequest, BatchWriteResponse,
+    FixRequest, FixResponse, RefineRequest, RefineResponse,
+    ValidateRequest, ValidateResponse, WriteRequest, WriteResponse,
+)
 
-router = APIRouter(prefix="/api/write", tags=["Writer"])
 
-# ─────────────── 모델 정의 ───────────────
-class WriteRequest(BaseModel):
-    topic: str
-    model: str | None = None
+# ─────────────── JSON 처리 ───────────────
+class ORJSONRequest(Request):
+    """요청 본문 JSON을 orjson으로 파싱 (stdlib json 대비 빠름)"""
 
-class WriteResponse(BaseModel):
-    status: str
-    input_topic: str
-    refined_topic: str
-    content: str
-    validation: dict
+    async def json(self):
+        if not hasattr(self, "_json"):
+            self._json = loads(await self.body())
+        return self._json
 
-class RefineRequest(BaseModel):
-    topic: str
 
-class RefineResponse(BaseModel):
-    status: str
-    input_topic: str
-    refined_topic: str
+class ORJSONRoute(APIRoute):
+    """ORJSONRequest로 요청을 감싸는 라우트 클래스"""
 
-class ValidateRequest(BaseModel):
-    content: str
-    model: str | None = None
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
 
-class ValidateResponse(BaseModel):
-    status: str
-    validation: dict
+        async def route_handler(request: Request) -> Response:
+            return await handler(ORJSONRequest(request.scope, request.receive))
 
-class FixRequest(BaseModel):
-    content: str
-    validation_report: dict
-    metadata: dict | None = None
+        return route_handler
 
-class FixResponse(BaseModel):
-    status: str
-    fixed_content: str
-    fix_summary: list
-    added_FAQ: bool
-    keyword_density: float
+
+def model_response(model: BaseModel, headers: dict[str, str] | None = None) -> Response:
+    """pydantic 모델을 model_dump_json으로 바로 직렬화 (FastAPI 재검증/인코딩 생략)"""
+    return Response(content=model.model_dump_json(), media_type="application/json", headers=headers)
+
+
+# ─────────────── 응답 캐시 ───────────────
+# 같은 (정규화된) topic + model 요청은 저장된 응답을 재사용 (X-Cache: HIT/MISS)
+# API_SEMANTIC_CACHE 사용 시 표현만 다른 topic도 재사용 (시맨틱 인덱스는 namespace/model별)
+_response_backend = (
+    RedisBackend(settings.LLM_CACHE_REDIS_URL, prefix="api:") if settings.LLM_CACHE_REDIS_URL
+    else InMemoryBackend(settings.LLM_CACHE_MAX_ENTRIES)
+)
+_response_caches: dict[tuple[str, str | None], LLMCache] = {}
+
+
+def _response_cache(namespace: str, model: str | None) -> LLMCache:
+    cache = _response_caches.get((namespace, model))
+    if cache is None:
+        cache = _response_caches[(namespace, model)] = LLMCache(
+            backend=_response_backend,
+            ttl=settings.API_CACHE_TTL,
+            embedder=embed_topic if settings.API_SEMANTIC_CACHE else None,
+        )
+    return cache
+
+
+# 검증 실패로 간주하는 issue type (이런 응답은 캐시하지 않음)
+_VALIDATION_FAILURE_TYPES = frozenset({"parse_error", "validation_error"})
+
+
+def _validation_succeeded(result: dict) -> bool:
+    """응답의 validation이 오류/파싱 실패가 아닌지 확인 (실패한 검증 결과는 캐시하지 않음)"""
+    validation = result.get("validation") or {}
+    if validation.get("error"):
+        return False
+    return not any(
+        issue.get("type") in _VALIDATION_FAILURE_TYPES
+        for issue in validation.get("issues") or ()
+        if isinstance(issue, dict)
+    )
+
+
+async def cached_response(
+    namespace: str,
+    topic: str,
+    model: str | None,
+    compute: Callable[[], Awaitable[dict]],
+    cacheable: Callable[[dict], bool] | None = None
+) -> tuple[dict, bool]:
+    """
+    응답 캐시 조회 후 없으면 compute() 실행 결과를 저장 (cacheable이 False를 반환하면 저장 생략)
+
+    Returns:
+        (응답 dict, 캐시 적중 여부)
+    """
+    if not settings.API_CACHE_ENABLED:
+        return await compute(), False
+
+    normalized = " ".join(topic.split()).casefold()
+    key = hashlib.sha256(f"{namespace}:{normalized}:{model}".encode()).hexdigest()
+    return await _response_cache(namespace, model).get_or_compute(
+        key, compute, text=normalized, cacheable=cacheable
+    )
+
+
+logger = get_logger("api.router")
+
+router = APIRouter(
+    prefix="/api/write",
+    tags=["Writer"],
+    route_class=ORJSONRoute,
+    default_response_class=ORJSONResponse,
+)
 
 # ─────────────── Helper ───────────────
 def log_api(endpoint: str, status: str, detail: str = ""):
-    print(f"[{endpoint}] [{status}] {detail}")
+    """API 로그 (ERROR/FAIL/FALLBACK은 warning, 나머지는 info, 비활성 레벨은 포맷하지 않음)"""
+    level = logging.WARNING if status.endswith(("ERROR", "FAIL", "FALLBACK")) else logging.INFO
+    if logger.isEnabledFor(level):
+        logger.log(level, "[%s] [%s] %s", endpoint, status, detail)
+
+async def write_pipeline(topic: str, model: str | None = None) -> WriteResponse:
+    """
+    refine → generate → validate 파이프라인 (단일/배치 엔드포인트 공용)
+
+    model이 "fused-"로 시작하면 세 단계를 한 번의 호출로 처리하고
+    (예: "fused-gpt-4o-mini"), 실패 시 기존 3단계 경로로 폴백한다.
+    """
+    if model and model.startswith("fused-"):
+        model = model.removeprefix("fused-") or None
+        try:
+            fused = await full_pipeline(topic, model)
+            return WriteResponse(status="success", input_topic=topic, **fused)
+        except Exception as e:
+            log_api("write", "FUSED_FALLBACK", str(e))
+
+    refined = await refine_topic(topic)
+    # 이미 정제된 제목이므로 generate_content 내부의 재정제 호출은 생략
+    content = await generate_content(refined, refine=False)
+    validation = await validate_content(content, model=model)
+
+    return WriteResponse(
+        status="success",
+        input_topic=topic,
+        refined_topic=refined,
+        content=content,
+        validation=validation
+    )
 
 # ─────────────── /api/write ───────────────
 @router.post("", response_model=WriteResponse)
 async def write_article(request: WriteRequest):
     try:
         log_api("write", "START", f"topic={request.topic}")
-        refined = await refine_topic(request.topic)
-        content = await generate_content(refined)
-        validation = await validate_content(content, model=request.model)
 
-        return WriteResponse(
-            status="success",
-            input_topic=request.topic,
-            refined_topic=refined,
-            content=content,
-            validation=validation
+        async def compute() -> dict:
+            return (await write_pipeline(request.topic, request.model)).model_dump()
+
+        result, hit = await cached_response(
+            "write", request.topic, request.model, compute, cacheable=_validation_succeeded
+        )
+        return model_response(
+            WriteResponse(**{**result, "input_topic": request.topic}),
+            headers={"X-Cache": "HIT" if hit else "MISS"}
         )
     except Exception as e:
         log_api("write", "ERROR", str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+# ─────────────── /api/write/batch ───────────────
+@router.post("/batch", response_model=BatchWriteResponse)
+async def write_articles_batch(request: BatchWriteRequest):
+    """
+    여러 topic을 동시에 처리 (동시 실행 수는 settings.WRITE_BATCH_CONCURRENCY로 제한)
+    결과는 입력 순서대로 반환되며, 실패한 topic은 error 항목으로 표시
+    """
+    if len(request.topics) > settings.WRITE_BATCH_MAX_TOPICS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"topics는 최대 {settings.WRITE_BATCH_MAX_TOPICS}개까지 가능합니다."
+        )
+
+    log_api("write/batch", "START", f"topics={len(request.topics)}")
+    semaphore = asyncio.Semaphore(settings.WRITE_BATCH_CONCURRENCY)
+
+    async def run(topic: str) -> WriteResponse:
+        async with semaphore:
+            return await write_pipeline(topic, request.model)
+
+    outcomes = await asyncio.gather(*(run(topic) for topic in request.topics), return_exceptions=True)
+
+    results = []
+    for topic, outcome in zip(request.topics, outcomes):
+        if isinstance(outcome, BaseException):
+            log_api("write/batch", "ERROR", f"topic={topic} {outcome}")
+            results.append(BatchWriteError(status="error", input_topic=topic, detail=str(outcome)))
+        else:
+            results.append(outcome)
+
+    return model_response(BatchWriteResponse(status="success", results=results))
+
+# ─────────────── /api/write/stream ───────────────
+@router.post("/stream")
+async def write_article_stream(request: WriteRequest):
+    """
+    write 파이프라인을 단계별 Server-Sent Events로 전송
+
+    이벤트 순서:
+        refined    - {"refined_topic": ...} (정제 직후, 생성 시작 전)
+        (기본)     - 생성되는 콘텐츠 조각 (data는 JSON 문자열)
+        validation - validate_content 결과
+        done       - 완료
+    실패 시 'error' 이벤트({"detail": ...})로 종료
+    """
+    log_api("write/stream", "START", f"topic={request.topic}")
+
+    async def events():
+        try:
+            try:
+                refined = await refine_topic(request.topic)
+            except Exception as e:
+                log_api("write/stream", "REFINE_FAIL", str(e))
+                refined = request.topic
+            yield b"event: refined\ndata: " + dumps({"refined_topic": refined}) + b"\n\n"
+
+            parts = []
+            async for text in generate_content_stream(refined, refine=False):
+                parts.append(text)
+                yield b"data: " + dumps(text) + b"\n\n"
+
+            validation = await validate_content("".join(parts), model=request.model)
+            yield b"event: validation\ndata: " + dumps(validation) + b"\n\n"
+            yield b"event: done\ndata: {}\n\n"
+        except Exception as e:
+            log_api("write/stream", "ERROR", str(e))
+            yield b"event: error\ndata: " + dumps({"detail": str(e)}) + b"\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 # ─────────────── /api/write/refine ───────────────
 @router.post("/refine", response_model=RefineResponse)
 async def refine_topic_endpoint(request: RefineRequest):
     try:
         log_api("refine", "START", f"topic={request.topic}")
-        refined = await refine_topic(request.topic)
 
-        return RefineResponse(
+        async def compute() -> dict:
+            return {"refined_topic": await refine_topic(request.topic)}
+
+        result, hit = await cached_response("refine", request.topic, None, compute)
+
+        return model_response(RefineResponse(
             status="success",
             input_topic=request.topic,
-            refined_topic=refined
-        )
+            refined_topic=result["refined_topic"]
+        ), headers={"X-Cache": "HIT" if hit else "MISS"})
     except Exception as e:
         log_api("refine", "ERROR", str(e))
         raise HTTPException(status_code=500, detail=str(e))
@@ -99,10 +276,10 @@ async def validate_content_endpoint(request: ValidateRequest):
         log_api("validate", "START", f"content_length={len(request.content)}")
         validation = await validate_content(request.content, model=request.model)
 
-        return ValidateResponse(
+        return model_response(ValidateResponse(
             status="success",
             validation=validation
-        )
+        ))
     except Exception as e:
         log_api("validate", "ERROR", str(e))
         raise HTTPException(status_code=500, detail=str(e))
@@ -114,26 +291,30 @@ async def fix_content_endpoint(request: FixRequest):
         log_api("fix", "START", f"content_length={len(request.content)}")
         result = await fix_content(
             request.content,
-            request.validation_report,
+            # 요청에 없던 필드는 기본값으로 채우지 않음 (Fixer의 누락 필드 기본값 유지)
+            request.validation_report.model_dump(exclude_unset=True),
             metadata=request.metadata
         )
 
-        return FixResponse(
-            status="success",
-            fixed_content=result["fixed_content"],
-            fix_summary=result["fix_summary"],
-            added_FAQ=result["added_FAQ"],
-            keyword_density=result["keyword_density"]
-        )
+        return model_response(FixResponse(status="success", **result))
     except Exception as e:
         log_api("fix", "ERROR", str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 # ─────────────── /api/write/health ───────────────
+# 고정 부분은 미리 직렬화하고 timestamp만 초 단위로 갱신 (LB 프로브 고빈도 호출 대비)
+_HEALTH_HEAD = b'{"status":"healthy","service":"Writer API","timestamp":"'
+_HEALTH_TAIL = b'"}'
+
+
+@lru_cache(maxsize=1)
+def _health_timestamp(second: int) -> bytes:
+    return datetime.datetime.fromtimestamp(second).isoformat().encode()
+
+
 @router.get("/health")
 async def health_check():
-    return {
-        "status": "healthy",
-        "service": "Writer API",
-        "timestamp": datetime.datetime.now().isoformat()
-    }
+    return Response(
+        content=_HEALTH_HEAD + _health_timestamp(int(time.time())) + _HEALTH_TAIL,
+        media_type="application/json"
+    )
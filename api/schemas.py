@@ -0,0 +1,73 @@
+# api/schemas.py
+"""Writer API 요청/응답 모델"""
+from typing import Annotated
+from pydantic import BaseModel, ConfigDict, Field
+
+# 요청 길이 제한 (빈 값/초대형 본문은 LLM 호출 전에 422로 거절)
+MAX_TOPIC_LENGTH = 500
+MAX_CONTENT_LENGTH = 50_000
+
+Topic = Annotated[str, Field(min_length=1, max_length=MAX_TOPIC_LENGTH)]
+Content = Annotated[str, Field(min_length=1, max_length=MAX_CONTENT_LENGTH)]
+
+class ValidationReport(BaseModel):
+    """Validator 결과 (scores, issues, suggestions 등 나머지 필드는 그대로 유지)"""
+    model_config = ConfigDict(extra="allow")
+
+    grammar_score: int | float = 0
+    human_score: int | float = 0
+    seo_score: int | float = 0
+    has_faq: bool = False
+    error: str | None = None
+
+class WriteRequest(BaseModel):
+    topic: Topic
+    model: str | None = None
+
+class WriteResponse(BaseModel):
+    status: str
+    input_topic: str
+    refined_topic: str
+    content: str
+    validation: ValidationReport
+
+class BatchWriteRequest(BaseModel):
+    topics: list[Topic] = Field(..., min_length=1)
+    model: str | None = None
+
+class BatchWriteError(BaseModel):
+    status: str
+    input_topic: str
+    detail: str
+
+class BatchWriteResponse(BaseModel):
+    status: str
+    results: list[WriteResponse | BatchWriteError]
+
+class RefineRequest(BaseModel):
+    topic: Topic
+
+class RefineResponse(BaseModel):
+    status: str
+    input_topic: str
+    refined_topic: str
+
+class ValidateRequest(BaseModel):
+    content: Content
+    model: str | None = None
+
+class ValidateResponse(BaseModel):
+    status: str
+    validation: ValidationReport
+
+class FixRequest(BaseModel):
+    content: Content
+    validation_report: ValidationReport
+    metadata: dict | None = None
+
+class FixResponse(BaseModel):
+    status: str
+    fixed_content: str
+    fix_summary: list[str]
+    added_FAQ: bool
+    keyword_density: float
@@ -0,0 +1,52 @@
+# potensia_ai/core/clients.py
+"""
+Process-wide OpenAI and Anthropic SDK clients.
+
+Every tool module gets its SDK client from here, so all calls share one
+client per provider on the shared HTTP connection pool instead of each
+module opening its own pool and TLS sessions.
+
+SDK-level retries are disabled (``max_retries=0``): callers run their own
+retry loops and the circuit breaker must see every failed attempt.
+Callers that want SDK retries opt in with ``.with_options(max_retries=...)``.
+"""
+
+from typing import Optional
+
+import httpx
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from core.config import settings
+from ai_clients.http_pool import get_shared_http_client
+
+
+_openai: Optional[AsyncOpenAI] = None
+_openai_http: Optional[httpx.AsyncClient] = None
+_anthropic: Optional[AsyncAnthropic] = None
+_anthropic_http: Optional[httpx.AsyncClient] = None
+
+
+def get_openai() -> AsyncOpenAI:
+    """
+    Get the shared OpenAI client, creating it on first use.
+
+    The client is rebuilt if the shared HTTP pool has been closed and
+    recreated (e.g. after application shutdown in tests).
+    """
+    global _openai, _openai_http
+    http_client = get_shared_http_client()
+    if _openai is None or _openai_http is not http_client:
+        _openai = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client, max_retries=0)
+        _openai_http = http_client
+    return _openai
+
+
+def get_anthropic() -> AsyncAnthropic:
+    """Get the shared Anthropic client, creating it on first use"""
+    global _anthropic, _anthropic_http
+    http_client = get_shared_http_client()
+    if _anthropic is None or _anthropic_http is not http_client:
+        _anthropic = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY, http_client=http_client, max_retries=0)
+        _anthropic_http = http_client
+    return _anthropic
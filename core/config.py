@@ -1,15 +1,23 @@
 # potensia_ai/core/config.py
+import logging
 import os
-from pydantic_settings import BaseSettings
-from dotenv import load_dotenv  # ✅ 추가
-
-# ✅ .env 강제 로드 (경로를 명시적으로 지정)
-env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
-env_path = os.path.abspath(env_path)
-if os.path.exists(env_path):
-    load_dotenv(env_path)
+from functools import lru_cache
+from pathlib import Path
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# ✅ 프로젝트 루트의 .env (실행 위치와 무관하게 Settings가 직접 읽음)
+env_path = Path(__file__).resolve().parent.parent / ".env"
+
+if os.getenv("POTENSIA_SKIP_DOTENV") == "1":
+    # 배포 환경: 환경 변수가 이미 설정되어 있으므로 .env 파일을 찾거나 파싱하지 않음
+    _env_files = ()
 else:
-    print(f"⚠️  .env 파일을 찾을 수 없습니다: {env_path}")
+    if not env_path.is_file():
+        logging.getLogger(__name__).debug(".env 파일을 찾을 수 없습니다: %s", env_path)
+
+    # 실행 위치의 .env → 프로젝트 루트 .env 순서 (뒤쪽이 우선)
+    # 루트에서 실행하면 같은 파일이므로 한 번만 파싱
+    _env_files = tuple(dict.fromkeys((Path(".env").resolve(), env_path)))
 
 class Settings(BaseSettings):
     APP_NAME: str = "PotensiaAI"
@@ -24,32 +32,122 @@ class Settings(BaseSettings):
     # Model Configuration
     MODEL_PRIMARY: str = "gpt-4o-mini"
     MODEL_FALLBACK: str = "claude-3-5-sonnet-20241022"
-    MODEL_SEQUENCE: str = "GPT,GPT,GPT,Claude"  # Comma-separated list for generator retry sequence
+    MODEL_SEQUENCE: str = "GPT,Claude"  # Generator fallback order (per-model retries use MAX_RETRIES in the SDK)
+    HEDGE_ENABLED: bool = False   # Start the fallback model if the primary is still running after HEDGE_DELAY_S
+    HEDGE_DELAY_S: float = 10.0
+    GENERATOR_REPLAY_CACHE: bool = False  # Reuse generated content for identical prompts (replay cache, also at temperature > 0)
+    GENERATOR_REPLAY_CACHE_TTL: int = 604_800  # 7 days
 
     # Retry Configuration
     MAX_RETRIES: int = 3
+    BREAKER_FAIL_MAX: int = 5          # Consecutive provider failures that open the circuit breaker
+    BREAKER_RESET_TIMEOUT: float = 30.0  # Seconds before a probe call is allowed again
     BACKOFF_MIN: int = 1  # seconds
     BACKOFF_MAX: int = 8  # seconds
 
+    # Rate Limiting (per provider, 0 = unlimited)
+    MAX_CONCURRENCY: int = 50  # In-flight API calls
+    RPM_LIMIT: int = 0         # Requests per minute
+    TPM_LIMIT: int = 0         # Tokens per minute
+
+    # Batch Configuration
+    BATCH_MAX_CONCURRENCY: int = 10  # Parallel complete() calls in complete_batch
+    BATCH_POLL_MIN: int = 5          # seconds between batch status polls (initial)
+    BATCH_POLL_MAX: int = 300        # seconds between batch status polls (cap)
+    WRITE_BATCH_MAX_TOPICS: int = 50     # Topics accepted by /api/write/batch
+    WRITE_BATCH_CONCURRENCY: int = 5     # Topic pipelines run at once (each makes ~3 LLM calls)
+
     # API Timeout Configuration (seconds)
     OPENAI_TIMEOUT: int = 60
     ANTHROPIC_TIMEOUT: int = 60
 
+    # Shared HTTP Connection Pool
+    HTTP_MAX_CONNECTIONS: int = 2000
+    HTTP_MAX_KEEPALIVE: int = 1500
+    HTTP_TIMEOUT: int = 120  # seconds (read timeout; long completions)
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_WRITE_TIMEOUT: float = 10.0
+    HTTP_POOL_TIMEOUT: float = 5.0      # Fail fast when the pool is exhausted instead of hanging
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept
+    HTTP2_ENABLED: bool = True  # Used only when the h2 package is installed
+
     # Model-specific Parameters
     DEFAULT_TEMPERATURE: float = 0.7
     DEFAULT_MAX_TOKENS: int = 2000
 
+    # Prompt Caching (Anthropic requires >= 1024 tokens, roughly 4000 chars)
+    PROMPT_CACHE_MIN_CHARS: int = 4000
+
+    # Response Cache Configuration
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL: int = 3600            # seconds
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_SIMILARITY: float = 0.92   # cosine similarity for semantic hits
+    LLM_CACHE_REDIS_URL: str | None = None  # Use Redis instead of in-memory LRU
+    PREFIX_CACHE_TOKEN_BUDGET: int = 200_000  # Cached tokens for message-prefix formatting
+
+    # Keyword Analyzer Caches
+    KEYWORD_CACHE_MAX_ENTRIES: int = 4096  # Exact-match topics kept in memory
+    SEMANTIC_CACHE_ENABLED: bool = False   # Reuse results for near-duplicate topics
+    KW_BATCH_ENABLED: bool = False         # Coalesce concurrent topics into one API call
+    KW_BATCH_MAX_SIZE: int = 8             # Topics per batched call
+    KW_BATCH_WINDOW_MS: int = 50           # Max wait to fill a batch
+    KW_BATCH_MAX_OUTPUT_TOKENS: int = 8192  # Output-token cap per batched call (<= model's output limit)
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+
+    # Writer Response Caches (Redis via LLM_CACHE_REDIS_URL persists across restarts)
+    REFINER_CACHE_TTL: int = 86_400        # 1 day
+    VALIDATOR_CACHE_TTL: int = 604_800     # 7 days
+    REFINER_SEMANTIC_CACHE: bool = False  # Reuse refinements for paraphrased topics (LLM_CACHE_SIMILARITY)
+    REFINER_BATCH_ENABLED: bool = False   # Coalesce concurrent topics into one refinement call
+    REFINER_BATCH_MAX_SIZE: int = 16      # Topics per batched call
+    REFINER_BATCH_WINDOW_MS: int = 20     # Max wait to fill a batch
+    VALIDATOR_BATCH_ENABLED: bool = False  # Coalesce concurrent validations into one call (default model only)
+    VALIDATOR_BATCH_MAX_SIZE: int = 4      # Articles per batched call
+    VALIDATOR_BATCH_WINDOW_MS: int = 20    # Max wait to fill a batch
+    API_CACHE_ENABLED: bool = True        # Reuse /api/write and /api/write/refine responses (X-Cache header)
+    API_CACHE_TTL: int = 3600             # 1 hour
+    API_SEMANTIC_CACHE: bool = False      # Also reuse responses for paraphrased topics (LLM_CACHE_SIMILARITY)
+
+    # Thumbnail Cache (OpenAI image URLs expire after ~1 hour)
+    THUMBNAIL_CACHE_ENABLED: bool = True
+    THUMBNAIL_CACHE_TTL: int = 2_592_000   # 30 days, used when images are stored locally
+    THUMBNAIL_URL_TTL: int = 3000          # Cap for caching raw OpenAI URLs
+    THUMBNAIL_STORAGE_DIR: str = ""        # Download images here (empty string to disable)
+    THUMBNAIL_PUBLIC_URL: str = ""         # Base URL under which THUMBNAIL_STORAGE_DIR is served
+
+    # CORS (empty = any origin without credentials, for local development)
+    CORS_ORIGINS: tuple[str, ...] = ()     # e.g. CORS_ORIGINS='["https://app.example.com"]'
+
     # Logging Configuration
     LOG_LEVEL: str = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
     LOG_DIR: str = "logs"    # Directory for log files (empty string to disable file logging)
     LOG_JSON: bool = False   # Use JSON format for logs (useful for production log aggregation)
+    LOG_ASYNC: bool = True   # Write log records from a background thread (QueueHandler/QueueListener)
+
+    model_config = SettingsConfigDict(
+        env_file=_env_files,
+        env_file_encoding="utf-8",
+        extra="ignore",  # Allow extra fields in .env
+    )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Settings 싱글톤 (.env 파싱과 필드 검증은 프로세스당 한 번)
+
+    FastAPI 의존성으로도 사용 가능: settings: Settings = Depends(get_settings)
+    """
+    return Settings()
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        extra = "ignore"  # Allow extra fields in .env
 
-settings = Settings()
+def __getattr__(name: str):
+    """`settings`는 처음 접근할 때 생성 (Settings/get_settings만 쓰는 import는 .env를 읽지 않음)"""
+    if name == "settings":
+        globals()["settings"] = get_settings()
+        return globals()["settings"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
-    print(f"OPENAI_API_KEY={settings.OPENAI_API_KEY}")
+    print(f"OPENAI_API_KEY={get_settings().OPENAI_API_KEY}")
@@ -1,23 +1,29 @@
 # potensia_ai/core/database.py
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from potensia_ai.core.config import settings
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from core.config import settings
 
 Base = declarative_base()
 
+# One engine per process: bounded pool, stale connections replaced before use
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     future=True,
+    pool_size=20,
+    max_overflow=10,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    query_cache_size=1200,
 )
 
-async_session = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
+async_session = async_sessionmaker(
+    engine,
     expire_on_commit=False,
+    autoflush=False,
 )
 
-# Dependency for FastAPI
+# Dependency for FastAPI (commits once when the request finishes, rolls back on error)
 async def get_db():
-    async with async_session() as session:
+    async with async_session() as session, session.begin():
         yield session
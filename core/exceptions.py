@@ -6,7 +6,7 @@ Provides structured exception hierarchy for better error handling
 and consistent error responses across the application.
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, ClassVar
 from fastapi import HTTPException, status
 
 
@@ -15,8 +15,12 @@ class PotensiaAIError(Exception):
     Base exception class for all PotensiaAI errors.
 
     All custom exceptions should inherit from this class.
+    ``http_status`` is the HTTP status code the exception maps to;
+    subclasses that don't set it inherit it from their base class.
     """
 
+    http_status: ClassVar[int] = status.HTTP_500_INTERNAL_SERVER_ERROR
+
     def __init__(
         self,
         message: str,
@@ -57,25 +61,29 @@ class APIError(PotensiaAIError):
 class ValidationError(APIError):
     """Input validation error (HTTP 400)"""
 
+    http_status = status.HTTP_400_BAD_REQUEST
+
     def __init__(self, message: str, field: Optional[str] = None, **kwargs):
-        details = {"field": field} if field else {}
-        details.update(kwargs)
+        details = {"field": field, **kwargs} if field else kwargs
         super().__init__(message, "VALIDATION_ERROR", details)
 
 
 class ResourceNotFoundError(APIError):
     """Resource not found error (HTTP 404)"""
 
+    http_status = status.HTTP_404_NOT_FOUND
+
     def __init__(self, resource_type: str, resource_id: str, **kwargs):
         message = f"{resource_type} not found: {resource_id}"
-        details = {"resource_type": resource_type, "resource_id": resource_id}
-        details.update(kwargs)
+        details = {"resource_type": resource_type, "resource_id": resource_id, **kwargs}
         super().__init__(message, "RESOURCE_NOT_FOUND", details)
 
 
 class AuthenticationError(APIError):
     """Authentication error (HTTP 401)"""
 
+    http_status = status.HTTP_401_UNAUTHORIZED
+
     def __init__(self, message: str = "Authentication failed", **kwargs):
         super().__init__(message, "AUTHENTICATION_ERROR", kwargs)
 
@@ -83,6 +91,8 @@ class AuthenticationError(APIError):
 class AuthorizationError(APIError):
     """Authorization error (HTTP 403)"""
 
+    http_status = status.HTTP_403_FORBIDDEN
+
     def __init__(self, message: str = "Access denied", **kwargs):
         super().__init__(message, "AUTHORIZATION_ERROR", kwargs)
 
@@ -90,9 +100,10 @@ class AuthorizationError(APIError):
 class RateLimitExceeded(APIError):
     """Rate limit exceeded error (HTTP 429)"""
 
+    http_status = status.HTTP_429_TOO_MANY_REQUESTS
+
     def __init__(self, message: str = "Rate limit exceeded", retry_after: Optional[int] = None, **kwargs):
-        details = {"retry_after": retry_after} if retry_after else {}
-        details.update(kwargs)
+        details = {"retry_after": retry_after, **kwargs} if retry_after else kwargs
         super().__init__(message, "RATE_LIMIT_EXCEEDED", details)
 
 
@@ -102,7 +113,8 @@ class RateLimitExceeded(APIError):
 
 class AIProviderError(PotensiaAIError):
     """Base class for AI provider errors"""
-    pass
+
+    http_status = status.HTTP_503_SERVICE_UNAVAILABLE
 
 
 class OpenAIError(AIProviderError):
@@ -129,20 +141,22 @@ class GeminiError(AIProviderError):
 class AITimeoutError(AIProviderError):
     """AI API timeout error"""
 
+    http_status = status.HTTP_504_GATEWAY_TIMEOUT
+
     def __init__(self, provider: str, timeout: int, **kwargs):
         message = f"{provider} API timeout after {timeout}s"
-        details = {"provider": provider, "timeout": timeout}
-        details.update(kwargs)
+        details = {"provider": provider, "timeout": timeout, **kwargs}
         super().__init__(message, "AI_TIMEOUT", details)
 
 
 class AIQuotaExceeded(AIProviderError):
     """AI API quota exceeded"""
 
+    http_status = status.HTTP_503_SERVICE_UNAVAILABLE
+
     def __init__(self, provider: str, **kwargs):
         message = f"{provider} API quota exceeded"
-        details = {"provider": provider}
-        details.update(kwargs)
+        details = {"provider": provider, **kwargs}
         super().__init__(message, "AI_QUOTA_EXCEEDED", details)
 
 
@@ -162,8 +176,7 @@ class TopicRefinementError(ContentGenerationError):
         message = f"Failed to refine topic: {topic}"
         if reason:
             message += f" - {reason}"
-        details = {"topic": topic, "reason": reason}
-        details.update(kwargs)
+        details = {"topic": topic, "reason": reason, **kwargs}
         super().__init__(message, "TOPIC_REFINEMENT_ERROR", details)
 
 
@@ -172,8 +185,7 @@ class ContentValidationError(ContentGenerationError):
 
     def __init__(self, issues: list, **kwargs):
         message = f"Content validation failed: {len(issues)} issues found"
-        details = {"issues": issues}
-        details.update(kwargs)
+        details = {"issues": issues, **kwargs}
         super().__init__(message, "CONTENT_VALIDATION_ERROR", details)
 
 
@@ -184,8 +196,7 @@ class KeywordExtractionError(ContentGenerationError):
         message = f"Failed to extract keywords for: {topic}"
         if reason:
             message += f" - {reason}"
-        details = {"topic": topic, "reason": reason}
-        details.update(kwargs)
+        details = {"topic": topic, "reason": reason, **kwargs}
         super().__init__(message, "KEYWORD_EXTRACTION_ERROR", details)
 
 
@@ -196,8 +207,7 @@ class ImageGenerationError(ContentGenerationError):
         message = f"Failed to generate image"
         if reason:
             message += f": {reason}"
-        details = {"prompt": prompt[:100], "reason": reason}
-        details.update(kwargs)
+        details = {"prompt": prompt[:100], "reason": reason, **kwargs}
         super().__init__(message, "IMAGE_GENERATION_ERROR", details)
 
 
@@ -207,53 +217,36 @@ class ImageGenerationError(ContentGenerationError):
 
 class SecurityError(PotensiaAIError):
     """Base class for security-related errors"""
-    pass
+
+    http_status = status.HTTP_403_FORBIDDEN
 
 
 class PromptInjectionDetected(SecurityError):
     """Prompt injection attack detected"""
 
+    http_status = status.HTTP_400_BAD_REQUEST
+
     def __init__(self, input_text: str, **kwargs):
         message = "Potential prompt injection detected"
-        details = {"input_preview": input_text[:100]}
-        details.update(kwargs)
+        details = {"input_preview": input_text[:100], **kwargs}
         super().__init__(message, "PROMPT_INJECTION_DETECTED", details)
 
 
 class MaliciousContentDetected(SecurityError):
     """Malicious content detected"""
 
+    http_status = status.HTTP_400_BAD_REQUEST
+
     def __init__(self, content_type: str, **kwargs):
         message = f"Malicious content detected: {content_type}"
-        details = {"content_type": content_type}
-        details.update(kwargs)
+        details = {"content_type": content_type, **kwargs}
         super().__init__(message, "MALICIOUS_CONTENT", details)
 
 
 # ============================================================
-# Exception to HTTP Status Mapping
+# Exception to HTTP Exception
 # ============================================================
 
-EXCEPTION_STATUS_MAP = {
-    ValidationError: status.HTTP_400_BAD_REQUEST,
-    ResourceNotFoundError: status.HTTP_404_NOT_FOUND,
-    AuthenticationError: status.HTTP_401_UNAUTHORIZED,
-    AuthorizationError: status.HTTP_403_FORBIDDEN,
-    RateLimitExceeded: status.HTTP_429_TOO_MANY_REQUESTS,
-    AITimeoutError: status.HTTP_504_GATEWAY_TIMEOUT,
-    AIQuotaExceeded: status.HTTP_503_SERVICE_UNAVAILABLE,
-    PromptInjectionDetected: status.HTTP_400_BAD_REQUEST,
-    MaliciousContentDetected: status.HTTP_400_BAD_REQUEST,
-
-    # Default mappings
-    ContentGenerationError: status.HTTP_500_INTERNAL_SERVER_ERROR,
-    AIProviderError: status.HTTP_503_SERVICE_UNAVAILABLE,
-    SecurityError: status.HTTP_403_FORBIDDEN,
-    APIError: status.HTTP_500_INTERNAL_SERVER_ERROR,
-    PotensiaAIError: status.HTTP_500_INTERNAL_SERVER_ERROR,
-}
-
-
 def exception_to_http_exception(exc: PotensiaAIError) -> HTTPException:
     """
     Convert custom exception to FastAPI HTTPException.
@@ -264,13 +257,8 @@ def exception_to_http_exception(exc: PotensiaAIError) -> HTTPException:
     Returns:
         HTTPException with appropriate status code and details
     """
-    status_code = EXCEPTION_STATUS_MAP.get(
-        type(exc),
-        status.HTTP_500_INTERNAL_SERVER_ERROR
-    )
-
     return HTTPException(
-        status_code=status_code,
+        status_code=exc.http_status,
         detail=exc.to_dict()
     )
 
@@ -8,18 +8,46 @@ Provides structured logging with:
 - File and console output
 - JSON formatting for production environments
 - Token usage tracking
+- Queue-based handlers so log I/O runs on a background thread (LOG_ASYNC)
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
+import re
 import sys
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, Any
 import json
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 from core.config import settings
 
 
+# (second, "YYYY-MM-DD HH:MM:SS", "YYYY-MM-DDTHH:MM:SS") of the last formatted
+# record; records within the same second reuse the strings instead of
+# formatting them again
+_last_timestamp = (None, '', '')
+
+
+def _second_timestamp(second: int) -> tuple:
+    """Local time of ``second`` as (structured, ISO 8601) strings, cached per second"""
+    global _last_timestamp
+    cached = _last_timestamp
+    if second != cached[0]:
+        structured = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+        cached = _last_timestamp = (second, structured, structured.replace(' ', 'T'))
+    return cached[1:]
+
+
 class StructuredFormatter(logging.Formatter):
     """
     Custom formatter that outputs structured logs with consistent format.
@@ -28,43 +56,64 @@ class StructuredFormatter(logging.Formatter):
     Example: [2025-01-09 10:30:45] [INFO] [writer.generator] Content generation started
     """
 
-    def format(self, record: logging.LogRecord) -> str:
-        # Create timestamp
-        timestamp = datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S')
+    EXTRA_KEYS = ('topic', 'tokens', 'model_name', 'cost', 'duration', 'component', 'ttft_ms',
+                  'tokens_per_sec', 'cache_hit_rate', 'rpm_remaining', 'tpm_remaining')
 
-        # Extract module name (e.g., "writer.generator" from "ai_tools.writer.generator")
-        module_parts = record.name.split('.')
-        if len(module_parts) > 2:
-            module_name = '.'.join(module_parts[-2:])
-        else:
-            module_name = record.name
+    # Shortened module names keyed by logger name
+    _module_names: Dict[str, str] = {}
+
+    @classmethod
+    def _module_name(cls, name: str) -> str:
+        module_name = cls._module_names.get(name)
+        if module_name is None:
+            # Extract module name (e.g., "writer.generator" from "ai_tools.writer.generator")
+            module_name = '.'.join(name.rsplit('.', 2)[-2:])
+            cls._module_names[name] = module_name
+        return module_name
 
-        # Build structured message
-        level = record.levelname
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = _second_timestamp(int(record.created))[0]
+        module_name = self._module_name(record.name)
         message = record.getMessage()
 
         # Add extra fields if present
-        extra_fields = {}
-        for key in ['topic', 'tokens', 'model_name', 'cost', 'duration', 'component']:
-            if hasattr(record, key):
-                extra_fields[key] = getattr(record, key)
-
-        if extra_fields:
-            extra_str = ' | ' + ' | '.join(f"{k}={v}" for k, v in extra_fields.items())
+        d = record.__dict__
+        extra = [k for k in self.EXTRA_KEYS if k in d]
+        if extra:
+            parts = []
+            for k in extra:
+                v = d[k]
+                # Raw float costs are formatted only when a record is actually emitted
+                if k == 'cost' and isinstance(v, float):
+                    v = f"${v:.6f}"
+                parts.append(f"{k}={v}")
+            extra_str = ' | ' + ' | '.join(parts)
         else:
             extra_str = ''
 
-        return f"[{timestamp}] [{level:8}] [{module_name}] {message}{extra_str}"
+        return f"[{timestamp}] [{record.levelname:8}] [{module_name}] {message}{extra_str}"
 
 
 class JSONFormatter(logging.Formatter):
     """
     JSON formatter for production environments and log aggregation systems.
+
+    Encodes with ``orjson`` when it is installed, otherwise ``json``.
     """
 
+    @staticmethod
+    def _timestamp(created: float) -> str:
+        """Same string as datetime.fromtimestamp(created).isoformat()"""
+        second = int(created)
+        microsecond = round((created - second) * 1e6)
+        if not 0 < microsecond < 1_000_000:
+            # Whole second, or rounded up into the next one
+            return datetime.fromtimestamp(created).isoformat()
+        return '%s.%06d' % (_second_timestamp(second)[1], microsecond)
+
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'timestamp': self._timestamp(record.created),
             'level': record.levelname,
             'module': record.name,
             'message': record.getMessage(),
@@ -73,7 +122,8 @@ class JSONFormatter(logging.Formatter):
         }
 
         # Add extra fields
-        for key in ['topic', 'tokens', 'model_name', 'cost', 'duration', 'component', 'user_id', 'request_id']:
+        for key in ['topic', 'tokens', 'model_name', 'cost', 'duration', 'component', 'user_id', 'request_id',
+                    'ttft_ms', 'tokens_per_sec', 'cache_hit_rate', 'rpm_remaining', 'tpm_remaining']:
             if hasattr(record, key):
                 log_data[key] = getattr(record, key)
 
@@ -81,14 +131,31 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
 
+        if orjson is not None:
+            return orjson.dumps(log_data).decode('utf-8')
         return json.dumps(log_data, ensure_ascii=False)
 
 
+# Background listeners for queue-based loggers, keyed by logger name
+_listeners: Dict[str, logging.handlers.QueueListener] = {}
+
+
+def _stop_listeners() -> None:
+    """Flush pending records and stop the background listeners"""
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
+
+atexit.register(_stop_listeners)
+
+
 def setup_logger(
     name: str,
     level: Optional[str] = None,
     log_file: Optional[str] = None,
-    use_json: bool = False
+    use_json: bool = False,
+    use_queue: Optional[bool] = None
 ) -> logging.Logger:
     """
     Set up a logger with consistent configuration.
@@ -99,6 +166,10 @@ def setup_logger(
                If None, uses settings.LOG_LEVEL
         log_file: Optional file path for file logging
         use_json: If True, use JSON formatter instead of structured text
+        use_queue: If True, the logger only enqueues records and a background
+                   thread writes them to the console/file handlers, so logging
+                   never blocks the event loop on I/O.
+                   If None, uses settings.LOG_ASYNC
 
     Returns:
         Configured logger instance
@@ -113,8 +184,12 @@ def setup_logger(
     log_level = level or getattr(settings, 'LOG_LEVEL', 'INFO')
     logger.setLevel(getattr(logging, log_level.upper()))
 
-    # Remove existing handlers to avoid duplicates
+    # Remove existing handlers (and their listener) to avoid duplicates
     logger.handlers.clear()
+    previous = _listeners.pop(name, None)
+    if previous is not None:
+        previous.stop()
+    handlers = []
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
@@ -125,7 +200,7 @@ def setup_logger(
     else:
         console_handler.setFormatter(StructuredFormatter())
 
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
 
     # File handler (optional)
     if log_file:
@@ -140,7 +215,17 @@ def setup_logger(
         else:
             file_handler.setFormatter(StructuredFormatter())
 
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if use_queue if use_queue is not None else getattr(settings, 'LOG_ASYNC', False):
+        record_queue: queue.SimpleQueue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(record_queue))
+        listener = logging.handlers.QueueListener(record_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners[name] = listener
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
 
     # Prevent propagation to root logger
     logger.propagate = False
@@ -148,6 +233,11 @@ def setup_logger(
     return logger
 
 
+# Loggers returned by get_logger, so repeat calls are a single dict lookup
+_loggers: Dict[str, logging.Logger] = {}
+_loggers_lock = threading.Lock()
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get or create a logger with standard configuration.
@@ -163,26 +253,38 @@ def get_logger(name: str) -> logging.Logger:
         >>> logger = get_logger("writer.generator")
         >>> logger.info("Starting content generation")
     """
-    # Check if logger already exists and is configured
-    logger = logging.getLogger(name)
-
-    if not logger.handlers:
-        # Configure with default settings
-        log_level = getattr(settings, 'LOG_LEVEL', 'INFO')
-        log_dir = getattr(settings, 'LOG_DIR', 'logs')
-        use_json = getattr(settings, 'LOG_JSON', False)
-
-        # Create log file path
-        log_file = None
-        if log_dir:
-            log_file = f"{log_dir}/potensia_ai.log"
-
-        logger = setup_logger(
-            name=name,
-            level=log_level,
-            log_file=log_file,
-            use_json=use_json
-        )
+    # Fast path: already configured by get_logger
+    logger = _loggers.get(name)
+    if logger is not None:
+        return logger
+
+    with _loggers_lock:
+        logger = _loggers.get(name)
+        if logger is not None:
+            return logger
+
+        # Check if logger already exists and is configured
+        logger = logging.getLogger(name)
+
+        if not logger.handlers:
+            # Configure with default settings
+            log_level = getattr(settings, 'LOG_LEVEL', 'INFO')
+            log_dir = getattr(settings, 'LOG_DIR', 'logs')
+            use_json = getattr(settings, 'LOG_JSON', False)
+
+            # Create log file path
+            log_file = None
+            if log_dir:
+                log_file = f"{log_dir}/potensia_ai.log"
+
+            logger = setup_logger(
+                name=name,
+                level=log_level,
+                log_file=log_file,
+                use_json=use_json
+            )
+
+        _loggers[name] = logger
 
     return logger
 
@@ -217,13 +319,27 @@ class TokenUsageLogger:
             'dall-e-2': {'256': 0.016, '512': 0.018, '1024': 0.020},
         }
 
+        # Text model keys, longest first so "gpt-4o-mini" wins over "gpt-4o"
+        text_keys = sorted((key for key in self.costs if 'dall-e' not in key), key=len, reverse=True)
+        self._model_pattern = re.compile('|'.join(map(re.escape, text_keys)))
+        self._model_keys: Dict[str, Optional[str]] = {}
+
+        # Image prices keyed by (model, width, quality); DALL-E 2 prices don't depend on quality (None)
+        self._image_costs: Dict[tuple, float] = {}
+        for key, price in self.costs['dall-e-3'].items():
+            quality, width = key.split('_')
+            self._image_costs['dall-e-3', width, quality] = price
+        for width, price in self.costs['dall-e-2'].items():
+            self._image_costs['dall-e-2', width, None] = price
+
     def log_completion(
         self,
         model: str,
         input_tokens: int,
         output_tokens: int,
         topic: Optional[str] = None,
-        component: Optional[str] = None
+        component: Optional[str] = None,
+        cached_tokens: int = 0
     ) -> Dict[str, Any]:
         """
         Log token usage for a completion request.
@@ -234,6 +350,7 @@ class TokenUsageLogger:
             output_tokens: Number of output tokens generated
             topic: Optional topic/task description
             component: Optional component/module name (e.g., "writer.generator")
+            cached_tokens: Input tokens served from the provider prompt cache
 
         Returns:
             Dictionary with usage statistics and cost
@@ -242,27 +359,33 @@ class TokenUsageLogger:
         cost_info = self._calculate_cost(model, input_tokens, output_tokens)
         total_tokens = input_tokens + output_tokens
 
-        # Build log message
-        msg = f"Token usage: {total_tokens:,} total ({input_tokens:,} input + {output_tokens:,} output)"
+        # Records are formatted and written by the queue listener thread
+        # (LOG_ASYNC); only build them when INFO is enabled at all
+        if self.logger.isEnabledFor(logging.INFO):
+            # Build log message
+            msg = f"Token usage: {total_tokens:,} total ({input_tokens:,} input + {output_tokens:,} output)"
 
-        extra = {
-            'model_name': model,
-            'tokens': total_tokens,
-            'cost': f"${cost_info['total_cost']:.6f}"
-        }
+            extra = {
+                'model_name': model,
+                'tokens': total_tokens,
+                'cost': f"${cost_info['total_cost']:.6f}"
+            }
 
-        if topic:
-            extra['topic'] = topic[:50]
-        if component:
-            extra['component'] = component
+            if topic:
+                extra['topic'] = topic[:50]
+            if component:
+                extra['component'] = component
+            if input_tokens:
+                extra['cache_hit_rate'] = round(cached_tokens / input_tokens, 3)
 
-        self.logger.info(msg, extra=extra)
+            self.logger.info(msg, extra=extra)
 
         return {
             'model': model,
             'input_tokens': input_tokens,
             'output_tokens': output_tokens,
             'total_tokens': total_tokens,
+            'cached_tokens': cached_tokens,
             **cost_info
         }
 
@@ -308,17 +431,17 @@ class TokenUsageLogger:
 
     def _calculate_cost(self, model: str, input_tokens: int, output_tokens: int) -> Dict[str, float]:
         """Calculate cost for text completion"""
-        # Normalize model name
-        model_lower = model.lower()
-
-        # Find matching model in cost table
-        model_key = None
-        for key in self.costs.keys():
-            if key in model_lower:
-                model_key = key
-                break
-
-        if not model_key or 'dall-e' in model_key:
+        # Find matching model in cost table (memoized per model name)
+        try:
+            model_key = self._model_keys[model]
+        except KeyError:
+            match = self._model_pattern.search(model.lower())
+            model_key = match.group(0) if match else None
+            # Model names can come from requests; keep the memo small
+            if len(self._model_keys) < 64:
+                self._model_keys[model] = model_key
+
+        if not model_key:
             # Unknown model or image model
             return {'input_cost': 0.0, 'output_cost': 0.0, 'total_cost': 0.0}
 
@@ -335,23 +458,13 @@ class TokenUsageLogger:
     def _calculate_image_cost(self, model: str, size: str, quality: str) -> float:
         """Calculate cost for image generation"""
         model_lower = model.lower()
+        width = size.partition('x')[0]
 
         if 'dall-e-3' in model_lower:
-            # DALL-E 3 pricing
-            size_key = size.replace('x', '_')
-            quality_prefix = f"{quality}_{size.split('x')[0]}"
-
-            if quality_prefix in self.costs['dall-e-3']:
-                return self.costs['dall-e-3'][quality_prefix]
-            elif size.split('x')[0] in self.costs['dall-e-3']:
-                return self.costs['dall-e-3'][size.split('x')[0]]
-            else:
-                return 0.040  # Default standard 1024
-
+            # Default standard 1024
+            return self._image_costs.get(('dall-e-3', width, quality), 0.040)
         elif 'dall-e-2' in model_lower:
-            # DALL-E 2 pricing
-            size_num = size.split('x')[0]
-            return self.costs.get('dall-e-2', {}).get(size_num, 0.020)
+            return self._image_costs.get(('dall-e-2', width, None), 0.020)
 
         return 0.0
 
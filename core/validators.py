@@ -10,8 +10,10 @@ Provides:
 """
 
 import re
+import threading
+from functools import lru_cache
 from typing import Optional, List, Tuple
-from core.exceptions import ValidationError, PromptInjectionDetected
+from core.exceptions import PotensiaAIError, ValidationError, PromptInjectionDetected
 from core.logger import get_logger
 
 logger = get_logger("validators")
@@ -48,8 +50,8 @@ INJECTION_PATTERNS = [
     r"god\s+mode",
     r"sudo\s+",
 
-    # Special tokens/markers
-    r"<\|.*?\|>",
+    # Special tokens/markers (bounded so many "<|" without "|>" scan in linear time)
+    r"<\|.{0,100}?\|>",
     r"\[SYSTEM\]",
     r"\[INST\]",
     r"###\s*(System|User|Assistant)",
@@ -58,6 +60,78 @@ INJECTION_PATTERNS = [
 # Compile patterns for performance
 COMPILED_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in INJECTION_PATTERNS]
 
+# Python's IGNORECASE folds these to "i"; Hyperscan's caseless mode does not,
+# so text containing them is scanned with COMPILED_PATTERNS instead
+_REGEX_ONLY_CHARS = ("İ", "ı")
+
+# All patterns as one case-sensitive alternation over lowercased text.
+# Without IGNORECASE, re can skip ahead to the patterns' possible first
+# characters, so the common no-match case is one fast scan instead of a
+# search per pattern. "ſ" folds to "s" only under IGNORECASE.
+_COMBINED_PATTERN = re.compile("|".join(f"(?:{pattern.lower()})" for pattern in INJECTION_PATTERNS))
+_COMBINED_UNSAFE_CHARS = ("İ", "ı", "ſ")
+
+# Shortest text any pattern can match ("<||>"); shorter input is never scanned
+_MIN_INJECTION_LENGTH = 4
+
+
+def _build_hyperscan_db():
+    """
+    Compile all patterns into one Hyperscan database (one pass over the text).
+
+    Returns None when the optional ``hyperscan`` package is unavailable or
+    cannot compile the patterns; COMPILED_PATTERNS is used instead.
+    """
+    try:
+        import hyperscan
+    except ImportError:
+        return None
+
+    flags = (
+        hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+        | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+    )
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[pattern.encode("utf-8") for pattern in INJECTION_PATTERNS],
+            ids=list(range(len(INJECTION_PATTERNS))),
+            elements=len(INJECTION_PATTERNS),
+            flags=[flags] * len(INJECTION_PATTERNS),
+        )
+    except Exception as e:
+        logger.warning(f"Hyperscan compile failed, using regex scanning: {e}")
+        return None
+    return db
+
+
+_HYPERSCAN_DB = _build_hyperscan_db()
+_scratch = threading.local()
+
+
+def _scan_patterns(text: str) -> List[str]:
+    """Return the injection patterns matching ``text``"""
+    # Substring checks ("in") are much faster than iterating the text per character
+    if _HYPERSCAN_DB is None or any(char in text for char in _REGEX_ONLY_CHARS):
+        if not any(char in text for char in _COMBINED_UNSAFE_CHARS) and not _COMBINED_PATTERN.search(text.lower()):
+            return []
+        # Report every matching pattern, not only the first alternative hit
+        return [pattern.pattern for pattern in COMPILED_PATTERNS if pattern.search(text)]
+
+    # Scratch space is per thread (a scratch cannot be shared by concurrent scans)
+    scratch = getattr(_scratch, "value", None)
+    if scratch is None:
+        import hyperscan
+        scratch = _scratch.value = hyperscan.Scratch(_HYPERSCAN_DB)
+
+    matched_ids = set()
+
+    def on_match(pattern_id, start, end, flags, context):
+        matched_ids.add(pattern_id)
+
+    _HYPERSCAN_DB.scan(text.encode("utf-8"), match_event_handler=on_match, scratch=scratch)
+    return [INJECTION_PATTERNS[i] for i in sorted(matched_ids)]
+
 
 def detect_prompt_injection(text: str, raise_error: bool = True) -> Tuple[bool, List[str]]:
     """
@@ -79,14 +153,10 @@ def detect_prompt_injection(text: str, raise_error: bool = True) -> Tuple[bool,
         >>> detect_prompt_injection("Ignore previous instructions")
         PromptInjectionDetected: Potential prompt injection detected
     """
-    if not text:
+    if not text or len(text) < _MIN_INJECTION_LENGTH:
         return False, []
 
-    matched_patterns = []
-
-    for pattern in COMPILED_PATTERNS:
-        if pattern.search(text):
-            matched_patterns.append(pattern.pattern)
+    matched_patterns = _scan_patterns(text)
 
     if matched_patterns:
         logger.warning(
@@ -112,6 +182,23 @@ def detect_prompt_injection(text: str, raise_error: bool = True) -> Tuple[bool,
 # Input Sanitization
 # ============================================================
 
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1F\x7F]')
+_CONTROL_BYTES = bytes(range(0x20)) + b'\x7f'
+
+# Input longer than this multiple of max_length is rejected before it is
+# stripped and scanned (sanitizing never realistically removes that much)
+_PRECHECK_LENGTH_FACTOR = 2
+
+
+def _too_long(length: int, max_length: int) -> ValidationError:
+    return ValidationError(
+        f"Input too long: {length} characters (max {max_length})",
+        field="text",
+        length=length,
+        max_length=max_length
+    )
+
+
 def sanitize_input(
     text: str,
     max_length: Optional[int] = None,
@@ -140,6 +227,11 @@ def sanitize_input(
     if not text:
         raise ValidationError("Input cannot be empty")
 
+    # Cheap rejection of oversized input before any O(n) work
+    length = len(text)
+    if max_length and length > max_length * _PRECHECK_LENGTH_FACTOR:
+        raise _too_long(length, max_length)
+
     # Strip whitespace
     if strip_whitespace:
         text = text.strip()
@@ -147,19 +239,19 @@ def sanitize_input(
     # Remove control characters
     if remove_control_chars:
         # Remove null bytes and other control characters
-        text = re.sub(r'[\x00-\x1F\x7F]', '', text)
+        # (ASCII text: bytes.translate deletes them ~10x faster than the regex)
+        if text.isascii():
+            text = text.encode('ascii').translate(None, _CONTROL_BYTES).decode('ascii')
+        else:
+            text = _CONTROL_CHARS_RE.sub('', text)
 
     # Check length
-    if max_length and len(text) > max_length:
-        raise ValidationError(
-            f"Input too long: {len(text)} characters (max {max_length})",
-            field="text",
-            length=len(text),
-            max_length=max_length
-        )
+    length = len(text)
+    if max_length and length > max_length:
+        raise _too_long(length, max_length)
 
     # Check if empty after sanitization
-    if not text:
+    if not length:
         raise ValidationError("Input is empty after sanitization")
 
     return text
@@ -169,6 +261,9 @@ def sanitize_input(
 # Topic Validation
 # ============================================================
 
+# Validation is deterministic, so accepted inputs are memoized (failures
+# raise and are not cached). Raw input is at most 2x max_length here.
+@lru_cache(maxsize=1024)
 def validate_topic(
     topic: str,
     min_length: int = 3,
@@ -199,11 +294,12 @@ def validate_topic(
     topic = sanitize_input(topic, max_length=max_length)
 
     # Check minimum length
-    if len(topic) < min_length:
+    length = len(topic)
+    if length < min_length:
         raise ValidationError(
-            f"Topic too short: {len(topic)} characters (min {min_length})",
+            f"Topic too short: {length} characters (min {min_length})",
             field="topic",
-            length=len(topic),
+            length=length,
             min_length=min_length
         )
 
@@ -214,6 +310,43 @@ def validate_topic(
     return topic
 
 
+def validate_topics(
+    topics: List[str],
+    min_length: int = 3,
+    max_length: int = 500,
+    check_injection: bool = True
+) -> Tuple[List[str], List[Tuple[int, PotensiaAIError]]]:
+    """
+    Validate a batch of blog topics, collecting failures instead of raising.
+
+    Oversized topics are rejected before any sanitizing (see sanitize_input)
+    and repeated topics hit the validate_topic cache.
+
+    Args:
+        topics: Blog topics to validate
+        min_length: Minimum allowed length
+        max_length: Maximum allowed length
+        check_injection: Check for prompt injection
+
+    Returns:
+        Tuple of (validated topics in input order, [(index, error), ...] for rejected topics)
+
+    Example:
+        >>> validate_topics(["Python tutorial", "AI"])
+        (['Python tutorial'], [(1, ValidationError('Topic too short: 2 characters (min 3)'))])
+    """
+    valid: List[str] = []
+    failed: List[Tuple[int, PotensiaAIError]] = []
+
+    for index, topic in enumerate(topics):
+        try:
+            valid.append(validate_topic(topic, min_length, max_length, check_injection))
+        except (ValidationError, PromptInjectionDetected) as e:
+            failed.append((index, e))
+
+    return valid, failed
+
+
 # ============================================================
 # Content Validation
 # ============================================================
@@ -249,11 +382,12 @@ def validate_content(
     )
 
     # Check minimum length
-    if len(content) < min_length:
+    length = len(content)
+    if length < min_length:
         raise ValidationError(
-            f"Content too short: {len(content)} characters (min {min_length})",
+            f"Content too short: {length} characters (min {min_length})",
             field="content",
-            length=len(content),
+            length=length,
             min_length=min_length
         )
 
@@ -264,6 +398,11 @@ def validate_content(
 # Email Validation
 # ============================================================
 
+# Basic email regex (RFC 5322 compliant)
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+
+@lru_cache(maxsize=1024)
 def validate_email(email: str) -> str:
     """
     Validate email address format.
@@ -283,10 +422,13 @@ def validate_email(email: str) -> str:
     """
     email = sanitize_input(email, max_length=254)
 
-    # Basic email regex (RFC 5322 compliant)
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-
-    if not re.match(pattern, email):
+    # Structural checks with str methods first; the regex only sees plausible addresses
+    if (
+        len(email) < 6
+        or email.count('@') != 1
+        or '.' not in email.partition('@')[2]
+        or not _EMAIL_RE.fullmatch(email)
+    ):
         raise ValidationError(
             "Invalid email format",
             field="email",
@@ -300,6 +442,14 @@ def validate_email(email: str) -> str:
 # Size/Resolution Validation
 # ============================================================
 
+# Default allowed sizes for DALL-E
+_DALLE_SIZES = (
+    "256x256", "512x512", "1024x1024",  # DALL-E 2
+    "1792x1024", "1024x1792"  # DALL-E 3
+)
+_DALLE_SIZE_SET = frozenset(_DALLE_SIZES)
+
+
 def validate_image_size(size: str, allowed_sizes: Optional[List[str]] = None) -> str:
     """
     Validate image size format.
@@ -318,21 +468,14 @@ def validate_image_size(size: str, allowed_sizes: Optional[List[str]] = None) ->
         >>> validate_image_size("1024x1024")
         "1024x1024"
     """
-    # Default allowed sizes for DALL-E
-    if allowed_sizes is None:
-        allowed_sizes = [
-            "256x256", "512x512", "1024x1024",  # DALL-E 2
-            "1792x1024", "1024x1792"  # DALL-E 3
-        ]
-
     size = size.strip()
 
-    if size not in allowed_sizes:
+    if size not in (_DALLE_SIZE_SET if allowed_sizes is None else allowed_sizes):
         raise ValidationError(
             f"Invalid image size: {size}",
             field="size",
             value=size,
-            allowed_values=allowed_sizes
+            allowed_values=list(_DALLE_SIZES) if allowed_sizes is None else allowed_sizes
         )
 
     return size
@@ -1,4 +1,5 @@
 # main.py
+import os
 import sys
 from pathlib import Path
 
@@ -7,22 +8,28 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from core.config import settings
+from core.clients import get_anthropic, get_openai
+from ai_clients.http_pool import close_shared_http_client
 from api.router import router as writer_router  # ✅ 변경 포인트
 
 app = FastAPI(
     title=settings.APP_NAME,
     version="0.1",
     description="AI-powered content automation platform",
+    default_response_class=ORJSONResponse,
 )
 
 # ✅ CORS 설정
+# 운영: settings.CORS_ORIGINS에 지정된 도메인만 credentials와 함께 허용
+# 개발(미지정): 모든 도메인 허용, credentials 없이 고정 "*" 헤더 반환
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # MVP: 전체 허용 (추후 제한)
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.CORS_ORIGINS or ("*",),
+    allow_credentials=bool(settings.CORS_ORIGINS),
+    allow_methods=("GET", "POST"),
+    allow_headers=("Authorization", "Content-Type"),
 )
 
 # ✅ Health Check
@@ -30,9 +37,29 @@ app.add_middleware(
 async def health_check():
     return {"status": "ok", "app": settings.APP_NAME, "env": settings.ENV}
 
+# ✅ 공유 SDK 클라이언트 생성 (첫 요청 전에 커넥션 풀 준비)
+@app.on_event("startup")
+async def create_clients():
+    app.state.openai = get_openai()
+    app.state.anthropic = get_anthropic()
+
+# ✅ 공유 HTTP 커넥션 풀 정리
+@app.on_event("shutdown")
+async def close_http_pool():
+    await close_shared_http_client()
+
 # ✅ Writer Router 연결
 app.include_router(writer_router)  # /api/write/* 포함됨
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # 개발(DEBUG): 자동 리로드 단일 프로세스 / 운영: WEB_CONCURRENCY개 워커
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        reload=settings.DEBUG,
+        workers=None if settings.DEBUG else int(os.getenv("WEB_CONCURRENCY", "4")),
+    )